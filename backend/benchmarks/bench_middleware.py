@@ -0,0 +1,148 @@
+"""
+⏱️ Benchmark: request logging + rate limiting middleware overhead
+
+Calls a trivial FastAPI endpoint in-process (raw ASGI messages, no server or
+HTTP client) with no middleware, with the previous BaseHTTPMiddleware
+versions, and with the pure ASGI versions, and reports requests/sec. A
+streamed endpoint checks the time until the first body chunk arrives.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_middleware [--requests 5000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from middleware import MemoryStore, RateLimiter, RateLimitMiddleware, RequestLoggingMiddleware
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware rate limiter this module replaced (baseline)"""
+    
+    def __init__(self, app, rate_limiter):
+        super().__init__(app)
+        self.rate_limiter = rate_limiter
+    
+    async def dispatch(self, request: Request, call_next):
+        state = self.rate_limiter.check(request.client.host)
+        response = await call_next(request)
+        response.headers['X-RateLimit-Limit'] = str(self.rate_limiter.requests_per_minute)
+        response.headers['X-RateLimit-Remaining'] = str(state["remaining"])
+        return response
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware request logger this module replaced (baseline)"""
+    
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        logging.getLogger("middleware").info(f"🔵 {request.method} {request.url.path} - {request.client.host}")
+        response = await call_next(request)
+        processing_time = time.time() - start_time
+        logging.getLogger("middleware").info(f"✅ {request.method} {request.url.path} - Status: {response.status_code}")
+        response.headers['X-Process-Time'] = f"{processing_time:.3f}"
+        return response
+
+
+def make_app(rate_limit, logging_middleware):
+    app = FastAPI()
+    
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b"first"
+            await asyncio.sleep(0.05)
+            yield b"second"
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+    
+    if rate_limit:
+        # Large enough that no request is rejected
+        app.add_middleware(rate_limit, rate_limiter=RateLimiter(10 ** 9, store=MemoryStore()))
+    if logging_middleware:
+        app.add_middleware(logging_middleware)
+    return app
+
+
+async def call(app, path, client_id):
+    """One GET through the ASGI app; returns (status, seconds until the first body chunk)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": (client_id, 50000), "server": ("bench", 80)
+    }
+    started = time.perf_counter()
+    first_chunk = None
+    status = None
+    
+    request_sent = False
+    response_done = asyncio.Event()
+    
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+    
+    async def send(message):
+        nonlocal first_chunk, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body") and first_chunk is None:
+            first_chunk = time.perf_counter() - started
+    
+    await app(scope, receive, send)
+    response_done.set()
+    return status, first_chunk
+
+
+async def throughput(app, requests, concurrency):
+    """Requests/sec for /ping with concurrency requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(i):
+        async with semaphore:
+            await call(app, "/ping", f"10.0.{i % 200}.{i % 250}")
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main_async(args):
+    variants = [
+        ("no middleware", make_app(None, None)),
+        ("BaseHTTPMiddleware", make_app(LegacyRateLimitMiddleware, LegacyRequestLoggingMiddleware)),
+        ("pure ASGI", make_app(RateLimitMiddleware, RequestLoggingMiddleware))
+    ]
+    for label, app in variants:
+        await throughput(app, 200, args.concurrency)  # warm up
+        rate = await throughput(app, args.requests, args.concurrency)
+        _, first_chunk = await call(app, "/stream", "10.0.0.1")
+        print(f"{label:<20} {rate:9.0f} req/s   stream first chunk {first_chunk * 1000:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark middleware overhead")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    
+    # Measure the middleware, not log output
+    logging.getLogger("middleware").setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+⏱️ Benchmark: OCR reading-order sort - row scan vs vectorized line clustering
+
+Times the original row-scanning sort (O(n·rows), fixed 20px tolerance)
+against the NumPy implementation in OCREngine._sort_text_by_position on
+synthetic pages of 10 to 10,000 word boxes, and checks that both give the
+same order on uniform-font pages where the fixed tolerance is correct.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_ocr_sort [--sizes 10,100,1000,10000] [--runs 5]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from engines.ocr_engine import OCREngine
+
+
+def legacy_sort(results):
+    """Original row-scanning sort, kept for comparison"""
+    rows = []
+    line_tolerance = 20
+    
+    for bbox, text, conf in results:
+        y_coords = [point[1] for point in bbox]
+        y_center = sum(y_coords) / len(y_coords)
+        x_left = min(point[0] for point in bbox)
+        
+        for row in rows:
+            if abs(y_center - row['y']) < line_tolerance:
+                row['items'].append((x_left, bbox, text, conf))
+                break
+        else:
+            rows.append({'y': y_center, 'items': [(x_left, bbox, text, conf)]})
+    
+    rows.sort(key=lambda r: r['y'])
+    sorted_results = []
+    for row in rows:
+        row['items'].sort(key=lambda item: item[0])
+        sorted_results.extend([(bbox, text, conf) for x, bbox, text, conf in row['items']])
+    return sorted_results
+
+
+def synthetic_page(count, seed=0, mixed_fonts=False):
+    """
+    Shuffled word boxes laid out in lines, like EasyOCR output for a dense page
+    
+    Args:
+        count: Number of boxes
+        seed: Random seed
+        mixed_fonts: Vary the font size per line (headings, footnotes)
+    """
+    rng = random.Random(seed)
+    words_per_line = 12
+    results = []
+    y = 10.0
+    while len(results) < count:
+        font = rng.choice([8, 12, 16, 32, 48]) if mixed_fonts else 16
+        x = 10.0
+        for _ in range(min(words_per_line, count - len(results))):
+            width = font * rng.uniform(1.5, 5.0)
+            jitter = rng.uniform(-0.15, 0.15) * font
+            top, bottom = y + jitter, y + jitter + font
+            bbox = [[x, top], [x + width, top], [x + width, bottom], [x, bottom]]
+            results.append((bbox, f"w{len(results)}", rng.uniform(0.5, 1.0)))
+            x += width + font * 0.5
+        y += font * 1.6
+    rng.shuffle(results)
+    return results
+
+
+def time_runs(fn, results, runs):
+    """Median time of fn(results) over several runs"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(results)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR reading-order sort")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Comma-separated box counts")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per size")
+    args = parser.parse_args()
+    
+    engine = OCREngine()
+    
+    print(f"{'boxes':>7} {'legacy ms':>11} {'vectorized ms':>14} {'speedup':>8}  same order")
+    for size in (int(s) for s in args.sizes.split(",")):
+        results = synthetic_page(size)
+        legacy = time_runs(legacy_sort, results, args.runs)
+        vectorized = time_runs(engine._sort_text_by_position, results, args.runs)
+        same = legacy_sort(results) == engine._sort_text_by_position(results)
+        print(f"{size:>7} {legacy * 1000:>11.2f} {vectorized * 1000:>14.2f} {legacy / vectorized:>7.1f}x  {'✅' if same else '⚠️'}")
+    
+    # With mixed font sizes the fixed 20px tolerance merges or splits lines
+    results = synthetic_page(1000, mixed_fonts=True)
+    words = [text for _, text, _ in sorted(results, key=lambda r: int(r[1][1:]))]
+    legacy_ok = [text for _, text, _ in legacy_sort(results)] == words
+    vectorized_ok = [text for _, text, _ in engine._sort_text_by_position(results)] == words
+    print(f"Mixed font sizes - legacy order correct: {legacy_ok}, vectorized order correct: {vectorized_ok}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+⏱️ Benchmark: rate limiter with many distinct clients
+
+Replays requests from --clients distinct client ids (a few requests each)
+through the previous list-based limiter and the sliding-window counter,
+with simulated time passing, and reports the cost per request, the memory
+held and how many clients each still tracks. A second run sends many
+requests from a few clients under a high limit, where rebuilding the
+timestamp list on every request grows with the limit.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_rate_limiter [--clients 100000] [--requests-per-client 5] [--limit 30] [--hot-limit 1000]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+from unittest import mock
+
+from middleware import MemoryStore, RateLimiter
+
+
+class LegacyRateLimiter:
+    """The list-of-timestamps limiter this module replaced (baseline)"""
+    
+    def __init__(self, requests_per_minute=30):
+        self.requests_per_minute = requests_per_minute
+        self.requests = defaultdict(list)
+        self.window = 60
+    
+    def is_allowed(self, client_id):
+        now = time.time()
+        self.requests[client_id] = [t for t in self.requests[client_id] if now - t < self.window]
+        if len(self.requests[client_id]) >= self.requests_per_minute:
+            return False
+        self.requests[client_id].append(now)
+        return True
+    
+    def get_remaining(self, client_id):
+        now = time.time()
+        recent = [t for t in self.requests[client_id] if now - t < self.window]
+        return max(0, self.requests_per_minute - len(recent))
+    
+    def check(self, client_id):
+        """What the old middleware did per request"""
+        if self.is_allowed(client_id):
+            self.get_remaining(client_id)
+
+
+class Clock:
+    """Simulated wall clock shared by both limiters"""
+    
+    def __init__(self):
+        self.now = 1_700_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+
+def workload(clients, per_client, seed=7):
+    """Client ids in arrival order; each client sends per_client requests"""
+    ids = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)] * per_client
+    random.Random(seed).shuffle(ids)
+    return ids
+
+
+def replay(make_limiter, ids, step):
+    """Replay ids step simulated seconds apart; returns (seconds, limiter)"""
+    clock = Clock()
+    limiter = make_limiter(clock)
+    check = limiter.check
+    with mock.patch("time.time", clock):
+        started = time.perf_counter()
+        for client_id in ids:
+            clock.now += step
+            check(client_id)
+        return time.perf_counter() - started, limiter
+
+
+def run(label, make_limiter, ids, step, tracked):
+    """Report time per request, then memory held and clients tracked"""
+    elapsed, _ = replay(make_limiter, ids, step)
+    tracemalloc.start()
+    _, limiter = replay(make_limiter, ids, step)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    print(f"  {label:<24} {elapsed / len(ids) * 1e6:8.2f} µs/request  "
+          f"{memory / 1024 / 1024:8.1f} MB  clients tracked {tracked(limiter):>7}")
+
+
+def compare(ids, duration, limit):
+    step = duration / len(ids)
+    run("list of timestamps", lambda clock: LegacyRateLimiter(limit), ids, step,
+        lambda limiter: len(limiter.requests))
+    run("sliding window counter", lambda clock: RateLimiter(limit, store=MemoryStore(max_keys=0), clock=clock),
+        ids, step, lambda limiter: len(limiter.store.counters))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rate limiters with many clients")
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--requests-per-client", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--hot-limit", type=int, default=1000, help="Limit for the few-clients run")
+    parser.add_argument("--duration", type=float, default=1800, help="Simulated seconds the workload spans")
+    args = parser.parse_args()
+    
+    ids = workload(args.clients, args.requests_per_client)
+    print(f"{len(ids)} requests from {args.clients} clients over {args.duration:g} simulated seconds")
+    compare(ids, args.duration, args.limit)
+    
+    # A few clients at the limit for the whole run
+    ids = workload(10, 10_000)
+    print(f"{len(ids)} requests from 10 clients over 60 simulated seconds, limit {args.hot_limit}/min")
+    compare(ids, 60, args.hot_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+⏱️ Benchmark: in-process AIFF -> WAV conversion vs an ffmpeg subprocess
+
+Writes synthetic speech-like AIFF clips (what `say` produces: 22.05 kHz,
+16-bit, mono) and converts each to 44.1 kHz mono WAV, first with
+audio_transcode (the path TTSEngine uses), then with one ffmpeg process per
+file as before. The ffmpeg run is skipped when ffmpeg is not installed.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_transcode [--durations 1,5,30] [--repeat 20]
+"""
+import argparse
+import math
+import shutil
+import statistics
+import struct
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from engines.audio_transcode import read_audio, downmix, resample, write_wav
+
+
+def write_aiff(path, samples, rate):
+    """Write mono 16-bit big-endian AIFF"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('>i2').tobytes()
+    mantissa, exponent = math.frexp(rate)
+    extended = struct.pack(">HQ", exponent - 1 + 16383, int(mantissa * 2 ** 64))
+    comm = struct.pack(">hIh", 1, len(samples), 16) + extended
+    ssnd = struct.pack(">II", 0, 0) + pcm
+    body = b"AIFF" + b"COMM" + struct.pack(">I", len(comm)) + comm + b"SSND" + struct.pack(">I", len(ssnd)) + ssnd
+    Path(path).write_bytes(b"FORM" + struct.pack(">I", len(body)) + body)
+
+
+def speech_like(seconds, rate=22050):
+    """Amplitude-modulated harmonics, roughly the spectrum of a voice"""
+    t = np.arange(int(seconds * rate)) / rate
+    tone = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    return (0.3 * tone * envelope).astype(np.float32)
+
+
+def convert_in_process(source, target):
+    samples, rate = read_audio(source)
+    write_wav(target, resample(downmix(samples), rate, 44100), 44100)
+
+
+def convert_ffmpeg(source, target):
+    subprocess.run(
+        ['ffmpeg', '-i', str(source), '-ar', '44100', '-ac', '1', str(target), '-y'],
+        check=True, capture_output=True
+    )
+
+
+def time_conversions(convert, source, directory, repeat):
+    """Per-conversion wall times in seconds"""
+    times = []
+    for i in range(repeat):
+        target = Path(directory) / f"out_{i}.wav"
+        started = time.perf_counter()
+        convert(source, target)
+        times.append(time.perf_counter() - started)
+        target.unlink()
+    return times
+
+
+def report(label, times):
+    print(f"  {label:<12} median {statistics.median(times) * 1000:8.2f} ms  "
+          f"min {min(times) * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark in-process audio conversion")
+    parser.add_argument("--durations", default="1,5,30", help="Clip lengths in seconds")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        print("ffmpeg not found - timing the in-process path only")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for seconds in [float(value) for value in args.durations.split(',')]:
+            source = Path(directory) / f"clip_{seconds:g}s.aiff"
+            write_aiff(source, speech_like(seconds), 22050)
+            print(f"{seconds:g}s clip ({source.stat().st_size // 1024} KB AIFF)")
+            report("in-process", time_conversions(convert_in_process, source, directory, args.repeat))
+            if ffmpeg:
+                report("ffmpeg", time_conversions(convert_ffmpeg, source, directory, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+🧪 Local stand-in for the Google Translate web endpoint
+
+Answers GET requests the way translate.google.com/m does (the translation
+inside <div class="result-container">), with configurable latency and error
+rate, so the translation path can be benchmarked and load-tested offline.
+The "translation" is the input prefixed with the target language.
+
+Usage (from the backend directory):
+    python -m benchmarks.fake_translate_server [--port 8765] [--latency-ms 80] [--error-rate 0.02]
+
+Then start the API with:
+    TRANSLATION_GOOGLE_URL=http://127.0.0.1:8765/m
+"""
+import argparse
+import html
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_handler(latency_ms=80, jitter_ms=20, error_rate=0.0):
+    """Request handler class with the given latency and error behaviour"""
+    
+    class FakeTranslateHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def do_GET(self):
+            delay = max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000
+            time.sleep(delay)
+            
+            if random.random() < error_rate:
+                self._send(503, "<html><body>Service Unavailable</body></html>")
+                return
+            
+            params = parse_qs(urlparse(self.path).query)
+            text = params.get("q", [""])[0]
+            target = params.get("tl", ["en"])[0]
+            self._send(200, (
+                "<html><body>"
+                f'<div class="result-container">[{html.escape(target)}] {html.escape(text)}</div>'
+                "</body></html>"
+            ))
+        
+        def _send(self, status, body):
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return FakeTranslateHandler
+
+
+def start_server(port=0, latency_ms=80, jitter_ms=20, error_rate=0.0):
+    """
+    Run the stand-in on a background thread
+    
+    Args:
+        port: Port to listen on (0 = any free port)
+        latency_ms: Mean response latency
+        jitter_ms: Standard deviation of the latency
+        error_rate: Fraction of requests answered with 503
+    
+    Returns:
+        (server, base URL to use as TRANSLATION_GOOGLE_URL)
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_ms, jitter_ms, error_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/m"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Google Translate endpoint")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port),
+        make_handler(args.latency_ms, args.jitter_ms, args.error_rate)
+    )
+    print(f"🧪 Fake translate endpoint on http://127.0.0.1:{args.port}/m "
+          f"({args.latency_ms}ms ± {args.jitter_ms}ms, {args.error_rate:.0%} errors)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""
+⏱️ Benchmark: offline suite covering every engine and endpoint
+
+Runs without network access or downloaded weights:
+- captioning uses a tiny, randomly initialised BLIP (same architecture and
+  code path, so relative changes in pre/post-processing and decoding show up)
+- OCR uses a stub EasyOCR reader that finds dark text bands with NumPy
+- translation goes to benchmarks/fake_translate_server on a local port
+- speech is a synthetic WAV written in place of gTTS
+
+Each engine is timed directly at several image sizes, text lengths and
+batch sizes, then every endpoint is driven in-process through the FastAPI
+app (httpx ASGI transport) at several concurrency levels. Results are
+written as JSON; --compare flags regressions between two result files.
+
+Usage (from the backend directory):
+    python -m benchmarks.run_benchmarks [--output results.json] [--runs 5] [--quick]
+    python -m benchmarks.run_benchmarks --compare baseline.json results.json [--threshold 0.10]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+IMAGE_SIZES = (256, 1024, 2048)
+BATCH_SIZES = (1, 4, 8)
+CONCURRENCY = (1, 4, 16)
+TEXT_LENGTHS = (50, 500, 2000)
+
+WORDS = ("the", "a", "man", "woman", "dog", "cat", "street", "park", "sitting", "standing",
+         "on", "in", "with", "near", "red", "blue", "green", "large", "small", "old", "bright",
+         "photo", "of", "two", "people", "car", "tree", "building", "water", "sky", "sign")
+
+
+# ============ Offline stand-ins ============
+
+def tiny_blip(vocab_dir, image_size=384, seed=0):
+    """
+    Randomly initialised BLIP captioning model with a small vocabulary
+    
+    Returns:
+        (processor, model)
+    """
+    import torch
+    from transformers import (BertTokenizer, BlipConfig, BlipForConditionalGeneration,
+                              BlipImageProcessor, BlipProcessor)
+    from engines.caption_engine import CaptionEngine
+    
+    prompt_words = {word for prompt in CaptionEngine.ASPECT_PROMPTS.values() for word in prompt.split()}
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "[DEC]", ".", ",", ":", "-"]
+    vocab += sorted(prompt_words | set(WORDS))
+    vocab_file = Path(vocab_dir) / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab) + "\n")
+    
+    tokenizer = BertTokenizer(str(vocab_file))
+    processor = BlipProcessor(BlipImageProcessor(size={"height": image_size, "width": image_size}), tokenizer)
+    
+    config = BlipConfig(
+        vision_config={
+            "hidden_size": 64, "intermediate_size": 128, "num_hidden_layers": 2,
+            "num_attention_heads": 2, "image_size": image_size, "patch_size": 32
+        },
+        text_config={
+            "vocab_size": len(vocab), "hidden_size": 64, "encoder_hidden_size": 64,
+            "intermediate_size": 128, "num_hidden_layers": 2, "num_attention_heads": 2,
+            "max_position_embeddings": 128, "pad_token_id": vocab.index("[PAD]"),
+            "bos_token_id": vocab.index("[DEC]"), "sep_token_id": vocab.index("[SEP]"),
+            "eos_token_id": vocab.index("[SEP]")
+        }
+    )
+    torch.manual_seed(seed)
+    return processor, BlipForConditionalGeneration(config).eval()
+
+
+class StubReader:
+    """EasyOCR stand-in: dark horizontal bands are text lines, one word per line"""
+    
+    def detect(self, img, reformat=True, **kwargs):
+        grey = img.mean(axis=2) if img.ndim == 3 else img
+        ink = grey < 128
+        rows = np.concatenate(([False], ink.mean(axis=1) > 0.01, [False]))
+        edges = np.flatnonzero(np.diff(rows.astype(np.int8)))
+        boxes = []
+        for y0, y1 in zip(edges[::2], edges[1::2]):
+            columns = np.flatnonzero(ink[y0:y1].any(axis=0))
+            if len(columns):
+                boxes.append([int(columns[0]), int(columns[-1]), int(y0), int(y1)])
+        return [boxes], [[]]
+    
+    def recognize(self, img_cv_grey, horizontal_list, free_list, reformat=True, **kwargs):
+        return [
+            ([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], WORDS[i % len(WORDS)], 0.9)
+            for i, (x0, x1, y0, y1) in enumerate(horizontal_list)
+        ]
+    
+    def readtext(self, image, **kwargs):
+        from easyocr.utils import reformat_input
+        img, img_cv_grey = reformat_input(image)
+        horizontal_list, free_list = self.detect(img)
+        return self.recognize(img_cv_grey, horizontal_list[0], free_list[0])
+    
+    def readtext_batched(self, images, **kwargs):
+        return [self.readtext(image) for image in images]
+
+
+def stub_speech():
+    """gTTS replacement writing a synthetic WAV about as long as the text takes to say"""
+    from engines.audio_transcode import write_wav
+    from benchmarks.bench_transcode import speech_like
+    
+    def generate(text, language, audio_file):
+        audio_file = Path(audio_file).with_suffix(".wav")
+        samples = speech_like(min(60.0, 0.06 * max(1, len(text))))
+        write_wav(audio_file, samples.astype(np.float32).reshape(-1, 1), 22050)
+        return {"success": True, "audio_file": str(audio_file), "engine": "stub", "language": language, "format": "wav"}
+    
+    return generate
+
+
+def make_image(size, seed=0):
+    """JPEG bytes of a size x size page with dark text-like lines"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (size, size), (245, 245, 240))
+    draw = ImageDraw.Draw(image)
+    line_height = max(8, size // 40)
+    for y in range(line_height, size - line_height, line_height * 2):
+        x = line_height
+        while x < size - line_height * 4:
+            width = rng.randint(line_height, line_height * 4)
+            draw.rectangle([x, y, x + width, y + line_height], fill=(20, 20, 20))
+            x += width + line_height
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def make_text(length, seed=0):
+    """Sentences of about length characters"""
+    rng = random.Random(seed)
+    sentences = []
+    while sum(len(s) + 1 for s in sentences) < length:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 12))]
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)[:max(1, length)]
+
+
+def load_app(translate_latency_ms):
+    """
+    Import the API with offline settings and install the stand-ins
+    
+    Returns:
+        the imported main module
+    """
+    from benchmarks.fake_translate_server import start_server
+    _, translate_url = start_server(latency_ms=translate_latency_ms, jitter_ms=translate_latency_ms / 5)
+    
+    # Measure engine work, not caches, limits or logging
+    os.environ.update({
+        "RESULT_CACHE_ENABLED": "false", "TRANSLATION_CACHE_ENABLED": "false", "TTS_CACHE_ENABLED": "false",
+        "RATE_LIMIT_ENABLED": "false", "REQUEST_LOGGING_ENABLED": "false", "PROFILING_ENABLED": "false",
+        "METRICS_ENABLED": "true", "PRELOAD_ENGINES": "", "ENGINE_MAX_QUEUE": "0",
+        "TRANSLATION_BACKENDS": "google", "TRANSLATION_GOOGLE_URL": translate_url,
+        "TTS_PYTTSX3_WORKERS": "0"
+    })
+    import main
+    import engines.tts_engine as tts_module
+    
+    processor, model = tiny_blip(tempfile.mkdtemp())
+    main.caption_engine.state.begin_loading()
+    main.caption_engine.processor, main.caption_engine.model = processor, model
+    main.caption_engine.state.finish_loading()
+    
+    main.ocr_engine.reader_pool._create_reader = lambda languages: StubReader()
+    
+    tts_module.GTTS_AVAILABLE = True
+    main.tts_engine.system = "Linux"
+    main.tts_engine._generate_gtts = stub_speech()
+    return main
+
+
+# ============ Measurement ============
+
+def summarize(latencies, elapsed, errors=0, **params):
+    """Latency percentiles (ms) and throughput for one scenario"""
+    ordered = sorted(latencies)
+    return {
+        **params,
+        "runs": len(latencies),
+        "errors": errors,
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "throughput_per_s": round(len(latencies) / elapsed, 3) if elapsed else 0.0
+    }
+
+
+def time_calls(fn, runs, items=1):
+    """Call fn runs times after one warm-up call; throughput counts items per call"""
+    fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(runs):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies, elapsed)
+    result["throughput_per_s"] = round(runs * items / elapsed, 3)
+    return result
+
+
+def bench_engines(main, args, record):
+    """Direct engine calls, one at a time"""
+    for size in args.image_sizes:
+        image = make_image(size)
+        record(f"engine.caption.local[size={size}]", time_calls(
+            lambda: main.caption_engine.generate_caption_from_image(image, mode="local", detailed=False), args.runs))
+        record(f"engine.caption.detailed[size={size}]", time_calls(
+            lambda: main.caption_engine.generate_caption_from_image(image, mode="local", detailed=True), args.runs))
+        record(f"engine.ocr[size={size}]", time_calls(
+            lambda: main.ocr_engine.extract_text_from_image(image, ["en"]), args.runs))
+    record(f"engine.ocr.tiled[size={max(args.image_sizes)}]", time_calls(
+        lambda: main.ocr_engine.extract_text_from_image(make_image(max(args.image_sizes)), ["en"], tiled=True), args.runs))
+    
+    for batch_size in args.batch_sizes:
+        images = [make_image(512, seed=i) for i in range(batch_size)]
+        record(f"engine.caption.batch[batch={batch_size}]", time_calls(
+            lambda: main.caption_engine.generate_caption_batch(images, detailed=False), args.runs, items=batch_size))
+        record(f"engine.ocr.batch[batch={batch_size}]", time_calls(
+            lambda: main.ocr_engine.extract_text_batch(images, ["en"]), args.runs, items=batch_size))
+    
+    for length in args.text_lengths:
+        text = make_text(length)
+        record(f"engine.translation[chars={length}]", time_calls(
+            lambda: main.translation_engine.translate(text, "es"), args.runs))
+        record(f"engine.tts[chars={length}]", time_calls(
+            lambda: main.tts_engine.generate_speech(text, "en", 200), args.runs))
+
+
+async def drive(client, make_request, requests, concurrency):
+    """Send requests with at most concurrency in flight; returns (latencies, elapsed, errors)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, time.perf_counter() - started, errors
+
+
+def endpoint_requests(args):
+    """name -> request builder for every endpoint"""
+    image = make_image(args.endpoint_image_size)
+    images = [make_image(args.endpoint_image_size, seed=i) for i in range(4)]
+    text = make_text(300)
+    jpeg = "image/jpeg"
+    
+    def upload(path, data, files=None):
+        return lambda client, i: client.post(path, data=data, files=files or {"file": (f"{i}.jpg", image, jpeg)})
+    
+    return {
+        "POST /api/ocr": upload("/api/ocr", {"languages": "en"}),
+        "POST /api/ocr/batch": upload("/api/ocr/batch", {"languages": "en"},
+                                      [("files", (f"{n}.jpg", data, jpeg)) for n, data in enumerate(images)]),
+        "POST /api/caption": upload("/api/caption", {"mode": "local", "detailed": "true"}),
+        "POST /api/translate": lambda client, i: client.post("/api/translate", json={"text": text, "target_language": "es"}),
+        "POST /api/translate/batch": lambda client, i: client.post("/api/translate/batch", json={
+            "texts": [make_text(120, seed=n) for n in range(5)], "target_languages": ["es", "fr"]}),
+        "POST /api/tts": lambda client, i: client.post("/api/tts", json={"text": text, "language": "en"}),
+        "POST /api/tts/stream": lambda client, i: client.post("/api/tts/stream", json={"text": text, "language": "en"}),
+        "POST /api/analyze": upload("/api/analyze", {
+            "stages": "ocr,caption,translate,tts", "mode": "local", "detailed": "false", "target_language": "es"})
+    }
+
+
+async def bench_endpoints(main, args, record):
+    """Every endpoint through the ASGI app at each concurrency level"""
+    import httpx
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, make_request in endpoint_requests(args).items():
+            await make_request(client, 0)  # warm up
+            for concurrency in args.concurrency:
+                latencies, elapsed, errors = await drive(client, make_request, args.runs * concurrency, concurrency)
+                record(f"api.{name}[concurrency={concurrency}]", summarize(latencies, elapsed, errors, concurrency=concurrency))
+
+
+def stage_breakdown(registry):
+    """Mean time per engine stage recorded by engines/metrics.py during the run"""
+    stages = {}
+    for (name, labels), histogram in sorted(registry.histograms.items()):
+        if name == "stage_seconds" and histogram.count:
+            labels = dict(labels)
+            stages[f"{labels['engine']}.{labels['stage']}"] = {
+                "count": histogram.count,
+                "mean_ms": round(histogram.sum / histogram.count * 1000, 3)
+            }
+    return stages
+
+
+def run(args):
+    output = Path(args.output).resolve()
+    backend_dir = str(Path(__file__).resolve().parent.parent)
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    
+    # Speech files and other outputs go to a scratch directory
+    workdir = tempfile.TemporaryDirectory()
+    os.chdir(workdir.name)
+    main = load_app(args.translate_latency_ms)
+    
+    results = {}
+    
+    def record(name, result):
+        results[name] = result
+        errors = f"  {result['errors']} errors" if result.get("errors") else ""
+        print(f"  {name:<52} p50 {result['p50_ms']:9.1f} ms  p95 {result['p95_ms']:9.1f} ms  "
+              f"{result['throughput_per_s']:8.2f}/s{errors}", file=sys.__stdout__)
+    
+    # Engine and request log lines would drown the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        print("⏱️ Engines", file=sys.__stdout__)
+        bench_engines(main, args, record)
+        print("⏱️ Endpoints", file=sys.__stdout__)
+        asyncio.run(bench_endpoints(main, args, record))
+    main.executors.shutdown()
+    
+    import torch
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "settings": {key: getattr(args, key) for key in (
+                "runs", "image_sizes", "batch_sizes", "concurrency", "text_lengths",
+                "endpoint_image_size", "translate_latency_ms")}
+        },
+        "results": results,
+        "stages": stage_breakdown(main.metrics)
+    }
+    output.write_text(json.dumps(report, indent=2))
+    print(f"📄 Results written to {output}")
+
+
+# ============ Compare ============
+
+def compare(baseline_path, current_path, threshold, min_delta_ms):
+    """
+    Print per-scenario changes and flag regressions
+    
+    A scenario regresses when its p50 latency grows, or its throughput falls,
+    by more than threshold (relative) and the p50 change exceeds min_delta_ms.
+    
+    Returns:
+        number of regressions
+    """
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+    current = json.loads(Path(current_path).read_text())["results"]
+    regressions = 0
+    
+    for name in sorted(set(baseline) | set(current)):
+        if name not in current or name not in baseline:
+            print(f"  {'➖' if name not in current else '➕'} {name} (only in {'baseline' if name not in current else 'current'})")
+            continue
+        before, after = baseline[name], current[name]
+        latency_change = (after["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+        throughput_change = ((after["throughput_per_s"] - before["throughput_per_s"]) / before["throughput_per_s"]
+                             if before["throughput_per_s"] else 0.0)
+        significant = abs(after["p50_ms"] - before["p50_ms"]) > min_delta_ms
+        regressed = significant and (latency_change > threshold or throughput_change < -threshold)
+        improved = significant and (latency_change < -threshold or throughput_change > threshold)
+        regressions += regressed
+        mark = "⚠️" if regressed else "🚀" if improved else "  "
+        print(f"{mark} {name:<52} p50 {before['p50_ms']:9.1f} -> {after['p50_ms']:9.1f} ms ({latency_change:+6.1%})  "
+              f"throughput {throughput_change:+6.1%}")
+    
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def parse_sizes(value):
+    return tuple(int(part) for part in value.split(",") if part.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for every engine and endpoint")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--runs", type=int, default=5, help="Timed calls per engine scenario (x concurrency for endpoints)")
+    parser.add_argument("--image-sizes", type=parse_sizes, default=IMAGE_SIZES)
+    parser.add_argument("--batch-sizes", type=parse_sizes, default=BATCH_SIZES)
+    parser.add_argument("--concurrency", type=parse_sizes, default=CONCURRENCY)
+    parser.add_argument("--text-lengths", type=parse_sizes, default=TEXT_LENGTHS)
+    parser.add_argument("--endpoint-image-size", type=int, default=1024)
+    parser.add_argument("--translate-latency-ms", type=float, default=5, help="Latency of the local translate stand-in")
+    parser.add_argument("--quick", action="store_true", help="Smallest sizes only, 2 runs each")
+    parser.add_argument("--verbose", action="store_true", help="Show engine output while benchmarking")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore p50 changes smaller than this")
+    args = parser.parse_args()
+    
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold, args.min_delta_ms) else 0)
+    
+    if args.quick:
+        args.runs = 2
+        args.image_sizes, args.batch_sizes = args.image_sizes[:1], args.batch_sizes[:2]
+        args.concurrency, args.text_lengths = args.concurrency[:2], args.text_lengths[:1]
+        args.endpoint_image_size = min(args.endpoint_image_size, 512)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
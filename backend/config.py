@@ -0,0 +1,184 @@
+"""
+⚙️ Runtime Configuration
+All tunables are read from environment variables with production defaults
+"""
+
+import os
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# ============ Caption Batching ============
+
+# Collect concurrent local caption requests into one model batch
+CAPTION_BATCHING_ENABLED = _env_bool("CAPTION_BATCHING_ENABLED", True)
+
+# Largest number of images decoded in one batch
+CAPTION_BATCH_MAX_SIZE = int(os.getenv("CAPTION_BATCH_MAX_SIZE", "8"))
+
+# How long the first request of a batch waits for others to join
+CAPTION_BATCH_MAX_WAIT_MS = float(os.getenv("CAPTION_BATCH_MAX_WAIT_MS", "20"))
+
+
+# ============ Engine Execution Pools ============
+
+# Worker threads per engine - CPU-heavy model work and network-bound work
+# get separate pools so they cannot starve each other
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+CAPTION_WORKERS = int(os.getenv("CAPTION_WORKERS", "2"))
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "8"))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+
+# pyttsx3 worker processes, each with its own speech engine (0 = one shared
+# engine in-process, one synthesis at a time)
+TTS_PYTTSX3_WORKERS = int(os.getenv("TTS_PYTTSX3_WORKERS", "2"))
+
+# Requests allowed to wait for a busy engine before it answers 503 (0 = unbounded)
+ENGINE_MAX_QUEUE = int(os.getenv("ENGINE_MAX_QUEUE", "32"))
+
+
+# ============ OCR Reader Pool ============
+
+# Most EasyOCR readers (one per language set) kept loaded at once (0 = no limit)
+OCR_READER_POOL_SIZE = int(os.getenv("OCR_READER_POOL_SIZE", "4"))
+
+# Memory budget for loaded reader weights (0 = no limit)
+OCR_READER_POOL_MAX_MB = int(os.getenv("OCR_READER_POOL_MAX_MB", "0"))
+
+
+# ============ Tiled OCR ============
+
+# Tile edge length and overlap for tiled OCR of large scans (tiled=true);
+# the overlap should exceed the tallest text line expected
+OCR_TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", "1280"))
+OCR_TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", "200"))
+
+# Tiles of one image recognised in parallel
+OCR_TILE_WORKERS = int(os.getenv("OCR_TILE_WORKERS", "4"))
+
+
+# ============ Result Cache ============
+
+# Cache OCR and caption results keyed on image bytes + request parameters
+RESULT_CACHE_ENABLED = _env_bool("RESULT_CACHE_ENABLED", True)
+
+# Memory budget for the in-process LRU tier
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "64"))
+
+# Directory for the persistent tier that survives restarts (empty = disabled)
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")
+RESULT_CACHE_DISK_MAX_MB = int(os.getenv("RESULT_CACHE_DISK_MAX_MB", "512"))
+
+
+# ============ Translation Backends ============
+
+# Backends in preference order: 'phrase_table', 'marian', 'google'; the
+# fastest one that can translate a language pair is picked at runtime
+TRANSLATION_BACKENDS = [name.strip() for name in os.getenv("TRANSLATION_BACKENDS", "google").split(",") if name.strip()]
+
+# Google Translate endpoint override (e.g. benchmarks/fake_translate_server.py)
+TRANSLATION_GOOGLE_URL = os.getenv("TRANSLATION_GOOGLE_URL", "")
+
+# Longest chunk sent to a provider; longer texts are split on sentence boundaries
+TRANSLATION_CHUNK_CHARS = int(os.getenv("TRANSLATION_CHUNK_CHARS", "5000"))
+
+# JSON phrase table: {"en-es": {"hello": "hola"}}
+TRANSLATION_PHRASE_TABLE = os.getenv("TRANSLATION_PHRASE_TABLE", "")
+
+# MarianMT model name pattern; only models already downloaded are used
+# unless TRANSLATION_MARIAN_DOWNLOAD is set
+TRANSLATION_MARIAN_MODEL = os.getenv("TRANSLATION_MARIAN_MODEL", "Helsinki-NLP/opus-mt-{source}-{target}")
+TRANSLATION_MARIAN_DOWNLOAD = _env_bool("TRANSLATION_MARIAN_DOWNLOAD", False)
+
+
+# ============ Translation Cache ============
+
+# Cache translations keyed on (text, source, target); shared by translation and TTS
+TRANSLATION_CACHE_ENABLED = _env_bool("TRANSLATION_CACHE_ENABLED", True)
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "10000"))
+
+# Seconds a cached translation stays valid (0 = never expires)
+TRANSLATION_CACHE_TTL = int(os.getenv("TRANSLATION_CACHE_TTL", "86400"))
+
+
+# ============ TTS Audio Cache ============
+
+# Reuse generated speech files for identical (text, language, rate, engine) requests
+TTS_CACHE_ENABLED = _env_bool("TTS_CACHE_ENABLED", True)
+
+# Size budget of cached audio in the output directory (0 = no limit)
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "256"))
+
+# Delete audio unused for this many hours (0 = never)
+TTS_CACHE_MAX_AGE_HOURS = float(os.getenv("TTS_CACHE_MAX_AGE_HOURS", "168"))
+
+# Files used this recently are never evicted (they may still be streaming)
+TTS_CACHE_GRACE_SECONDS = int(os.getenv("TTS_CACHE_GRACE_SECONDS", "60"))
+
+
+# ============ Streaming TTS ============
+
+# Longest text segment synthesized at once by /api/tts/stream (split on sentences)
+TTS_STREAM_SEGMENT_CHARS = int(os.getenv("TTS_STREAM_SEGMENT_CHARS", "200"))
+
+# Segments synthesized ahead of the one being sent
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", "3"))
+
+
+# ============ Rate Limiting & Request Logging ============
+
+# Per-client (IP) request limit; health checks and docs are exempt
+RATE_LIMIT_ENABLED = _env_bool("RATE_LIMIT_ENABLED", False)
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+
+# Most clients tracked in-process (idle clients are dropped after two minutes)
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+# Redis URL to share limits between uvicorn workers (in-process when empty)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+
+# Log every request with status and processing time
+REQUEST_LOGGING_ENABLED = _env_bool("REQUEST_LOGGING_ENABLED", True)
+
+
+# ============ Metrics ============
+
+# Per-endpoint and per-stage latency histograms, served at /api/metrics
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+
+
+# ============ Profiling ============
+
+# Profile requests with cProfile: those sending an X-Profile header, plus a
+# random fraction of all requests (0.0-1.0)
+PROFILING_ENABLED = _env_bool("PROFILING_ENABLED", False)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Most recent profiles kept for download
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+
+# Token for the /api/admin endpoints (X-Admin-Token or Authorization: Bearer);
+# admin endpoints are disabled while empty. When set, X-Profile must carry it.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+# ============ Startup Preload ============
+
+# Engines to load at startup instead of on first request: 'caption', 'ocr'
+PRELOAD_ENGINES = [name.strip() for name in os.getenv("PRELOAD_ENGINES", "").split(",") if name.strip()]
+
+# OCR language sets to preload, ';' between sets (e.g. "en;en,hi")
+PRELOAD_OCR_LANGUAGES = [
+    [lang.strip() for lang in langs.split(",") if lang.strip()]
+    for langs in os.getenv("PRELOAD_OCR_LANGUAGES", "en").split(";")
+    if langs.strip()
+]
+
+# Run a dummy inference after loading to warm kernels and allocators
+WARMUP_ENABLED = _env_bool("WARMUP_ENABLED", True)
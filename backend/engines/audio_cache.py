@@ -0,0 +1,192 @@
+"""
+Content-addressed cache of generated speech files
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class AudioCache:
+    """
+    Generated audio files in the output directory, keyed on the request
+    
+    Files are named <prefix><key><ext> so the index can be rebuilt from the
+    directory after a restart. The directory is kept within a size budget
+    and files unused for longer than max_age are deleted, least recently
+    used first - except files used within the grace period, which may still
+    be streaming to a client.
+    """
+    
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, max_age_seconds=7 * 86400,
+                 grace_seconds=60, prefix="tts_"):
+        """
+        Initialize the cache
+        
+        Args:
+            directory: Output directory holding the audio files
+            max_bytes: Size budget for cached files (0 = no size limit)
+            max_age_seconds: Delete files unused for this long (0 = never)
+            grace_seconds: Never delete files used this recently
+            prefix: File name prefix of cached files
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age_seconds
+        self.grace = grace_seconds
+        self.prefix = prefix
+        
+        # key -> {"path", "size", "used", "meta"}, least recently used first
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.lock = threading.Lock()
+        self.key_locks = {}  # key -> [lock, holders and waiters]
+        
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        
+        self._scan()
+        print(f"🔊 Audio cache initialized ({len(self.entries)} files, {self.current_bytes // (1024 * 1024)}MB in {self.directory})")
+    
+    @contextmanager
+    def key_lock(self, key):
+        """
+        Hold the lock for key while generating it, so identical requests
+        synthesize once
+        
+        Locks are reference counted and removed when the last request using
+        one leaves, so the table only holds keys being generated right now.
+        """
+        with self.lock:
+            entry = self.key_locks.get(key)
+            if entry is None:
+                entry = self.key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.key_locks[key]
+    
+    def get(self, key, waited=False):
+        """
+        Look up a cached file
+        
+        Args:
+            key: Cache key
+            waited: Second lookup after waiting on key_lock - a find counts as
+                    coalesced, a miss is not counted again
+            
+        Returns:
+            (path, metadata dict) or None on a miss
+        """
+        with self.lock:
+            self._evict()
+            entry = self.entries.get(key)
+            if entry is not None and not entry["path"].exists():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                if not waited:
+                    self.misses += 1
+                return None
+            
+            entry["used"] = time.time()
+            self.entries.move_to_end(key)
+            if waited:
+                self.coalesced += 1
+            else:
+                self.hits += 1
+            return entry["path"], dict(entry["meta"])
+    
+    def put(self, key, source, meta=None):
+        """
+        Move a freshly generated file into the cache
+        
+        Args:
+            key: Cache key
+            source: Path of the generated file (moved, not copied)
+            meta: Result fields returned with later hits
+        
+        Returns:
+            Path of the cached file
+        """
+        source = Path(source)
+        path = self.directory / f"{self.prefix}{key}{source.suffix}"
+        os.replace(source, path)
+        size = path.stat().st_size
+        
+        with self.lock:
+            if key in self.entries:
+                self._drop(key, delete=self.entries[key]["path"] != path)
+            self.entries[key] = {"path": path, "size": size, "used": time.time(), "meta": dict(meta or {})}
+            self.current_bytes += size
+            self._evict()
+        return path
+    
+    def _scan(self):
+        """Index cached files left by a previous run, oldest first"""
+        files = []
+        for path in self.directory.glob(f"{self.prefix}*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+        
+        for mtime, path, size in sorted(files):
+            key = path.stem[len(self.prefix):]
+            self.entries[key] = {"path": path, "size": size, "used": mtime, "meta": {"format": path.suffix.lstrip('.')}}
+            self.current_bytes += size
+        with self.lock:
+            self._evict()
+    
+    def _evict(self):
+        """Delete least recently used files over the size or age budget (lock held)"""
+        now = time.time()
+        for key in list(self.entries):
+            entry = self.entries[key]
+            over_size = self.max_bytes and self.current_bytes > self.max_bytes
+            too_old = self.max_age and now - entry["used"] > self.max_age
+            if not (over_size or too_old):
+                break
+            if now - entry["used"] < self.grace:
+                continue
+            self._drop(key)
+            self.evictions += 1
+    
+    def _drop(self, key, delete=True):
+        """Remove an entry and its file (lock held)"""
+        entry = self.entries.pop(key)
+        self.current_bytes -= entry["size"]
+        if delete:
+            try:
+                entry["path"].unlink()
+            except OSError:
+                pass
+    
+    def get_stats(self):
+        """Hit/miss counters and disk usage"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "generating": len(self.key_locks),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "files": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,258 @@
+"""
+In-process audio decoding, resampling and encoding for TTS output
+
+WAV and AIFF/AIFF-C are read with the standard library and NumPy, so
+converting the output of `say` or pyttsx3 needs no subprocess. MP3 and OGG
+encoding (and MP3 decoding) use optional libraries when installed.
+"""
+import struct
+import wave
+from pathlib import Path
+
+import numpy as np
+
+# Optional encoders
+try:
+    import lameenc
+    LAMEENC_AVAILABLE = True
+except Exception:
+    LAMEENC_AVAILABLE = False
+
+try:
+    import soundfile
+    SOUNDFILE_AVAILABLE = True
+except Exception:
+    SOUNDFILE_AVAILABLE = False
+
+OUTPUT_FORMATS = ("wav", "mp3", "ogg")
+
+
+class TranscodeUnavailable(Exception):
+    """The conversion needs an optional library that is not installed"""
+
+
+def available_formats():
+    """Output formats that can be produced on this machine"""
+    formats = ["wav"]
+    if LAMEENC_AVAILABLE or SOUNDFILE_AVAILABLE:
+        formats.append("mp3")
+    if SOUNDFILE_AVAILABLE:
+        formats.append("ogg")
+    return formats
+
+
+# ============ Decoding ============
+
+def read_audio(path):
+    """
+    Decode an audio file to float samples
+    
+    Args:
+        path: WAV, AIFF or AIFF-C file (MP3/OGG need soundfile)
+    
+    Returns:
+        (float32 array of shape (frames, channels) in [-1, 1], sample rate)
+    """
+    path = Path(path)
+    with open(path, 'rb') as f:
+        magic = f.read(12)
+    
+    if magic[:4] == b"FORM" and magic[8:12] in (b"AIFF", b"AIFC"):
+        return _read_aiff(path)
+    if magic[:4] == b"RIFF" and magic[8:12] == b"WAVE":
+        return _read_wav(path)
+    if SOUNDFILE_AVAILABLE:
+        samples, rate = soundfile.read(str(path), dtype='float32', always_2d=True)
+        return samples, rate
+    raise TranscodeUnavailable(f"Decoding {path.suffix or 'this file'} needs soundfile")
+
+
+def _read_wav(path):
+    """Read PCM WAV with the wave module"""
+    with wave.open(str(path), 'rb') as audio:
+        channels, width, rate = audio.getnchannels(), audio.getsampwidth(), audio.getframerate()
+        frames = audio.readframes(audio.getnframes())
+    return _pcm_to_float(frames, width, channels, big_endian=False, unsigned_8bit=True), rate
+
+
+def _read_aiff(path):
+    """
+    Read AIFF / AIFF-C (uncompressed: NONE, sowt, fl32, fl64)
+    
+    Chunks: FORM header, COMM (format), SSND (sample data).
+    """
+    data = Path(path).read_bytes()
+    is_aifc = data[8:12] == b"AIFC"
+    
+    channels = width = rate = frames_count = None
+    compression = b"NONE"
+    sound = None
+    
+    position = 12
+    while position + 8 <= len(data):
+        chunk_id = data[position:position + 4]
+        size = struct.unpack(">I", data[position + 4:position + 8])[0]
+        body = data[position + 8:position + 8 + size]
+        
+        if chunk_id == b"COMM":
+            channels, frames_count, bits = struct.unpack(">hIh", body[:8])
+            rate = _read_extended(body[8:18])
+            width = (bits + 7) // 8
+            if is_aifc and len(body) >= 22:
+                compression = body[18:22]
+        elif chunk_id == b"SSND":
+            offset = struct.unpack(">I", body[:4])[0]
+            sound = body[8 + offset:]
+        
+        position += 8 + size + (size & 1)  # chunks are padded to even length
+    
+    if channels is None or sound is None:
+        raise ValueError("Invalid AIFF: missing COMM or SSND chunk")
+    
+    sound = sound[:frames_count * channels * width]
+    if compression in (b"NONE", b"twos"):
+        samples = _pcm_to_float(sound, width, channels, big_endian=True)
+    elif compression == b"sowt":
+        samples = _pcm_to_float(sound, width, channels, big_endian=False)
+    elif compression in (b"fl32", b"FL32"):
+        samples = np.frombuffer(sound, dtype=">f4").astype(np.float32).reshape(-1, channels)
+    elif compression in (b"fl64", b"FL64"):
+        samples = np.frombuffer(sound, dtype=">f8").astype(np.float32).reshape(-1, channels)
+    else:
+        raise TranscodeUnavailable(f"Unsupported AIFF-C compression: {compression.decode('latin-1')}")
+    return samples, int(round(rate))
+
+
+def _read_extended(raw):
+    """80-bit IEEE 754 extended float (AIFF sample rate)"""
+    exponent = ((raw[0] & 0x7F) << 8) | raw[1]
+    mantissa = int.from_bytes(raw[2:10], 'big')
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    value = mantissa * 2.0 ** (exponent - 16383 - 63)
+    return -value if raw[0] & 0x80 else value
+
+
+def _pcm_to_float(frames, width, channels, big_endian, unsigned_8bit=False):
+    """Integer PCM bytes to float32 (frames, channels)"""
+    order = ">" if big_endian else "<"
+    if width == 1:
+        if unsigned_8bit:
+            samples = np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0
+        else:
+            samples = np.frombuffer(frames, dtype=np.int8).astype(np.float32)
+        scale = 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype=f"{order}i2").astype(np.float32)
+        scale = 32768.0
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        if big_endian:
+            raw = raw[:, ::-1]
+        samples = (raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16))
+        samples = np.where(samples >= 1 << 23, samples - (1 << 24), samples).astype(np.float32)
+        scale = 8388608.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype=f"{order}i4").astype(np.float32)
+        scale = 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width: {width * 8} bits")
+    return (samples / scale).reshape(-1, channels)
+
+
+# ============ Processing ============
+
+def downmix(samples, channels=1):
+    """Average all channels into channels (1 = mono)"""
+    if samples.shape[1] == channels:
+        return samples
+    mono = samples.mean(axis=1, keepdims=True)
+    return np.repeat(mono, channels, axis=1) if channels > 1 else mono
+
+
+def resample(samples, source_rate, target_rate):
+    """Linear-interpolation resampling (adequate for speech)"""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    frames = int(round(len(samples) * target_rate / source_rate))
+    source_times = np.arange(len(samples)) / source_rate
+    target_times = np.arange(frames) / target_rate
+    return np.stack(
+        [np.interp(target_times, source_times, samples[:, c]) for c in range(samples.shape[1])],
+        axis=1
+    ).astype(np.float32)
+
+
+def to_pcm16(samples):
+    """Float samples to little-endian 16-bit PCM bytes"""
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2').tobytes()
+
+
+# ============ Encoding ============
+
+def write_wav(path, samples, rate):
+    """Write 16-bit PCM WAV"""
+    with wave.open(str(path), 'wb') as audio:
+        audio.setnchannels(samples.shape[1])
+        audio.setsampwidth(2)
+        audio.setframerate(rate)
+        audio.writeframes(to_pcm16(samples))
+
+
+def encode(samples, rate, path, output_format):
+    """
+    Encode samples to a file
+    
+    Args:
+        samples: float32 (frames, channels)
+        rate: Sample rate
+        path: Output file
+        output_format: 'wav', 'mp3' or 'ogg'
+    """
+    if output_format == "wav":
+        write_wav(path, samples, rate)
+    elif output_format == "mp3" and LAMEENC_AVAILABLE:
+        encoder = lameenc.Encoder()
+        encoder.set_bit_rate(64)
+        encoder.set_in_sample_rate(rate)
+        encoder.set_channels(samples.shape[1])
+        encoder.set_quality(2)
+        Path(path).write_bytes(encoder.encode(to_pcm16(samples)) + encoder.flush())
+    elif output_format in ("mp3", "ogg") and SOUNDFILE_AVAILABLE:
+        soundfile.write(
+            str(path), samples, rate,
+            format="MP3" if output_format == "mp3" else "OGG",
+            subtype="MPEG_LAYER_III" if output_format == "mp3" else "VORBIS"
+        )
+    else:
+        raise TranscodeUnavailable(
+            f"Encoding {output_format} needs {'lameenc or soundfile' if output_format == 'mp3' else 'soundfile'}"
+        )
+
+
+def transcode(source, output_format, sample_rate=None, channels=None):
+    """
+    Convert an audio file to another format next to the source
+    
+    Args:
+        source: Input file
+        output_format: 'wav', 'mp3' or 'ogg'
+        sample_rate: Output sample rate (None = keep)
+        channels: Output channel count (None = keep)
+    
+    Returns:
+        Path of the new file (the source is left in place)
+    """
+    source = Path(source)
+    samples, rate = read_audio(source)
+    if channels:
+        samples = downmix(samples, channels)
+    if sample_rate:
+        samples = resample(samples, rate, sample_rate)
+        rate = sample_rate
+    
+    target = source.with_suffix(f".{output_format}")
+    if target == source:
+        target = source.with_name(f"{source.stem}_{output_format}.{output_format}")
+    encode(samples, rate, target, output_format)
+    return target
@@ -0,0 +1,348 @@
+"""
+Content-addressed result caches for engine outputs
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+
+def make_cache_key(namespace, data, **params):
+    """
+    Build a cache key from content bytes and request parameters
+    
+    Args:
+        namespace: Kind of result (e.g. 'ocr', 'caption')
+        data: Raw content bytes (e.g. the uploaded image)
+        **params: Parameters that change the result
+        
+    Returns:
+        Hex digest identifying the (content, parameters) pair
+    """
+    digest = hashlib.sha256()
+    digest.update(namespace.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(hashlib.sha256(data).digest())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, disk_max_bytes=512 * 1024 * 1024):
+        """
+        Initialize a two-tier JSON result cache
+        
+        Args:
+            max_bytes: Memory budget for the in-memory LRU tier
+            disk_dir: Directory for the persistent tier (None = memory only)
+            disk_max_bytes: Size budget for the persistent tier
+        """
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        
+        # key -> UTF-8 JSON bytes; stored serialized so callers never share
+        # (and mutate) a cached dict, and so sizes are exact
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.disk_entries = OrderedDict()  # key -> file size, oldest first
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+        
+        tier = f", disk: {self.disk_dir}" if self.disk_dir is not None else ""
+        print(f"🗄️ Result cache initialized ({max_bytes // (1024 * 1024)}MB memory{tier})")
+    
+    def get(self, key):
+        """Return the cached result for key, or None on a miss"""
+        with self.lock:
+            payload = self.entries.get(key)
+            if payload is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(payload)
+        
+        payload = self._read_disk(key)
+        with self.lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store_memory(key, payload)
+        return json.loads(payload)
+    
+    def set(self, key, value):
+        """Store a JSON-serializable result under key"""
+        payload = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        with self.lock:
+            self._store_memory(key, payload)
+        self._write_disk(key, payload)
+    
+    def _store_memory(self, key, payload):
+        """Insert into the memory tier and evict least recently used entries (lock held)"""
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= len(previous)
+        
+        self.entries[key] = payload
+        self.current_bytes += size
+        
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.current_bytes -= len(evicted)
+            self.evictions += 1
+    
+    def _disk_path(self, key):
+        return self.disk_dir / key[:2] / f"{key}.json"
+    
+    def _scan_disk(self):
+        """Index existing disk entries, oldest first, and enforce the size budget"""
+        files = []
+        for path in self.disk_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        
+        for _, key, size in sorted(files):
+            self.disk_entries[key] = size
+            self.disk_bytes += size
+        self._evict_disk()
+    
+    def _read_disk(self, key):
+        """Read an entry from the disk tier, refreshing its recency"""
+        if self.disk_dir is None:
+            return None
+        
+        path = self._disk_path(key)
+        try:
+            payload = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        
+        with self.lock:
+            if key in self.disk_entries:
+                self.disk_entries.move_to_end(key)
+        return payload
+    
+    def _write_disk(self, key, payload):
+        """Atomically write an entry to the disk tier"""
+        if self.disk_dir is None:
+            return
+        
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            temp_path.write_bytes(payload)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"⚠️ Result cache write failed: {e}")
+            return
+        
+        with self.lock:
+            previous = self.disk_entries.pop(key, None)
+            if previous is not None:
+                self.disk_bytes -= previous
+            self.disk_entries[key] = len(payload)
+            self.disk_bytes += len(payload)
+            self._evict_disk()
+    
+    def _evict_disk(self):
+        """Delete least recently used disk entries over budget (lock held)"""
+        while self.disk_bytes > self.disk_max_bytes and self.disk_entries:
+            key, size = self.disk_entries.popitem(last=False)
+            self.disk_bytes -= size
+            self.evictions += 1
+            try:
+                self._disk_path(key).unlink()
+            except OSError:
+                pass
+    
+    def clear(self):
+        """Drop every cached entry from both tiers"""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+            keys = list(self.disk_entries)
+            self.disk_entries.clear()
+            self.disk_bytes = 0
+        if self.disk_dir is not None:
+            for key in keys:
+                try:
+                    self._disk_path(key).unlink()
+                except OSError:
+                    pass
+    
+    def get_stats(self):
+        """Get hit/miss counters and tier sizes"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "disk_entries": len(self.disk_entries) if self.disk_dir is not None else None,
+            "disk_bytes": self.disk_bytes if self.disk_dir is not None else None,
+            "evictions": self.evictions
+        }
+
+
+class TTLCache:
+    def __init__(self, max_entries=10000, ttl_seconds=86400):
+        """
+        Initialize an in-memory LRU cache whose entries expire
+        
+        Concurrent lookups of a key that is being computed wait for that
+        computation instead of starting their own (see get_or_compute).
+        
+        Args:
+            max_entries: Most entries kept (least recently used evicted first)
+            ttl_seconds: Seconds an entry stays valid (0 = never expires)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.in_flight = {}           # key -> Future of the running computation
+        self.lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expirations = 0
+        self.evictions = 0
+        print(f"🗄️ TTL cache initialized ({max_entries} entries, ttl: {ttl_seconds}s)")
+    
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self.lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+    
+    def set(self, key, value):
+        """Store value under key"""
+        with self.lock:
+            self._store(key, value)
+    
+    def add(self, key, value):
+        """Store value under key unless a fresh entry already exists"""
+        with self.lock:
+            if self._lookup(key) is None:
+                self._store(key, value)
+    
+    def get_or_compute(self, key, compute, cacheable=None):
+        """
+        Return the cached value for key, computing it once on a miss
+        
+        Args:
+            key: Cache key
+            compute: Zero-argument callable producing the value
+            cacheable: Optional predicate - values it rejects (e.g. errors) are
+                       handed to waiting callers but not stored
+            
+        Returns:
+            The cached or freshly computed value
+        """
+        with self.lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            value = compute()
+        except BaseException as e:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        
+        with self.lock:
+            if value is not None and (cacheable is None or cacheable(value)):
+                self._store(key, value)
+            self.in_flight.pop(key, None)
+        future.set_result(value)
+        return value
+    
+    def _lookup(self, key):
+        """Fresh value for key, dropping it if expired (lock held)"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        return value
+    
+    def _store(self, key, value):
+        """Insert and evict least recently used entries over the limit (lock held)"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self.lock:
+            self.entries.clear()
+    
+    def get_stats(self):
+        """Get hit/miss/coalescing counters and size"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "expirations": self.expirations,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,160 @@
+"""
+Dynamic micro-batching scheduler for local BLIP captioning
+"""
+import asyncio
+import functools
+import time
+from collections import Counter
+from executors import EngineBusyError
+from .profiling import current_profile, profile_call
+
+
+class CaptionBatcher:
+    def __init__(self, engine, max_batch_size=8, max_wait_ms=20, executor=None, max_queue=0):
+        """
+        Initialize the batcher
+        
+        Args:
+            engine: CaptionEngine used to run the batches
+            max_batch_size: Largest number of images in one batch
+            max_wait_ms: How long the first request waits for more to arrive
+            executor: EngineExecutor that runs the blocking model call, so
+                      batches count towards its limits and stats
+                      (None = the event loop's default executor)
+            max_queue: Requests allowed to wait for a batch before submit()
+                       raises EngineBusyError (0 = unbounded)
+        """
+        self.engine = engine
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.executor = executor
+        self.max_queue = max(0, max_queue)
+        self.rejected = 0
+        
+        # Created lazily so they bind to the running event loop
+        self.queue = None
+        self.worker = None
+        
+        self.batch_size_histogram = Counter()
+        self.total_requests = 0
+        self.total_batches = 0
+        self.total_queue_wait = 0.0
+        self.in_flight = 0
+        print(f"📦 Caption batcher initialized (max batch: {self.max_batch_size}, max wait: {max_wait_ms}ms)")
+    
+    async def submit(self, image, detailed=True):
+        """
+        Queue an image for captioning and wait for its result
+        
+        Args:
+            image: Image bytes, PIL Image, NumPy array, or path to image file
+            detailed: If True, generate detailed description
+            
+        Returns:
+            dict with caption, detailed description, and metadata
+        
+        Raises:
+            EngineBusyError: max_queue requests are already waiting
+        """
+        self._ensure_worker()
+        if self.max_queue and self.queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise EngineBusyError("caption")
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((image, detailed, future, time.perf_counter(), current_profile.get()))
+        return await future
+    
+    def _ensure_worker(self):
+        """Start the background batching task on first use"""
+        if self.worker is None or self.worker.done():
+            if self.queue is None:
+                self.queue = asyncio.Queue()
+            self.worker = asyncio.ensure_future(self._run())
+    
+    async def _run(self):
+        """Collect requests into batches and run them one batch at a time"""
+        loop = asyncio.get_running_loop()
+        
+        # This task inherited the context of the request that started it;
+        # batches are profiled per request below, not as that request
+        current_profile.set(None)
+        
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await self._run_batch(batch)
+    
+    async def _run_batch(self, batch):
+        """Run one collected batch and resolve each request's future"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        
+        # Requests whose client already went away are dropped
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        
+        self.total_requests += len(batch)
+        self.total_batches += 1
+        self.batch_size_histogram[len(batch)] += 1
+        self.total_queue_wait += sum(started - enqueued for _, _, _, enqueued, _ in batch)
+        
+        # Plain and detailed requests need different generation work
+        for detailed in (True, False):
+            items = [item for item in batch if item[1] == detailed]
+            if not items:
+                continue
+            
+            # Profiled requests in the batch each get the whole batch's profile
+            generate = self.engine.generate_caption_batch
+            profiles = [profile for _, _, _, _, profile in items if profile is not None]
+            if profiles:
+                generate = functools.partial(profile_call, profiles, generate)
+            
+            self.in_flight = len(items)
+            try:
+                images = [image for image, _, _, _, _ in items]
+                if self.executor is not None:
+                    results = await self.executor.run(generate, images, detailed)
+                else:
+                    results = await loop.run_in_executor(None, generate, images, detailed)
+                for (_, _, future, _, _), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                print(f"Caption batch failed: {e}")
+                for _, _, future, _, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                self.in_flight = 0
+    
+    def get_stats(self):
+        """Get queue depth and batch size statistics"""
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "in_flight": self.in_flight,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "average_batch_size": round(self.total_requests / self.total_batches, 2) if self.total_batches else 0,
+            "average_queue_wait_ms": round(self.total_queue_wait / self.total_requests * 1000, 2) if self.total_requests else 0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_size_histogram.items())}
+        }
@@ -4,9 +4,38 @@ AI Caption Engine for FastAPI Backend with Detailed Descriptions
 from transformers import BlipProcessor, BlipForConditionalGeneration, Blip2Processor, Blip2ForConditionalGeneration
 from PIL import Image
 import requests
+import threading
+import time
 import torch
+from .image_io import load_image, image_to_bytes
+from .engine_state import EngineState
+from .metrics import metrics
 
 class CaptionEngine:
+    # Text prompts for the multi-aspect analysis used in detailed mode
+    ASPECT_PROMPTS = {
+        'subject': "the main subject is",
+        'setting': "the location is",
+        'composition': "the composition shows",
+        'atmosphere': "the atmosphere is"
+    }
+    
+    # Values used when an aspect cannot be generated (None = first caption sentence)
+    ASPECT_FALLBACKS = {
+        'subject': None,
+        'setting': "a natural setting",
+        'composition': "balanced framing",
+        'atmosphere': "natural lighting"
+    }
+    
+    # Generation settings shared by every aspect prompt
+    ASPECT_GENERATE_KWARGS = {
+        'max_length': 30,
+        'num_beams': 2,
+        'early_stopping': True,
+        'no_repeat_ngram_size': 2
+    }
+    
     def __init__(self):
         """Initialize caption engine"""
         self.model = None
@@ -14,17 +43,55 @@ class CaptionEngine:
         self.detailed_model = None
         self.detailed_processor = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.state = EngineState("caption")
+        self.load_lock = threading.Lock()
         print(f"🎨 Caption Engine initialized (will load model on first use, device: {self.device})")
     
     def load_model(self):
-        """Load BLIP model (lazy loading)"""
-        if self.model is None:
+        """Load BLIP model (lazy loading, at most one load at a time)"""
+        if self.model is not None:
+            return
+        
+        with self.load_lock:
+            if self.model is not None:
+                return
+            
             print("Loading BLIP model...")
-            self.processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-            self.model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
-            self.model.to(self.device)
+            self.state.begin_loading()
+            try:
+                with metrics.stage("caption", "model_load"):
+                    processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
+                    model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
+                    model.to(self.device)
+            except Exception as e:
+                print(f"⚠️ BLIP model failed to load: {e}")
+                self.state.fail(e)
+                raise
+            
+            # Publish the model last so other threads never see a half-loaded engine
+            self.processor = processor
+            self.model = model
+            self.state.finish_loading()
             print("✅ BLIP model loaded!")
     
+    def warmup(self, detailed=True):
+        """Load the model and run one dummy caption to warm kernels and allocators"""
+        self.state.begin_warmup()
+        self.load_model()
+        
+        started = time.perf_counter()
+        try:
+            self._generate_local(Image.new('RGB', (384, 384), (128, 128, 128)), detailed)
+        except Exception as e:
+            self.state.fail(e)
+            raise
+        self.state.record_warmup(time.perf_counter() - started)
+        print(f"🔥 Caption engine warm ({time.perf_counter() - started:.2f}s warm-up)")
+    
+    def get_status(self):
+        """Load state of the caption model"""
+        return self.state.as_dict()
+    
     def load_detailed_model(self):
         """Load BLIP-2 model for detailed descriptions"""
         if self.detailed_model is None:
@@ -51,52 +118,196 @@ class CaptionEngine:
             mode: 'local' or 'cloud'
             detailed: If True, generate detailed description
             
+        Returns:
+            dict with caption, detailed description, and metadata
+        """
+        return self.generate_caption_from_image(image_path, mode=mode, detailed=detailed)
+    
+    def generate_caption_from_image(self, image, mode="local", detailed=True, image_bytes=None):
+        """
+        Generate caption for an in-memory image without touching disk
+        
+        Args:
+            image: Image bytes, PIL Image, NumPy array, or path to image file
+            mode: 'local' or 'cloud'
+            detailed: If True, generate detailed description
+            image_bytes: Original encoded bytes of a decoded image, sent as-is in cloud mode
+            
         Returns:
             dict with caption, detailed description, and metadata
         """
         try:
             # Load image
-            image = Image.open(image_path).convert('RGB')
+            rgb_image = load_image(image).convert('RGB')
             
             if mode == "cloud":
-                result = self._generate_cloud(image_path, detailed)
+                with metrics.stage("caption", "cloud"):
+                    result = self._generate_cloud(image_bytes or image, rgb_image, detailed)
             else:
-                result = self._generate_local(image, detailed)
+                result = self._generate_local(rgb_image, detailed)
             
             return result
                 
         except Exception as e:
             print(f"Caption Error: {str(e)}")
-            return {
-                "caption": "Error generating caption",
-                "detailed_description": "Error generating description",
-                "confidence": 0,
-                "error": str(e)
-            }
+            return self._error_result(e)
+    
+    def generate_caption_batch(self, sources, detailed=True):
+        """
+        Generate local captions for several images in one batched model pass
+        
+        Args:
+            sources: List of image bytes, PIL Images, NumPy arrays or file paths
+            detailed: If True, generate detailed descriptions
+            
+        Returns:
+            list of result dicts, in the same order as sources
+        """
+        results = [None] * len(sources)
+        images = []
+        positions = []
+        
+        for i, source in enumerate(sources):
+            try:
+                images.append(load_image(source).convert('RGB'))
+                positions.append(i)
+            except Exception as e:
+                print(f"Caption Error: {str(e)}")
+                results[i] = self._error_result(e)
+        
+        if images:
+            try:
+                for i, result in zip(positions, self._generate_local_batch(images, detailed)):
+                    results[i] = result
+            except Exception as e:
+                print(f"Caption Error: {str(e)}")
+                for i in positions:
+                    results[i] = self._error_result(e)
+        
+        return results
+    
+    def _error_result(self, error):
+        """Result dict returned when caption generation fails"""
+        return {
+            "caption": "Error generating caption",
+            "detailed_description": "Error generating description",
+            "confidence": 0,
+            "error": str(error)
+        }
     
     def _generate_local(self, image, detailed=True):
         """Generate NEXT-LEVEL caption with rich insights and zero repetition"""
+        return self._generate_local_batch([image], detailed)[0]
+    
+    def _generate_local_batch(self, images, detailed=True):
+        """Generate local captions for a list of PIL images with one vision encoding"""
+        images, image_embeds, captions = self._generate_base_captions(images)
+        
+        aspects_list = [None] * len(images)
+        if detailed:
+            try:
+                # Multi-aspect analysis for comprehensive description
+                aspects_list = self._analyze_aspects_batch(image_embeds, captions)
+            except Exception as e:
+                print(f"Detailed generation failed: {e}")
+        
+        with metrics.stage("caption", "postprocess"):
+            return [
+                self._local_result(image, caption, aspects, detailed)
+                for image, caption, aspects in zip(images, captions, aspects_list)
+            ]
+    
+    def iter_caption_from_image(self, image, mode="local", detailed=True, image_bytes=None):
+        """
+        Generate a caption step by step, yielding each part as soon as it is ready
+        
+        Args:
+            image: Image bytes, PIL Image, NumPy array, or path to image file
+            mode: 'local' or 'cloud'
+            detailed: If True, generate detailed description
+            image_bytes: Original encoded bytes of a decoded image, sent as-is in cloud mode
+            
+        Yields:
+            dicts with an 'event' key: 'caption' (base caption), 'aspect'
+            (one per analyzed aspect), then 'result' (the full result dict,
+            same as generate_caption_from_image) or 'error'
+        """
+        try:
+            rgb_image = load_image(image).convert('RGB')
+            
+            if mode == "cloud":
+                with metrics.stage("caption", "cloud"):
+                    result = self._generate_cloud(image_bytes or image, rgb_image, detailed)
+                yield {"event": "caption", "caption": result["caption"]}
+                yield {"event": "result", "result": result}
+                return
+            
+            images, image_embeds, captions = self._generate_base_captions([rgb_image])
+            caption = captions[0]
+            yield {"event": "caption", "caption": caption}
+            
+            aspects = None
+            if detailed:
+                try:
+                    aspects = {}
+                    for _, name, text in self._iter_aspects(image_embeds, captions):
+                        aspects[name] = text
+                        yield {"event": "aspect", "aspect": name, "text": text}
+                    
+                    # Keep the original aspect order for the narrative builder
+                    aspects = {name: aspects[name] for name in self.ASPECT_PROMPTS}
+                except Exception as e:
+                    print(f"Detailed generation failed: {e}")
+                    aspects = None
+            
+            yield {"event": "result", "result": self._local_result(images[0], caption, aspects, detailed)}
+            
+        except Exception as e:
+            print(f"Caption Error: {str(e)}")
+            yield {"event": "error", "result": self._error_result(e)}
+    
+    def _generate_base_captions(self, images):
+        """
+        Resize images, encode them once and generate their base captions
+        
+        Returns:
+            (resized images, image embeddings, list of base captions)
+        """
         self.load_model()
         
         # Optimize: Resize image for faster processing
         # BLIP works best with 384x384, but we keep it slightly larger for details
-        if max(image.size) > 512:
-            ratio = 512 / max(image.size)
-            new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-        
-        # Generate base caption with MAXIMUM quality but optimized speed
-        inputs = self.processor(image, return_tensors="pt").to(self.device)
-        outputs = self.model.generate(
-            **inputs,
-            max_length=60,
-            num_beams=5,  # Reduced from 10 to 5 for 2x speedup with similar quality
-            length_penalty=1.2,
-            early_stopping=True,
-            no_repeat_ngram_size=3
-        )
-        caption = self.processor.decode(outputs[0], skip_special_tokens=True).strip()
+        resized = []
+        with metrics.stage("caption", "resize"):
+            for image in images:
+                if max(image.size) > 512:
+                    ratio = 512 / max(image.size)
+                    new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
+                    image = image.resize(new_size, Image.Resampling.LANCZOS)
+                resized.append(image)
+        
+        # Run the processor and the vision encoder ONCE - the embeddings are
+        # shared by the base captions and every aspect prompt
+        with metrics.stage("caption", "encode"):
+            inputs = self.processor(images=resized, return_tensors="pt").to(self.device)
+            image_embeds = self._encode_image(inputs["pixel_values"])
+        
+        # Generate base captions with MAXIMUM quality but optimized speed
+        with metrics.stage("caption", "generate"):
+            outputs = self._generate_from_embeds(
+                image_embeds,
+                max_length=60,
+                num_beams=5,  # Reduced from 10 to 5 for 2x speedup with similar quality
+                length_penalty=1.2,
+                early_stopping=True,
+                no_repeat_ngram_size=3
+            )
+        captions = [self.processor.decode(output, skip_special_tokens=True).strip() for output in outputs]
         
+        return resized, image_embeds, captions
+    
+    def _local_result(self, image, caption, aspects, detailed):
+        """Build the local result dict from a base caption and its aspects"""
         # Extract insights from the base caption
         insights = self._extract_insights(caption, image)
         
@@ -104,13 +315,8 @@ class CaptionEngine:
         
         if detailed:
             try:
-                # Multi-aspect analysis for comprehensive description
-                aspects = {
-                    'subject': self._analyze_subject(image, caption),
-                    'setting': self._analyze_setting(image, caption),
-                    'composition': self._analyze_composition(image, caption),
-                    'atmosphere': self._analyze_atmosphere(image, caption)
-                }
+                if aspects is None:
+                    raise ValueError("aspect analysis unavailable")
                 
                 # Build professional narrative
                 detailed_description = self._build_narrative(caption, aspects, insights)
@@ -341,13 +547,13 @@ class CaptionEngine:
         # Use ultra polish for everything now
         return self._ultra_polish(text)
     
-    def _generate_cloud(self, image_path, detailed=True):
+    def _generate_cloud(self, source, image, detailed=True):
         """Generate caption using Hugging Face API with insights"""
         # Basic caption
         API_URL = "https://api-inference.huggingface.co/models/Salesforce/blip-image-captioning-base"
         
-        with open(image_path, "rb") as f:
-            data = f.read()
+        # Send the original encoded bytes when we have them
+        data = image_to_bytes(source)
         
         response = requests.post(API_URL, data=data)
         
@@ -359,8 +565,6 @@ class CaptionEngine:
             raise Exception(f"API request failed: {response.status_code}")
         
         # Extract insights from caption
-        from PIL import Image
-        image = Image.open(image_path).convert('RGB')
         insights = self._extract_insights(caption, image)
         
         detailed_description = caption
@@ -573,6 +777,130 @@ class CaptionEngine:
         
         return keywords[:6]  # Top 6 keywords
     
+    def _encode_image(self, pixel_values):
+        """Run the BLIP vision encoder once and return the image embeddings"""
+        with torch.no_grad():
+            vision_outputs = self.model.vision_model(pixel_values=pixel_values)
+        return vision_outputs[0]
+    
+    def _generate_from_embeds(self, image_embeds, input_ids=None, attention_mask=None, **generate_kwargs):
+        """
+        Decode text from pre-computed image embeddings
+        
+        Mirrors BlipForConditionalGeneration.generate() without re-running the
+        vision encoder, so one encoding can serve several prompts.
+        
+        Args:
+            image_embeds: Output of _encode_image, one row per sequence to decode
+            input_ids: Prompt token ids as returned by the processor (with [CLS]/[SEP])
+            attention_mask: Attention mask matching input_ids
+            
+        Returns:
+            Tensor of generated token ids
+        """
+        batch_size = image_embeds.shape[0]
+        image_attention_mask = torch.ones(image_embeds.size()[:-1], dtype=torch.long, device=image_embeds.device)
+        text_config = self.model.config.text_config
+        
+        if input_ids is None:
+            input_ids = (
+                torch.LongTensor([[self.model.decoder_input_ids, text_config.eos_token_id]])
+                .repeat(batch_size, 1)
+                .to(image_embeds.device)
+            )
+        else:
+            input_ids = input_ids.clone()
+        
+        input_ids[:, 0] = text_config.bos_token_id
+        attention_mask = attention_mask[:, :-1] if attention_mask is not None else None
+        
+        return self.model.text_decoder.generate(
+            input_ids=input_ids[:, :-1],
+            eos_token_id=text_config.sep_token_id,
+            pad_token_id=text_config.pad_token_id,
+            attention_mask=attention_mask,
+            encoder_hidden_states=image_embeds,
+            encoder_attention_mask=image_attention_mask,
+            **generate_kwargs
+        )
+    
+    def _aspect_fallback(self, name, caption):
+        """Fallback text for an aspect that could not be generated"""
+        fallback = self.ASPECT_FALLBACKS[name]
+        return caption.split('.')[0] if fallback is None else fallback
+    
+    def _analyze_aspects(self, image_embeds, caption):
+        """Analyze every aspect of a single image (see _analyze_aspects_batch)"""
+        return self._analyze_aspects_batch(image_embeds, [caption])[0]
+    
+    def _analyze_aspects_batch(self, image_embeds, captions):
+        """
+        Analyze every aspect (subject, setting, composition, atmosphere) in batches
+        
+        Args:
+            image_embeds: Embeddings from _encode_image, one row per image
+            captions: Base caption of each image (used for fallbacks)
+            
+        Returns:
+            list with one dict per image mapping aspect name to description
+        """
+        aspects_list = [{} for _ in captions]
+        for index, name, text in self._iter_aspects(image_embeds, captions):
+            aspects_list[index][name] = text
+        
+        # Keep the original aspect order for the narrative builder
+        return [{name: aspects[name] for name in self.ASPECT_PROMPTS} for aspects in aspects_list]
+    
+    def _iter_aspects(self, image_embeds, captions):
+        """
+        Generate aspect descriptions batch by batch
+        
+        The prompts reuse the vision embeddings of the base captions. Prompts are
+        grouped by token length and each group is decoded as one batch across all
+        images, so no padding is needed and the output matches the sequential
+        _analyze_* path.
+        
+        Yields:
+            (image index, aspect name, cleaned description) as each batch finishes
+        """
+        groups = {}
+        for name, prompt in self.ASPECT_PROMPTS.items():
+            token_ids = self.processor.tokenizer(prompt).input_ids
+            groups.setdefault(len(token_ids), []).append((name, token_ids))
+        
+        for items in groups.values():
+            # One row per (image, prompt) pair in this length group
+            rows = [(index, name, token_ids) for index in range(len(captions)) for name, token_ids in items]
+            try:
+                input_ids = torch.tensor([token_ids for _, _, token_ids in rows], device=self.device)
+                row_index = torch.tensor([index for index, _, _ in rows], device=image_embeds.device)
+                with metrics.stage("caption", "generate_aspects"):
+                    outputs = self._generate_from_embeds(
+                        image_embeds.index_select(0, row_index),
+                        input_ids=input_ids,
+                        attention_mask=torch.ones_like(input_ids),
+                        **self.ASPECT_GENERATE_KWARGS
+                    )
+                texts = [
+                    self._ultra_clean(self.processor.decode(output, skip_special_tokens=True), self.ASPECT_PROMPTS[name])
+                    for (_, name, _), output in zip(rows, outputs)
+                ]
+            except Exception as e:
+                print(f"Aspect batch failed: {e}")
+                texts = [self._aspect_fallback(name, captions[index]) for index, name, _ in rows]
+            
+            for (index, name, _), text in zip(rows, texts):
+                yield index, name, text
+    
+    def _analyze_aspects_sequential(self, image, caption):
+        """Analyze every aspect with one full generate() call each (reference path)"""
+        return {
+            'subject': self._analyze_subject(image, caption),
+            'setting': self._analyze_setting(image, caption),
+            'composition': self._analyze_composition(image, caption),
+            'atmosphere': self._analyze_atmosphere(image, caption)
+        }
+    
     def _analyze_subject(self, image, caption):
         """Analyze the main subject of the image"""
         try:
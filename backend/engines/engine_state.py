@@ -0,0 +1,95 @@
+"""
+Load/readiness state tracking for engines
+"""
+import threading
+import time
+
+
+class EngineState:
+    """Lifecycle of a loadable model: unloaded -> loading -> warm (or failed)"""
+    
+    UNLOADED = "unloaded"
+    LOADING = "loading"
+    WARM = "warm"
+    FAILED = "failed"
+    NOT_APPLICABLE = "not_applicable"  # nothing to load, usable as soon as it is created
+    
+    def __init__(self, name):
+        self.name = name
+        self.state = self.UNLOADED
+        self.load_time = None
+        self.warmup_time = None
+        self.error = None
+        self.warming = False
+        self._started = None
+        self._lock = threading.Lock()
+    
+    def begin_loading(self):
+        """Mark the start of a model load"""
+        with self._lock:
+            self.state = self.LOADING
+            self.error = None
+            self._started = time.perf_counter()
+    
+    def finish_loading(self):
+        """Mark a successful load; the engine is warm unless a warm-up is pending"""
+        with self._lock:
+            self.load_time = time.perf_counter() - self._started if self._started else None
+            self.state = self.LOADING if self.warming else self.WARM
+    
+    def begin_warmup(self):
+        """Keep the engine 'loading' until the warm-up inference has run"""
+        with self._lock:
+            self.warming = True
+            self.state = self.LOADING
+    
+    def record_warmup(self, seconds):
+        """Record a finished warm-up inference; the engine is now warm"""
+        with self._lock:
+            self.warming = False
+            self.warmup_time = seconds
+            self.state = self.WARM
+    
+    def fail(self, error):
+        """Mark a failed load or warm-up"""
+        with self._lock:
+            self.warming = False
+            self.state = self.FAILED
+            self.error = str(error)
+            self.load_time = time.perf_counter() - self._started if self._started else None
+    
+    def reset(self):
+        """Mark the model unloaded again (e.g. evicted from a pool)"""
+        with self._lock:
+            self.warming = False
+            self.state = self.UNLOADED
+            self.warmup_time = None
+    
+    @property
+    def is_warm(self):
+        return self.state == self.WARM
+    
+    def as_dict(self):
+        """State, timings and last error for health reporting"""
+        return {
+            "state": self.state,
+            "load_time": round(self.load_time, 3) if self.load_time is not None else None,
+            "warmup_time": round(self.warmup_time, 3) if self.warmup_time is not None else None,
+            "error": self.error
+        }
+
+
+def combine_states(states):
+    """Overall state of an engine made of several loadable parts"""
+    states = list(states)
+    if not states:
+        return EngineState.UNLOADED
+    if any(state == EngineState.LOADING for state in states):
+        return EngineState.LOADING
+    if any(state == EngineState.WARM for state in states):
+        return EngineState.WARM
+    if any(state == EngineState.NOT_APPLICABLE for state in states):
+        return EngineState.NOT_APPLICABLE
+    if any(state == EngineState.FAILED for state in states):
+        return EngineState.FAILED
+    return EngineState.UNLOADED
@@ -0,0 +1,57 @@
+"""
+In-memory image loading shared by the engines
+"""
+import io
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .metrics import metrics
+
+
+def load_image(source):
+    """
+    Decode an image from any supported source
+    
+    Args:
+        source: Raw image bytes, PIL Image, NumPy array, or path to image file
+        
+    Returns:
+        PIL Image (mode is left unchanged)
+    """
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, np.ndarray):
+        return Image.fromarray(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        with metrics.stage("image", "decode"):
+            image = Image.open(io.BytesIO(source))
+            image.load()
+        return image
+    return Image.open(source)
+
+
+def image_to_bytes(source, format="PNG"):
+    """
+    Get encoded image bytes from any supported source
+    
+    Encoded sources (bytes, file paths) are returned as-is; decoded images
+    are encoded in memory.
+    
+    Args:
+        source: Raw image bytes, PIL Image, NumPy array, or path to image file
+        format: Encoding used for decoded images
+        
+    Returns:
+        bytes of an encoded image
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            return f.read()
+    
+    buffer = io.BytesIO()
+    load_image(source).save(buffer, format=format)
+    return buffer.getvalue()
@@ -0,0 +1,245 @@
+"""
+Lightweight latency histograms and counters, exported as Prometheus text
+
+Recording a sample is a perf_counter() pair, a bisect over a dozen bucket
+bounds and a few additions under one lock, so timing a stage costs a couple
+of microseconds - negligible next to the work being timed.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the latency buckets, from cache hits to model loads
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "api_"
+
+# name -> (type, help) for the exported metrics
+METRIC_HELP = {
+    "request_seconds": ("histogram", "HTTP request latency by endpoint"),
+    "requests_total": ("counter", "HTTP requests by endpoint and status"),
+    "stage_seconds": ("histogram", "Latency of one processing stage by engine"),
+    "stage_errors_total": ("counter", "Stages that raised, by engine"),
+    "images_processed_total": ("counter", "Images received for OCR, captioning or analysis"),
+    "characters_processed_total": ("counter", "Characters received for translation or speech"),
+    "uptime_seconds": ("gauge", "Seconds since the metrics registry was created")
+}
+
+# UsageStats request counters: endpoint path prefix -> field
+ENDPOINT_CATEGORIES = (
+    ("/api/ocr", "ocr_requests"),
+    ("/api/caption", "caption_requests"),
+    ("/api/translate", "translation_requests"),
+    ("/api/tts", "tts_requests")
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts are built when exported)"""
+    
+    __slots__ = ("buckets", "counts", "sum", "count")
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class StageTimer:
+    """Context manager that records the time spent inside it as one stage sample"""
+    
+    __slots__ = ("registry", "labels", "started")
+    
+    def __init__(self, registry, labels):
+        self.registry = registry
+        self.labels = labels
+        self.started = 0.0
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.registry._observe("stage_seconds", self.labels, time.perf_counter() - self.started)
+        if exc_type is not None:
+            self.registry._inc("stage_errors_total", self.labels, 1)
+        return False
+
+
+class _NullTimer:
+    """Stand-in timer used while metrics are disabled"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms keyed on name + labels"""
+    
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the registry
+        
+        Args:
+            enabled: Record samples (a disabled registry makes every call a no-op)
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+    
+    def stage(self, engine, stage):
+        """
+        Time a block as one stage of an engine
+        
+        Usage:
+            with metrics.stage("ocr", "detect"):
+                ...
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return StageTimer(self, (("engine", engine), ("stage", stage)))
+    
+    def observe(self, name, seconds, **labels):
+        """Add one latency sample to a histogram"""
+        if self.enabled:
+            self._observe(name, tuple(sorted(labels.items())), seconds)
+    
+    def inc(self, name, value=1, **labels):
+        """Increase a counter"""
+        if self.enabled:
+            self._inc(name, tuple(sorted(labels.items())), value)
+    
+    def _observe(self, name, labels, seconds):
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+    
+    def _inc(self, name, labels, value):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+    
+    def record_request(self, endpoint, method, status, seconds):
+        """Record one finished HTTP request"""
+        if not self.enabled:
+            return
+        labels = (("endpoint", endpoint), ("method", method))
+        with self.lock:
+            histogram = self.histograms.get(("request_seconds", labels))
+            if histogram is None:
+                histogram = self.histograms[("request_seconds", labels)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            key = ("requests_total", labels + (("status", str(status)),))
+            self.counters[key] = self.counters.get(key, 0) + 1
+    
+    def usage_stats(self):
+        """
+        Totals in the shape of models.UsageStats
+        
+        Returns:
+            dict with the UsageStats fields
+        """
+        with self.lock:
+            counters = list(self.counters.items())
+            requests = [h for (name, _), h in self.histograms.items() if name == "request_seconds"]
+            total_time = sum(h.sum for h in requests)
+        
+        stats = {field: 0 for _, field in ENDPOINT_CATEGORIES}
+        total = images = characters = 0
+        for (name, labels), value in counters:
+            if name == "requests_total":
+                total += value
+                endpoint = dict(labels).get("endpoint", "")
+                for prefix, field in ENDPOINT_CATEGORIES:
+                    if endpoint.startswith(prefix):
+                        stats[field] += value
+                        break
+            elif name == "images_processed_total":
+                images += value
+            elif name == "characters_processed_total":
+                characters += value
+        
+        stats.update({
+            "total_requests": total,
+            "average_processing_time": round(total_time / total, 4) if total else 0.0,
+            "total_images_processed": images,
+            "total_characters_processed": characters,
+            "uptime": round(time.time() - self.started, 1)
+        })
+        return stats
+    
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(
+                (key, (list(h.counts), h.sum, h.count)) for key, h in self.histograms.items()
+            )
+        
+        lines = []
+        described = set()
+        
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text = METRIC_HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {METRIC_PREFIX}{name} {text}")
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+        
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {value}")
+        
+        for (name, labels), (counts, total, count) in histograms:
+            describe(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {count}")
+        
+        describe("uptime_seconds")
+        lines.append(f"{METRIC_PREFIX}uptime_seconds {time.time() - self.started:.1f}")
+        return "\n".join(lines) + "\n"
+    
+    def reset(self):
+        """Drop every recorded sample"""
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+# Shared by the engines and the API
+metrics = MetricsRegistry()
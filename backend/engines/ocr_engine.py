@@ -1,26 +1,71 @@
 """
 OCR Engine for FastAPI Backend
 """
-import easyocr
 import numpy as np
 from PIL import Image
 from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .image_io import load_image
+from .engine_state import combine_states
+from .reader_pool import ReaderPool
+from .ocr_tiling import tile_grid, merge_tile_results
+from .metrics import metrics
+from easyocr.utils import reformat_input
 
 class OCREngine:
-    def __init__(self):
-        """Initialize OCR engine with default languages"""
-        self.readers = {}
+    def __init__(self, max_readers=4, max_reader_bytes=0, tile_size=1280, tile_overlap=200, tile_workers=4):
+        """
+        Initialize OCR engine (readers are created on demand)
+        
+        Args:
+            max_readers: Most language-set readers kept loaded (0 = no limit)
+            max_reader_bytes: Memory budget for reader weights (0 = no limit)
+            tile_size: Tile edge length for tiled OCR of large images
+            tile_overlap: Pixels shared by neighbouring tiles
+            tile_workers: Tiles recognised in parallel
+        """
+        self.reader_pool = ReaderPool(max_readers=max_readers, max_bytes=max_reader_bytes)
+        self.tile_size = tile_size
+        self.tile_overlap = min(tile_overlap, tile_size // 2)
+        self.tile_pool = ThreadPoolExecutor(max_workers=max(1, tile_workers), thread_name_prefix="ocr-tile")
         print("📸 OCR Engine initialized (readers created on demand)")
     
     def get_reader(self, languages):
         """Get or create reader for specified languages"""
-        lang_key = ','.join(sorted(languages))
-        
-        if lang_key not in self.readers:
-            print(f"Creating EasyOCR reader for: {languages}")
-            self.readers[lang_key] = easyocr.Reader(languages, gpu=False)
+        return self.reader_pool.get(languages)
+    
+    def warmup(self, languages=['en']):
+        """Create the reader for languages, keep it pinned and run one dummy OCR pass"""
+        self.reader_pool.pin(languages)
+        state = self.reader_pool.state_for(languages)
+        state.begin_warmup()
+        reader = self.get_reader(languages)
         
-        return self.readers[lang_key]
+        started = time.perf_counter()
+        try:
+            reader.readtext(np.full((64, 256, 3), 255, dtype=np.uint8))
+        except Exception as e:
+            state.fail(e)
+            raise
+        state.record_warmup(time.perf_counter() - started)
+        print(f"🔥 OCR reader warm for {languages} ({time.perf_counter() - started:.2f}s warm-up)")
+    
+    def reader_state(self, languages):
+        """Load state of the reader for languages ('unloaded' if never requested)"""
+        return self.reader_pool.state(languages)
+    
+    def get_status(self):
+        """Overall and per-language-set load state of the OCR readers"""
+        states = dict(self.reader_pool.states)
+        return {
+            "state": combine_states(state.state for state in states.values()),
+            "readers": {lang_key: state.as_dict() for lang_key, state in states.items()}
+        }
+    
+    def get_stats(self):
+        """Reader pool statistics"""
+        return self.reader_pool.get_stats()
     
     def extract_text(self, image_path, languages=['en']):
         """
@@ -33,107 +78,251 @@ class OCREngine:
         Returns:
             dict with extracted text and metadata
         """
+        return self.extract_text_from_image(image_path, languages)
+    
+    def extract_text_from_image(self, image, languages=['en'], tiled=False):
+        """
+        Extract text from an in-memory image without touching disk
+        
+        Args:
+            image: Image bytes, PIL Image, NumPy array, or path to image file
+            languages: List of language codes
+            tiled: Read large images at full resolution in overlapping tiles
+                   instead of downscaling them to 1280px
+            
+        Returns:
+            dict with extracted text and metadata
+        """
+        if tiled:
+            return self.extract_text_tiled(image, languages)
+        
         try:
-            # Load image
-            image = Image.open(image_path)
-            
-            # Optimize: Resize if too large (speeds up OCR significantly)
-            max_dimension = 1280
-            if max(image.size) > max_dimension:
-                ratio = max_dimension / max(image.size)
-                new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
-                
-            image_np = np.array(image)
+            image_np = self._prepare_image(image)
             
             # Get reader for languages
             reader = self.get_reader(languages)
             
             # Extract text with bounding boxes
-            results = reader.readtext(image_np)
-            
-            if not results:
-                return {
-                    "text": "",
-                    "languages": languages,
-                    "confidence": 0,
-                    "detections": 0
-                }
-            
-            # Sort results by position (top-to-bottom, left-to-right)
-            # First, sort by y-coordinate (top to bottom) with tolerance for same line
-            # Then sort by x-coordinate (left to right)
-            sorted_results = self._sort_text_by_position(results)
+            results = self._read(reader, image_np)
             
-            # Combine text in proper reading order
-            extracted_text = " ".join([text for (bbox, text, conf) in sorted_results])
+            return self._build_result(results, languages)
             
-            # Calculate average confidence
-            avg_confidence = sum([conf for (bbox, text, conf) in sorted_results]) / len(sorted_results)
+        except Exception as e:
+            print(f"OCR Error: {str(e)}")
+            return self._error_result(e, languages)
+    
+    def extract_text_tiled(self, image, languages=['en']):
+        """
+        Extract text from a large image at full resolution, tile by tile
+        
+        The image is split into overlapping tiles that are detected and
+        recognised in parallel. Boxes cut by a tile edge or seen twice in an
+        overlap are de-duplicated before the reading-order sort, so small
+        text on large scans survives without holding a full-size detector
+        pass in memory.
+        
+        Args:
+            image: Image bytes, PIL Image, NumPy array, or path to image file
+            languages: List of language codes
             
-            return {
-                "text": extracted_text,
-                "languages": languages,
-                "confidence": round(avg_confidence, 2),
-                "detections": len(sorted_results),
-                "reading_order": "left-to-right, top-to-bottom"
-            }
+        Returns:
+            dict with extracted text and metadata (plus the number of tiles)
+        """
+        try:
+            image_np = np.array(load_image(image))
+            height, width = image_np.shape[:2]
+            tiles = tile_grid(width, height, self.tile_size, self.tile_overlap)
+            
+            reader = self.get_reader(languages)
+            
+            def read_tile(tile):
+                x0, y0, x1, y1 = tile["box"]
+                return tile, self._read(reader, np.ascontiguousarray(image_np[y0:y1, x0:x1]))
+            
+            tile_results = list(self.tile_pool.map(read_tile, tiles))
+            results = merge_tile_results(tile_results, width, height)
+            
+            result = self._build_result(results, languages)
+            result["tiles"] = len(tiles)
+            return result
             
         except Exception as e:
             print(f"OCR Error: {str(e)}")
+            return self._error_result(e, languages)
+    
+    def extract_text_batch(self, images, languages=['en']):
+        """
+        Extract text from many images with batched detection and recognition
+        
+        Images that end up the same size after preprocessing are sent through
+        one readtext_batched call, so the detector runs once per group.
+        
+        Args:
+            images: List of image bytes, PIL Images, NumPy arrays or file paths
+            languages: List of language codes
+            
+        Returns:
+            list of result dicts in input order (failed images carry an 'error')
+        """
+        outputs = [None] * len(images)
+        for i, result in self.iter_text_batch(images, languages):
+            outputs[i] = result
+        return outputs
+    
+    def iter_text_batch(self, images, languages=['en']):
+        """
+        Batched OCR that yields each image's result as soon as its group is done
+        
+        Args:
+            images: List of image bytes, PIL Images, NumPy arrays or file paths
+            languages: List of language codes
+            
+        Yields:
+            (input index, result dict) - failed images carry an 'error'
+        """
+        # Group images by array shape - a batched call needs equal sizes
+        groups = {}
+        for i, image in enumerate(images):
+            try:
+                image_np = self._prepare_image(image)
+                groups.setdefault(image_np.shape, []).append((i, image_np))
+            except Exception as e:
+                print(f"OCR Error: {str(e)}")
+                yield i, self._error_result(e, languages)
+        
+        if not groups:
+            return
+        
+        try:
+            reader = self.get_reader(languages)
+        except Exception as e:
+            print(f"OCR Error: {str(e)}")
+            for group in groups.values():
+                for i, _ in group:
+                    yield i, self._error_result(e, languages)
+            return
+        
+        for group in groups.values():
+            try:
+                if len(group) == 1:
+                    batch_results = [self._read(reader, group[0][1])]
+                else:
+                    with metrics.stage("ocr", "read_batch"):
+                        batch_results = reader.readtext_batched([image_np for _, image_np in group])
+                
+                group_outputs = [
+                    (i, self._build_result(results, languages))
+                    for (i, _), results in zip(group, batch_results)
+                ]
+            except Exception as e:
+                print(f"OCR Error: {str(e)}")
+                group_outputs = [(i, self._error_result(e, languages)) for i, _ in group]
+            
+            for output in group_outputs:
+                yield output
+    
+    def _prepare_image(self, image):
+        """Decode and downscale an image into the array passed to EasyOCR"""
+        # Load image
+        image = load_image(image)
+        
+        # Optimize: Resize if too large (speeds up OCR significantly)
+        max_dimension = 1280
+        if max(image.size) > max_dimension:
+            ratio = max_dimension / max(image.size)
+            new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
+            # reducing_gap shrinks by an integer factor first, so LANCZOS only
+            # filters the last step instead of the full-size image
+            with metrics.stage("ocr", "resize"):
+                image = image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            
+        return np.array(image)
+    
+    def _read(self, reader, image_np):
+        """
+        reader.readtext() split into its detection and recognition passes
+        so each is timed on its own (same defaults, same output)
+        """
+        img, img_cv_grey = reformat_input(image_np)
+        with metrics.stage("ocr", "detect"):
+            horizontal_list, free_list = reader.detect(img, reformat=False)
+        with metrics.stage("ocr", "recognize"):
+            return reader.recognize(img_cv_grey, horizontal_list[0], free_list[0], reformat=False)
+    
+    def _build_result(self, results, languages):
+        """Turn raw EasyOCR detections into the OCR result dict"""
+        if not results:
             return {
                 "text": "",
                 "languages": languages,
                 "confidence": 0,
-                "error": str(e)
+                "detections": 0
             }
+        
+        # Sort results by position (top-to-bottom, left-to-right)
+        # First, sort by y-coordinate (top to bottom) with tolerance for same line
+        # Then sort by x-coordinate (left to right)
+        with metrics.stage("ocr", "sort"):
+            sorted_results = self._sort_text_by_position(results)
+        
+        # Combine text in proper reading order
+        extracted_text = " ".join([text for (bbox, text, conf) in sorted_results])
+        
+        # Calculate average confidence
+        avg_confidence = sum([conf for (bbox, text, conf) in sorted_results]) / len(sorted_results)
+        
+        return {
+            "text": extracted_text,
+            "languages": languages,
+            "confidence": round(avg_confidence, 2),
+            "detections": len(sorted_results),
+            "reading_order": "left-to-right, top-to-bottom"
+        }
+    
+    def _error_result(self, error, languages):
+        """Result dict returned when OCR fails"""
+        return {
+            "text": "",
+            "languages": languages,
+            "confidence": 0,
+            "error": str(error)
+        }
     
     def _sort_text_by_position(self, results):
         """
         Sort text results by reading order (top-to-bottom, left-to-right)
         
+        Boxes are ordered by vertical center and a new line starts wherever
+        the gap to the previous center exceeds half the smaller of the two
+        box heights, so the line tolerance follows the font size instead of
+        a fixed pixel count. Lines are then ordered left to right by their
+        leftmost x - all in NumPy, O(n log n).
+        
         Args:
             results: List of (bbox, text, confidence) tuples from EasyOCR
             
         Returns:
             Sorted list in reading order
         """
-        # Group results by rows (with tolerance for slight vertical differences)
-        rows = []
-        line_tolerance = 20  # pixels tolerance for same line
-        
-        for bbox, text, conf in results:
-            # Get center y-coordinate of bounding box
-            y_coords = [point[1] for point in bbox]
-            y_center = sum(y_coords) / len(y_coords)
-            
-            # Get leftmost x-coordinate
-            x_coords = [point[0] for point in bbox]
-            x_left = min(x_coords)
-            
-            # Find or create row
-            found_row = False
-            for row in rows:
-                row_y = row['y']
-                if abs(y_center - row_y) < line_tolerance:
-                    row['items'].append((x_left, bbox, text, conf))
-                    found_row = True
-                    break
-            
-            if not found_row:
-                rows.append({
-                    'y': y_center,
-                    'items': [(x_left, bbox, text, conf)]
-                })
-        
-        # Sort rows by y-coordinate (top to bottom)
-        rows.sort(key=lambda r: r['y'])
-        
-        # Sort items within each row by x-coordinate (left to right)
-        sorted_results = []
-        for row in rows:
-            row['items'].sort(key=lambda item: item[0])  # Sort by x_left
-            # Add to results (remove x_left coordinate)
-            sorted_results.extend([(bbox, text, conf) for x, bbox, text, conf in row['items']])
-        
-        return sorted_results
+        if len(results) < 2:
+            return [tuple(result) for result in results]
+        
+        boxes = np.array([bbox for bbox, _, _ in results], dtype=np.float64)
+        y_min = boxes[:, :, 1].min(axis=1)
+        y_max = boxes[:, :, 1].max(axis=1)
+        y_center = boxes[:, :, 1].mean(axis=1)
+        x_left = boxes[:, :, 0].min(axis=1)
+        height = np.maximum(y_max - y_min, 1.0)
+        
+        # Walk the boxes top to bottom and break lines at large vertical gaps
+        by_y = np.argsort(y_center, kind="stable")
+        gaps = np.diff(y_center[by_y])
+        tolerance = 0.5 * np.minimum(height[by_y][1:], height[by_y][:-1])
+        line_of_sorted = np.concatenate(([0], np.cumsum(gaps > tolerance)))
+        
+        line_id = np.empty(len(results), dtype=np.int64)
+        line_id[by_y] = line_of_sorted
+        
+        # Lines top to bottom, boxes within a line left to right
+        order = np.lexsort((x_left, line_id))
+        return [tuple(results[i]) for i in order]
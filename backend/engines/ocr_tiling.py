@@ -0,0 +1,152 @@
+"""
+Tiling helpers for full-resolution OCR of large images
+"""
+import math
+
+import numpy as np
+
+
+def axis_segments(length, tile_size, overlap):
+    """
+    Split one image axis into overlapping tile segments
+    
+    Uses the fewest tiles of at most tile_size that keep `overlap` pixels
+    between neighbours, shrunk to a common size so neighbours overlap by
+    about `overlap` (an image one pixel over tile_size gets two tiles a
+    little over half its size, not two full tiles sharing all but one
+    pixel). Each segment also carries its core range - the part of the axis
+    closer to this tile than to its neighbours (split at the middle of each
+    overlap).
+    
+    Args:
+        length: Axis length in pixels
+        tile_size: Largest tile length in pixels
+        overlap: Pixels shared by neighbouring tiles
+    
+    Returns:
+        list of (start, end, core_start, core_end)
+    """
+    if length <= tile_size:
+        return [(0, length, 0, length)]
+    
+    overlap = min(overlap, tile_size - 1)
+    count = math.ceil((length - overlap) / (tile_size - overlap))
+    size = math.ceil((length + (count - 1) * overlap) / count)
+    last = length - size
+    starts = [round(i * last / (count - 1)) for i in range(count)]
+    
+    segments = []
+    for i, start in enumerate(starts):
+        end = start + size
+        core_start = 0 if i == 0 else (start + starts[i - 1] + size) / 2
+        core_end = length if i == len(starts) - 1 else (starts[i + 1] + end) / 2
+        segments.append((start, end, core_start, core_end))
+    return segments
+
+
+def tile_grid(width, height, tile_size, overlap):
+    """
+    Overlapping tiles covering an image
+    
+    Args:
+        width: Image width
+        height: Image height
+        tile_size: Largest tile edge length in pixels
+        overlap: Pixels shared by neighbouring tiles
+    
+    Returns:
+        list of tile dicts with 'box' (x0, y0, x1, y1) and 'core' (same form)
+    """
+    tiles = []
+    for y0, y1, cy0, cy1 in axis_segments(height, tile_size, overlap):
+        for x0, x1, cx0, cx1 in axis_segments(width, tile_size, overlap):
+            tiles.append({"box": (x0, y0, x1, y1), "core": (cx0, cy0, cx1, cy1)})
+    return tiles
+
+
+def merge_tile_results(tile_results, width, height, edge_margin=2, overlap_threshold=0.5):
+    """
+    Merge per-tile EasyOCR detections into one list in image coordinates
+    
+    Boxes touching an inner tile edge are cut off by the tile; they are
+    dropped when their center lies outside the tile's core, since the
+    neighbouring tile sees them whole. Remaining boxes that overlap (by
+    intersection over the smaller box) are de-duplicated, preferring boxes
+    that were fully inside their tile, then higher confidence.
+    
+    Args:
+        tile_results: list of (tile dict, EasyOCR results for that tile)
+        width: Image width
+        height: Image height
+        edge_margin: Distance in pixels that counts as touching a tile edge
+        overlap_threshold: Overlap above which two boxes are duplicates
+    
+    Returns:
+        list of (bbox, text, confidence) tuples in image coordinates
+    """
+    detections = []
+    tile_boxes = np.array([tile["box"] for tile, _ in tile_results], dtype=np.float64)
+    for tile, results in tile_results:
+        x0, y0, x1, y1 = tile["box"]
+        cx0, cy0, cx1, cy1 = tile["core"]
+        for bbox, text, conf in results:
+            points = [[float(x) + x0, float(y) + y0] for x, y in bbox]
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            
+            cut = (
+                (x0 > 0 and min(xs) <= x0 + edge_margin) or
+                (y0 > 0 and min(ys) <= y0 + edge_margin) or
+                (x1 < width and max(xs) >= x1 - edge_margin) or
+                (y1 < height and max(ys) >= y1 - edge_margin)
+            )
+            center_x = (min(xs) + max(xs)) / 2
+            center_y = (min(ys) + max(ys)) / 2
+            in_core = cx0 <= center_x < cx1 and cy0 <= center_y < cy1
+            if cut and not in_core:
+                continue
+            
+            detections.append((points, text, conf, cut))
+    
+    if len(detections) < 2:
+        return [(points, text, conf) for points, text, conf, _ in detections]
+    
+    rects = np.array([
+        [min(p[0] for p in points), min(p[1] for p in points),
+         max(p[0] for p in points), max(p[1] for p in points)]
+        for points, _, _, _ in detections
+    ])
+    
+    # Only boxes reaching into a second tile can have a duplicate
+    in_tiles = (
+        (rects[:, None, 0] < tile_boxes[None, :, 2]) & (rects[:, None, 2] > tile_boxes[None, :, 0]) &
+        (rects[:, None, 1] < tile_boxes[None, :, 3]) & (rects[:, None, 3] > tile_boxes[None, :, 1])
+    ).sum(axis=1)
+    shared = np.flatnonzero(in_tiles > 1)
+    keep = set(np.flatnonzero(in_tiles <= 1).tolist())
+    
+    if shared.size:
+        # Whole boxes first, then by confidence
+        confidence = np.array([detections[i][2] for i in shared], dtype=np.float64)
+        cut = np.array([detections[i][3] for i in shared])
+        priority = shared[np.lexsort((-confidence, cut))]
+        keep.update(_suppress_duplicates(rects, priority, overlap_threshold))
+    
+    return [tuple(detections[i][:3]) for i in sorted(keep)]
+
+
+def _suppress_duplicates(rects, priority, threshold):
+    """Greedy suppression of boxes overlapping a higher-priority box"""
+    areas = np.maximum(rects[:, 2] - rects[:, 0], 1) * np.maximum(rects[:, 3] - rects[:, 1], 1)
+    remaining = np.asarray(priority)
+    keep = []
+    while remaining.size:
+        best, rest = remaining[0], remaining[1:]
+        keep.append(int(best))
+        
+        inter_w = np.minimum(rects[best, 2], rects[rest, 2]) - np.maximum(rects[best, 0], rects[rest, 0])
+        inter_h = np.minimum(rects[best, 3], rects[rest, 3]) - np.maximum(rects[best, 1], rects[rest, 1])
+        intersection = np.clip(inter_w, 0, None) * np.clip(inter_h, 0, None)
+        overlap = intersection / np.minimum(areas[best], areas[rest])
+        remaining = rest[overlap <= threshold]
+    return keep
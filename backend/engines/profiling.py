@@ -0,0 +1,189 @@
+"""
+Request-scoped cProfile capture
+
+A profiled request carries a RequestProfile in a context variable; engine
+work run on its behalf (executor pools, caption batches) is profiled in the
+worker thread and merged into it. Finished profiles are kept in a bounded
+ring buffer and exported as pstats files or text reports.
+
+When no request is being profiled the only cost is one ContextVar lookup per
+engine call.
+"""
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+# Profile of the request being handled (None = not profiled)
+current_profile = ContextVar("current_profile", default=None)
+
+# cProfile can only run one profiler at a time on newer Pythons (sys.monitoring),
+# so profiled sections are serialized; a section that would have to wait runs
+# unprofiled instead and is counted in RequestProfile.skipped
+_profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    """cProfile data collected for one request"""
+    
+    _ids = itertools.count(1)
+    
+    def __init__(self, method, path, reason):
+        """
+        Start a request profile
+        
+        Args:
+            method: HTTP method
+            path: Request path
+            reason: Why the request is profiled: 'header' or 'sampled'
+        """
+        self.id = f"{int(time.time())}-{next(self._ids)}"
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.created = time.time()
+        self.started = time.perf_counter()
+        self.wall_time = None
+        self.status = None
+        self.sections = 0
+        self.skipped = 0
+        self.profiled_time = 0.0
+        self.lock = threading.Lock()
+        self.stats = None  # pstats.Stats, created by the first profiled section
+    
+    def finish(self, status):
+        """Record the response status and total request time"""
+        self.status = status
+        self.wall_time = time.perf_counter() - self.started
+    
+    def add(self, profiler, seconds):
+        """Merge one finished cProfile.Profile into this request's stats"""
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+            self.sections += 1
+            self.profiled_time += seconds
+    
+    def to_pstats(self):
+        """Profile in the binary pstats format (load with pstats / snakeviz)"""
+        with self.lock:
+            return marshal.dumps(self.stats.stats if self.stats is not None else {})
+    
+    def report(self, sort="cumulative", limit=60):
+        """
+        Human readable pstats report
+        
+        Args:
+            sort: pstats sort key ('cumulative', 'tottime', 'ncalls', ...)
+            limit: Most functions listed
+        
+        Returns:
+            report text
+        """
+        output = io.StringIO()
+        with self.lock:
+            if self.stats is None:
+                return "No engine work was profiled for this request\n"
+            self.stats.stream = output
+            self.stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+    
+    def summary(self):
+        """Metadata shown in the profile listing"""
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "status": self.status,
+            "created": self.created,
+            "wall_time": round(self.wall_time, 4) if self.wall_time is not None else None,
+            "profiled_time": round(self.profiled_time, 4),
+            "sections": self.sections,
+            "skipped_sections": self.skipped
+        }
+
+
+def profile_call(profiles, fn, *args, **kwargs):
+    """
+    Call fn in this thread under cProfile and merge the result into profiles
+    
+    Args:
+        profiles: RequestProfiles the work is done for (a caption batch can
+                  serve several profiled requests; each gets the same data)
+        fn: Callable to run
+    
+    Returns:
+        fn's result
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        for profile in profiles:
+            with profile.lock:
+                profile.skipped += 1
+        return fn(*args, **kwargs)
+    
+    try:
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            for profile in profiles:
+                profile.add(profiler, elapsed)
+    finally:
+        _profiler_lock.release()
+
+
+class ProfileStore:
+    """Ring buffer of the most recent request profiles"""
+    
+    def __init__(self, max_profiles=20):
+        """
+        Initialize the store
+        
+        Args:
+            max_profiles: Profiles kept; the oldest is dropped first
+        """
+        self.max_profiles = max(1, max_profiles)
+        self.lock = threading.Lock()
+        self.profiles = OrderedDict()
+        self.recorded = 0
+    
+    def add(self, profile):
+        with self.lock:
+            self.profiles[profile.id] = profile
+            self.recorded += 1
+            while len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+    
+    def get(self, profile_id):
+        with self.lock:
+            return self.profiles.get(profile_id)
+    
+    def summaries(self):
+        """Summaries, newest first"""
+        with self.lock:
+            profiles = list(self.profiles.values())
+        return [profile.summary() for profile in reversed(profiles)]
+    
+    def clear(self):
+        with self.lock:
+            self.profiles.clear()
+    
+    def get_stats(self):
+        with self.lock:
+            return {
+                "stored": len(self.profiles),
+                "max_profiles": self.max_profiles,
+                "recorded": self.recorded
+            }
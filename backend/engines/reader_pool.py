@@ -0,0 +1,216 @@
+"""
+Bounded, thread-safe pool of EasyOCR readers
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import easyocr
+
+from .engine_state import EngineState
+from .metrics import metrics
+
+
+def reader_key(languages):
+    """Pool key for a language list (order does not matter)"""
+    return ','.join(sorted(languages))
+
+
+class ReaderPool:
+    """
+    LRU pool of EasyOCR readers keyed on the language set
+    
+    Every reader shares one CRAFT text detector - only the recognition
+    network differs between language sets - so an extra language mix costs
+    one recognizer instead of a full detector + recognizer. Concurrent first
+    requests for the same key wait on a per-key lock and get the one reader
+    that was built.
+    """
+    
+    def __init__(self, max_readers=4, max_bytes=0):
+        """
+        Initialize the pool
+        
+        Args:
+            max_readers: Most readers kept loaded (0 = no count limit)
+            max_bytes: Budget for reader weights in bytes (0 = no memory limit)
+        """
+        self.max_readers = max(0, max_readers)
+        self.max_bytes = max(0, max_bytes)
+        
+        self.readers = OrderedDict()   # key -> reader, least recently used first
+        self.sizes = {}                # key -> estimated weight bytes
+        self.states = {}               # key -> EngineState, for loaded, loading and pinned keys
+        self.pinned = set()
+        
+        # Detector network taken from the first reader, shared by the rest
+        self.detector = None
+        self.detector_bytes = 0
+        
+        self.hits = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.evictions = 0
+        self.total_load_time = 0.0
+        
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        limits = []
+        if self.max_readers:
+            limits.append(f"{self.max_readers} readers")
+        if self.max_bytes:
+            limits.append(f"{self.max_bytes / (1024 * 1024):.0f}MB")
+        print(f"📚 OCR reader pool initialized (limit: {', '.join(limits) or 'none'})")
+    
+    def get(self, languages):
+        """
+        Get the reader for languages, loading it if needed
+        
+        Args:
+            languages: List of language codes
+        
+        Returns:
+            easyocr.Reader for the language set
+        """
+        key = reader_key(languages)
+        with self._lock:
+            reader = self.readers.get(key)
+            if reader is not None:
+                self.readers.move_to_end(key)
+                self.hits += 1
+                return reader
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        
+        with load_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                reader = self.readers.get(key)
+                if reader is not None:
+                    self.readers.move_to_end(key)
+                    self.hits += 1
+                    return reader
+            
+            return self._load(key, languages)
+    
+    def pin(self, languages):
+        """Never evict the reader for languages (used for preloaded sets)"""
+        with self._lock:
+            self.pinned.add(reader_key(languages))
+    
+    def state_for(self, languages):
+        """EngineState of the reader for languages, created on first use"""
+        key = reader_key(languages)
+        with self._lock:
+            return self._state(key)
+    
+    def state(self, languages):
+        """Load state of the reader for languages ('unloaded' if never requested)"""
+        state = self.states.get(reader_key(languages))
+        return state.state if state is not None else EngineState.UNLOADED
+    
+    def get_stats(self):
+        """Pool occupancy, memory estimate and hit/load/eviction counters"""
+        with self._lock:
+            requests = self.hits + self.loads
+            return {
+                "readers": len(self.readers),
+                "max_readers": self.max_readers,
+                "keys": list(self.readers.keys()),
+                "pinned": sorted(self.pinned),
+                "bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+                "detector_shared": self.detector is not None,
+                "hits": self.hits,
+                "loads": self.loads,
+                "load_failures": self.load_failures,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+                "avg_load_time": round(self.total_load_time / self.loads, 3) if self.loads else 0.0
+            }
+    
+    def _load(self, key, languages):
+        """Build a reader (caller holds the key's load lock) and admit it"""
+        state = self.state_for(languages)
+        print(f"Creating EasyOCR reader for: {languages}")
+        state.begin_loading()
+        started = time.perf_counter()
+        try:
+            with metrics.stage("ocr", "model_load"):
+                reader = self._create_reader(languages)
+        except Exception as e:
+            with self._lock:
+                self.load_failures += 1
+                # Only pinned sets keep reporting a failed load
+                if key not in self.pinned:
+                    self.states.pop(key, None)
+            state.fail(e)
+            raise
+        
+        size = self._estimate_bytes(getattr(reader, "recognizer", None))
+        with self._lock:
+            self.readers[key] = reader
+            self.sizes[key] = size
+            self.loads += 1
+            self.total_load_time += time.perf_counter() - started
+            evicted = self._evict(keep=key)
+        state.finish_loading()
+        
+        for old_key in evicted:
+            print(f"♻️ Evicted EasyOCR reader for: {old_key}")
+        return reader
+    
+    def _create_reader(self, languages):
+        """New EasyOCR reader that reuses the shared detector when there is one"""
+        if self.detector is None:
+            reader = easyocr.Reader(languages, gpu=False)
+            with self._lock:
+                if self.detector is None:
+                    self.detector = (reader.detector, reader.detect_network,
+                                     reader.get_textbox, reader.get_detector)
+                    self.detector_bytes = self._estimate_bytes(reader.detector)
+            return reader
+        
+        # Skip loading the detector weights and plug in the shared network
+        reader = easyocr.Reader(languages, gpu=False, detector=False)
+        reader.detector, reader.detect_network, reader.get_textbox, reader.get_detector = self.detector
+        return reader
+    
+    def _evict(self, keep):
+        """Drop least recently used, unpinned readers until within budget"""
+        evicted = []
+        for key in list(self.readers.keys()):
+            if not self._over_budget():
+                break
+            if key == keep or key in self.pinned:
+                continue
+            # Requests already holding the reader keep using it; it is freed after
+            del self.readers[key]
+            self.sizes.pop(key, None)
+            self._load_locks.pop(key, None)
+            self.states.pop(key, None)  # reported as 'unloaded' again
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+    
+    def _over_budget(self):
+        if self.max_readers and len(self.readers) > self.max_readers:
+            return True
+        return bool(self.max_bytes) and self._total_bytes() > self.max_bytes
+    
+    def _total_bytes(self):
+        return self.detector_bytes + sum(self.sizes.values())
+    
+    def _state(self, key):
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = EngineState(f"ocr:{key}")
+        return state
+    
+    @staticmethod
+    def _estimate_bytes(module):
+        """Size of a torch module's parameters and buffers (0 if unknown)"""
+        try:
+            tensors = list(module.parameters()) + list(module.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            return 0
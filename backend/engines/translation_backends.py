@@ -0,0 +1,384 @@
+"""
+Pluggable translation backends and a latency-aware router
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+import requests
+from bs4 import BeautifulSoup
+from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+from deep_translator.exceptions import (
+    LanguageNotSupportedException, RequestError, TooManyRequests, TranslationNotFound
+)
+from requests.adapters import HTTPAdapter
+
+from .engine_state import EngineState
+
+# Optional local neural translation (MarianMT)
+try:
+    from transformers import MarianMTModel, MarianTokenizer
+    MARIAN_AVAILABLE = True
+except Exception:
+    MARIAN_AVAILABLE = False
+
+
+class TranslationUnavailable(Exception):
+    """A backend cannot translate this text or language pair"""
+
+
+class TranslationBackend:
+    """Interface of a translation provider"""
+    
+    name = "base"
+    
+    def supports(self, source_language, target_language):
+        """Whether the backend can translate this language pair"""
+        return True
+    
+    def translate(self, text, source_language, target_language):
+        """
+        Translate text
+        
+        Args:
+            text: Text to translate
+            source_language: Source language code or 'auto'
+            target_language: Target language code
+        
+        Returns:
+            Translated text (raises TranslationUnavailable if it cannot)
+        """
+        raise NotImplementedError
+    
+    def get_status(self):
+        """Load state for health reporting (backends without models have none)"""
+        return {"state": EngineState.NOT_APPLICABLE}
+
+
+class GoogleBackend(TranslationBackend):
+    """
+    Google Translate web endpoint over a pooled HTTP session
+    
+    Speaks the same protocol as deep_translator's GoogleTranslator, but keeps
+    connections alive in a shared pool so concurrent chunk translations do
+    not each pay for a new TCP/TLS handshake.
+    """
+    
+    name = "google"
+    default_url = "https://translate.google.com/m"
+    max_chars = 5000
+    # Codes deep_translator's GoogleTranslator accepts; others are never sent
+    languages = frozenset(GOOGLE_LANGUAGES_TO_CODES.values())
+    
+    def __init__(self, base_url=None, pool_size=10, timeout=15):
+        """
+        Args:
+            base_url: Endpoint override, e.g. a local stand-in for load tests
+                      (None = the real Google Translate endpoint)
+            pool_size: Keep-alive connections kept open to the endpoint
+            timeout: Seconds to wait for a response
+        """
+        self.base_url = base_url or self.default_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def supports(self, source_language, target_language):
+        return (
+            (source_language == "auto" or source_language in self.languages) and
+            target_language in self.languages
+        )
+    
+    def translate(self, text, source_language, target_language):
+        if not self.supports(source_language, target_language):
+            raise LanguageNotSupportedException(f"{source_language}-{target_language}")
+        text = text.strip()
+        if not text or source_language == target_language:
+            return text
+        if len(text) > self.max_chars:
+            raise ValueError(f"Text exceeds {self.max_chars} characters - split it first")
+        
+        response = self.session.get(
+            self.base_url,
+            params={"sl": source_language, "tl": target_language, "q": text},
+            timeout=self.timeout
+        )
+        try:
+            if response.status_code == 429:
+                raise TooManyRequests()
+            if response.status_code != 200:
+                raise RequestError()
+            
+            soup = BeautifulSoup(response.text, "html.parser")
+            element = soup.find("div", {"class": "t0"}) or soup.find("div", {"class": "result-container"})
+            if not element:
+                raise TranslationNotFound(text)
+            return element.get_text(strip=True)
+        finally:
+            response.close()
+
+
+class PhraseTableBackend(TranslationBackend):
+    """
+    Exact-match phrase table loaded from JSON
+    
+    The file maps "source-target" pairs to phrase dictionaries, e.g.
+    {"en-es": {"hello": "hola"}}. Lookups ignore case and surrounding
+    whitespace; with source 'auto' every table for the target is searched.
+    """
+    
+    name = "phrase_table"
+    
+    def __init__(self, tables=None, path=None):
+        """
+        Args:
+            tables: Dict of "source-target" -> {phrase: translation}
+            path: JSON file with the same structure
+        """
+        tables = dict(tables or {})
+        if path:
+            tables.update(json.loads(Path(path).read_text(encoding='utf-8')))
+        
+        self.tables = {}
+        for pair, phrases in tables.items():
+            source, target = pair.split("-", 1)
+            self.tables[(source, target)] = {self._normalize(k): v for k, v in phrases.items()}
+    
+    def supports(self, source_language, target_language):
+        return any(
+            target == target_language and source_language in ("auto", source)
+            for source, target in self.tables
+        )
+    
+    def get_status(self):
+        """Tables are loaded when the backend is created"""
+        return {
+            "state": EngineState.WARM,
+            "pairs": len(self.tables),
+            "phrases": sum(len(phrases) for phrases in self.tables.values())
+        }
+    
+    def translate(self, text, source_language, target_language):
+        phrase = self._normalize(text)
+        for (source, target), phrases in self.tables.items():
+            if target == target_language and source_language in ("auto", source) and phrase in phrases:
+                return phrases[phrase]
+        raise TranslationUnavailable(f"phrase not in table for {source_language}-{target_language}")
+    
+    @staticmethod
+    def _normalize(text):
+        return " ".join(text.split()).lower()
+
+
+class MarianBackend(TranslationBackend):
+    """Local MarianMT models (one per language pair, loaded on first use)"""
+    
+    name = "marian"
+    
+    def __init__(self, model_template="Helsinki-NLP/opus-mt-{source}-{target}", local_files_only=True):
+        """
+        Args:
+            model_template: Model name pattern for a language pair
+            local_files_only: Only use models already in the local cache
+                              (never download on the request path)
+        """
+        self.model_template = model_template
+        self.local_files_only = local_files_only
+        self.models = {}          # (source, target) -> (tokenizer, model)
+        self.unavailable = set()  # pairs whose model could not be loaded
+        self.loading = None       # pair being loaded right now
+        self.lock = threading.Lock()
+    
+    def supports(self, source_language, target_language):
+        return (
+            MARIAN_AVAILABLE and
+            source_language != "auto" and
+            (source_language, target_language) not in self.unavailable
+        )
+    
+    def get_status(self):
+        """
+        Models load per language pair on first use: 'loading' while one
+        loads, 'warm' once any is loaded, 'failed' if every attempt failed
+        """
+        if not MARIAN_AVAILABLE:
+            state = EngineState.FAILED
+        elif self.loading is not None:
+            state = EngineState.LOADING
+        elif self.models:
+            state = EngineState.WARM
+        elif self.unavailable:
+            state = EngineState.FAILED
+        else:
+            state = EngineState.UNLOADED
+        return {
+            "state": state,
+            "available": MARIAN_AVAILABLE,
+            "loaded_pairs": sorted(f"{source}-{target}" for source, target in self.models),
+            "unavailable_pairs": sorted(f"{source}-{target}" for source, target in self.unavailable)
+        }
+    
+    def translate(self, text, source_language, target_language):
+        tokenizer, model = self._load(source_language, target_language)
+        inputs = tokenizer([text], return_tensors="pt", truncation=True)
+        outputs = model.generate(**inputs, max_new_tokens=512)
+        return tokenizer.decode(outputs[0], skip_special_tokens=True)
+    
+    def _load(self, source_language, target_language):
+        pair = (source_language, target_language)
+        with self.lock:
+            if pair not in self.models:
+                name = self.model_template.format(source=source_language, target=target_language)
+                self.loading = pair
+                try:
+                    tokenizer = MarianTokenizer.from_pretrained(name, local_files_only=self.local_files_only)
+                    model = MarianMTModel.from_pretrained(name, local_files_only=self.local_files_only)
+                    model.eval()
+                except Exception as e:
+                    self.unavailable.add(pair)
+                    raise TranslationUnavailable(f"no MarianMT model for {source_language}-{target_language}: {e}")
+                finally:
+                    self.loading = None
+                self.models[pair] = (tokenizer, model)
+                print(f"✅ MarianMT model loaded: {name}")
+            return self.models[pair]
+
+
+class BackendRouter:
+    """
+    Pick the fastest backend per language pair
+    
+    Each (backend, pair) keeps an exponentially weighted moving average of
+    its latency. Backends without measurements are tried first so every
+    candidate gets measured, then the fastest is preferred; every
+    explore_every calls the runner-up is tried first to keep its average
+    current. A backend that cannot translate a text falls through to the
+    next one; a failing backend also gets its average penalised.
+    """
+    
+    def __init__(self, backends, alpha=0.2, explore_every=50):
+        """
+        Args:
+            backends: TranslationBackend instances in preference order
+            alpha: EWMA smoothing factor
+            explore_every: Calls per pair between runner-up probes (0 = never)
+        """
+        self.backends = list(backends)
+        self.alpha = alpha
+        self.explore_every = explore_every
+        self.latency = {}  # (backend name, source, target) -> EWMA seconds
+        self.calls = {}
+        self.errors = {}
+        self.pair_calls = {}
+        self.lock = threading.Lock()
+    
+    def translate(self, text, source_language, target_language):
+        """
+        Translate with the fastest backend that can handle the text
+        
+        Returns:
+            (translated text, backend name)
+        """
+        candidates = self._candidates(source_language, target_language)
+        if not candidates:
+            raise TranslationUnavailable(f"no backend supports {source_language}-{target_language}")
+        
+        last_error = None
+        for backend in candidates:
+            key = (backend.name, source_language, target_language)
+            started = time.perf_counter()
+            try:
+                translated = backend.translate(text, source_language, target_language)
+            except TranslationUnavailable as e:
+                last_error = e
+                continue
+            except Exception as e:
+                self._record(key, time.perf_counter() - started, failed=True)
+                last_error = e
+                continue
+            self._record(key, time.perf_counter() - started)
+            return translated, backend.name
+        
+        raise last_error
+    
+    def _candidates(self, source_language, target_language):
+        """Supporting backends, unmeasured first, then fastest first"""
+        supporting = [b for b in self.backends if b.supports(source_language, target_language)]
+        with self.lock:
+            pair = (source_language, target_language)
+            self.pair_calls[pair] = self.pair_calls.get(pair, 0) + 1
+            explore = self.explore_every and self.pair_calls[pair] % self.explore_every == 0
+            
+            order = {b.name: i for i, b in enumerate(supporting)}
+            ranked = sorted(
+                supporting,
+                key=lambda b: (
+                    (b.name, source_language, target_language) in self.latency,
+                    self.latency.get((b.name, source_language, target_language), 0.0),
+                    order[b.name]
+                )
+            )
+        if explore and len(ranked) > 1:
+            ranked[0], ranked[1] = ranked[1], ranked[0]
+        return ranked
+    
+    def _record(self, key, seconds, failed=False):
+        """Update the latency average (failures count as twice as slow)"""
+        with self.lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+            if failed:
+                self.errors[key] = self.errors.get(key, 0) + 1
+                seconds = max(seconds, self.latency.get(key, seconds)) * 2
+            previous = self.latency.get(key)
+            self.latency[key] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+    
+    def get_stats(self):
+        """Per language pair: latency average, calls and errors of each backend"""
+        with self.lock:
+            stats = {}
+            for (name, source, target), seconds in self.latency.items():
+                stats.setdefault(f"{source}-{target}", {})[name] = {
+                    "ewma_ms": round(seconds * 1000, 2),
+                    "calls": self.calls.get((name, source, target), 0),
+                    "errors": self.errors.get((name, source, target), 0)
+                }
+            return stats
+
+
+def build_backends(names, google_url=None, google_pool_size=10, phrase_table=None, marian_model=None,
+                   marian_local_only=True):
+    """
+    Create backends by name in preference order
+    
+    Args:
+        names: Backend names: 'phrase_table', 'marian', 'google'
+        google_url: Endpoint override for the Google backend
+        google_pool_size: Keep-alive connections of the Google backend
+        phrase_table: JSON file for the phrase table backend
+        marian_model: Model name pattern for the MarianMT backend
+        marian_local_only: Only use MarianMT models already downloaded
+    
+    Returns:
+        list of TranslationBackend
+    """
+    backends = []
+    for name in names:
+        if name == "google":
+            backends.append(GoogleBackend(base_url=google_url, pool_size=google_pool_size))
+        elif name == "phrase_table":
+            if phrase_table:
+                backends.append(PhraseTableBackend(path=phrase_table))
+            else:
+                print("⚠️ phrase_table backend skipped: no phrase table file configured")
+        elif name == "marian":
+            if MARIAN_AVAILABLE:
+                kwargs = {"model_template": marian_model} if marian_model else {}
+                backends.append(MarianBackend(local_files_only=marian_local_only, **kwargs))
+            else:
+                print("⚠️ marian backend skipped: transformers not installed")
+        else:
+            print(f"⚠️ Unknown translation backend: {name}")
+    return backends
@@ -1,11 +1,100 @@
 """
 Translation Engine for FastAPI Backend
 """
-from deep_translator import GoogleTranslator
+import re
+from .cache import make_cache_key
+from .translation_backends import BackendRouter, GoogleBackend
+from .engine_state import combine_states
+from .metrics import metrics
+
+# Sentence end followed by whitespace (Latin, Devanagari and CJK punctuation)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?。！？।])\s+')
+
+
+def split_text(text, max_chars=5000):
+    """
+    Split text into provider-sized chunks on sentence boundaries
+    
+    Sentences are packed greedily into chunks of at most max_chars; a
+    sentence longer than that is split on whitespace (or hard-cut if it has
+    none).
+    
+    Args:
+        text: Text to split
+        max_chars: Largest chunk length
+        
+    Returns:
+        list of (chunk, separator) - separator is the whitespace that
+        followed the chunk in the original text, for join_chunks
+    """
+    pieces = []
+    position = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        pieces.append((text[position:match.start()], match.group()))
+        position = match.end()
+    pieces.append((text[position:], ""))
+    
+    chunks = []
+    current, current_sep = "", ""
+    for sentence, separator in pieces:
+        for part, part_sep in _split_long(sentence, separator, max_chars):
+            if current and len(current) + len(current_sep) + len(part) <= max_chars:
+                current += current_sep + part
+            else:
+                if current:
+                    chunks.append((current, current_sep))
+                current = part
+            current_sep = part_sep
+    if current:
+        chunks.append((current, current_sep))
+    return chunks
+
+
+def _split_long(sentence, separator, max_chars):
+    """Split one over-long sentence on whitespace, hard-cutting long words"""
+    if len(sentence) <= max_chars:
+        return [(sentence, separator)]
+    
+    parts = []
+    current = ""
+    for word in sentence.split():
+        while len(word) > max_chars:
+            if current:
+                parts.append((current, " "))
+                current = ""
+            parts.append((word[:max_chars], ""))
+            word = word[max_chars:]
+        if current and len(current) + 1 + len(word) > max_chars:
+            parts.append((current, " "))
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    parts.append((current, separator))
+    return parts
+
+
+def join_chunks(translations, chunks):
+    """Reassemble chunk translations with the original separators"""
+    return "".join(
+        translated + (("\n" if "\n" in separator else " ") if separator else "")
+        for translated, (_, separator) in zip(translations, chunks)
+    ).strip()
+
 
 class TranslationEngine:
-    def __init__(self):
-        """Initialize translation engine"""
+    def __init__(self, cache=None, backends=None):
+        """
+        Initialize translation engine
+        
+        Args:
+            cache: Optional TTLCache shared with other engines; identical
+                   translations are then served from it and concurrent
+                   identical requests make one upstream call
+            backends: TranslationBackend list in preference order
+                      (default: Google Translate only)
+        """
+        self.cache = cache
+        self.router = BackendRouter(backends or [GoogleBackend()])
         self.supported_languages = {
             "en": "English",
             "hi": "Hindi",
@@ -27,7 +116,7 @@ class TranslationEngine:
             "kn": "Kannada",
             "ml": "Malayalam"
         }
-        print("🌍 Translation Engine initialized")
+        print(f"🌍 Translation Engine initialized (backends: {', '.join(b.name for b in self.router.backends)})")
     
     def translate(self, text, target_language, source_language="auto"):
         """
@@ -41,14 +130,43 @@ class TranslationEngine:
         Returns:
             dict with translated text
         """
+        if self.cache is None:
+            return self._translate(text, target_language, source_language)
+        
+        key = self.cache_key(text, target_language, source_language)
+        result = self.cache.get_or_compute(
+            key,
+            lambda: self._translate(text, target_language, source_language),
+            cacheable=lambda result: "error" not in result
+        )
+        
+        if "error" not in result and result.get("translated_text"):
+            # The output is already in the target language, so translating it
+            # there again (e.g. TTS auto-translation) is answered from the cache
+            self.cache.add(self.cache_key(result["translated_text"], target_language), {
+                "translated_text": result["translated_text"],
+                "source_language": "auto",
+                "target_language": target_language
+            })
+        
+        # Callers get their own copy of the cached dict
+        return dict(result)
+    
+    def cache_key(self, text, target_language, source_language="auto"):
+        """Cache key for a translation"""
+        return make_cache_key("translate", text.encode('utf-8'), source=source_language, target=target_language)
+    
+    def _translate(self, text, target_language, source_language):
+        """Uncached translation through the fastest capable backend"""
         try:
-            translator = GoogleTranslator(source=source_language, target=target_language)
-            translated_text = translator.translate(text)
+            with metrics.stage("translation", "translate"):
+                translated_text, backend = self.router.translate(text, source_language, target_language)
             
             return {
                 "translated_text": translated_text,
                 "source_language": source_language,
-                "target_language": target_language
+                "target_language": target_language,
+                "backend": backend
             }
             
         except Exception as e:
@@ -58,6 +176,22 @@ class TranslationEngine:
                 "error": str(e)
             }
     
+    def get_stats(self):
+        """Translation cache statistics (None when caching is disabled)"""
+        return self.cache.get_stats() if self.cache is not None else None
+    
+    def get_status(self):
+        """Overall and per-backend load state"""
+        backends = {backend.name: backend.get_status() for backend in self.router.backends}
+        return {
+            "state": combine_states(status["state"] for status in backends.values()),
+            "backends": backends
+        }
+    
+    def get_backend_stats(self):
+        """Per language pair latency averages of each backend"""
+        return self.router.get_stats()
+    
     def get_supported_languages(self):
         """Get list of supported languages"""
         return [
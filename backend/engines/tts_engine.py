@@ -6,9 +6,16 @@ import platform
 from pathlib import Path
 import uuid
 import re
+import struct
 from deep_translator import GoogleTranslator
+from .cache import make_cache_key
+from .audio_transcode import read_audio, downmix, resample, to_pcm16, write_wav, transcode, TranscodeUnavailable
+from .tts_workers import Pyttsx3WorkerPool
+from .voice_registry import VoiceRegistry
+from .metrics import metrics
+from .engine_state import EngineState
 
-# Only import pyttsx3 on macOS
+# pyttsx3 - offline fallback when neither `say` (macOS) nor gTTS is available
 try:
     import pyttsx3
     PYTTSX3_AVAILABLE = True
@@ -22,21 +29,61 @@ try:
 except:
     GTTS_AVAILABLE = False
 
+def streaming_wav_header(channels, width, framerate):
+    """WAV header for a stream of unknown length (sizes set to the maximum)"""
+    block_align = channels * width
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE" +
+        b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, framerate, framerate * block_align, block_align, width * 8) +
+        b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def strip_id3(data):
+    """Drop a leading ID3v2 tag so MP3 segments can be concatenated"""
+    if data[:3] != b"ID3" or len(data) < 10:
+        return data
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return data[10 + size:]
+
+
 class TTSEngine:
-    def __init__(self):
-        """Initialize TTS engine"""
+    def __init__(self, translation_engine=None, audio_cache=None, pyttsx3_workers=2):
+        """
+        Initialize TTS engine
+        
+        Args:
+            translation_engine: Optional TranslationEngine used for
+                                auto-translation, so speech shares its cache
+            audio_cache: Optional AudioCache; repeated requests then reuse the
+                         generated file instead of synthesizing again
+            pyttsx3_workers: pyttsx3 worker processes, each with its own
+                             engine (0 = one shared engine, one job at a time)
+        """
+        self.translation_engine = translation_engine
+        self.audio_cache = audio_cache
         self.system = platform.system()
         self.output_dir = Path("outputs")
         self.output_dir.mkdir(exist_ok=True)
         self.engine = None
+        self.engine_error = None
         
-        # Only initialize pyttsx3 on macOS
-        if self.system == "Darwin" and PYTTSX3_AVAILABLE:
+        # pyttsx3 is the fallback when neither `say` (macOS) nor gTTS is available
+        if self.system != "Darwin" and not GTTS_AVAILABLE and PYTTSX3_AVAILABLE:
             try:
                 self.engine = pyttsx3.init()
             except Exception as e:
                 print(f"⚠️ pyttsx3 initialization failed: {e}")
                 self.engine = None
+                self.engine_error = str(e)
+        
+        # Synthesis never touches the shared engine; jobs go to isolated workers
+        self.pyttsx3_pool = Pyttsx3WorkerPool(pyttsx3_workers, engine=self.engine) if self.engine is not None else None
+        self.voices = VoiceRegistry(
+            self.backend_name(),
+            engine=self.engine,
+            engine_lock=self.pyttsx3_pool.engine_lock if self.pyttsx3_pool is not None else None
+        )
         
         print(f"🎧 TTS Engine initialized ({self.system}, gTTS: {GTTS_AVAILABLE}, pyttsx3: {PYTTSX3_AVAILABLE})")
         self.lang_codes = {
@@ -104,26 +151,140 @@ class TTSEngine:
             return text
         
         try:
-            translator = GoogleTranslator(source='auto', target=target_lang)
-            translated = translator.translate(text)
+            if self.translation_engine is not None:
+                result = self.translation_engine.translate(text, target_lang)
+                if "error" in result:
+                    raise Exception(result["error"])
+                translated = result["translated_text"]
+            else:
+                translator = GoogleTranslator(source='auto', target=target_lang)
+                translated = translator.translate(text)
             print(f"  📝 Auto-translated: '{text[:50]}...' → '{translated[:50]}...' ({language})")
             return translated
         except Exception as e:
             print(f"  ⚠ Translation failed: {e}, using original text")
             return text
     
-    def generate_speech(self, text, language="en", rate=200):
+    def generate_speech(self, text, language="en", rate=200, output_format=None):
         """
         Generate speech from text with auto-translation
         
+        Identical requests are answered from the audio cache when one is
+        configured; concurrent identical requests synthesize only once.
+        
         Args:
             text: Text to convert to speech
             language: Language code
             rate: Speech rate (50-400)
-            
+            output_format: 'wav', 'mp3' or 'ogg' (None = the backend's own
+                           format: mp3 for gTTS, wav for local voices)
+        
         Returns:
             dict with audio file path
         """
+        if self.audio_cache is None:
+            return self._generate_speech(text, language, rate, output_format)
+        
+        key = self.cache_key(text, language, rate, output_format)
+        cached = self.audio_cache.get(key)
+        if cached is None:
+            with self.audio_cache.key_lock(key):
+                # Another request may have generated it while we waited
+                cached = self.audio_cache.get(key, waited=True)
+                if cached is None:
+                    result = self._generate_speech(text, language, rate, output_format)
+                    if not result.get("success"):
+                        return result
+                    meta = {k: v for k, v in result.items() if k not in ("audio_file", "success")}
+                    audio_file = self.audio_cache.put(key, result["audio_file"], meta)
+                    return dict(result, audio_file=str(audio_file), cached=False)
+        
+        audio_file, meta = cached
+        return dict(meta, success=True, audio_file=str(audio_file), cached=True)
+    
+    def release_audio(self, audio_file):
+        """
+        Delete a generated audio file once it has been served
+        
+        Files owned by the audio cache are kept; the cache evicts them.
+        Without a cache nothing else would ever delete them.
+        """
+        if self.audio_cache is None and audio_file:
+            Path(audio_file).unlink(missing_ok=True)
+    
+    def stream_segment(self, audio_file, first):
+        """
+        Bytes of one synthesized sentence for an in-order audio stream
+        
+        MP3 segments are concatenated frame streams (ID3 tags after the first
+        segment are dropped). WAV and AIFF segments become raw PCM behind a
+        single streaming WAV header sent with the first segment.
+        
+        Args:
+            audio_file: Path of the synthesized sentence
+            first: Whether this is the first segment of the stream
+        
+        Returns:
+            bytes to send
+        """
+        audio_file = Path(audio_file)
+        if audio_file.suffix == ".mp3":
+            data = audio_file.read_bytes()
+            return data if first else strip_id3(data)
+        
+        samples, framerate = read_audio(audio_file)
+        frames = to_pcm16(samples)
+        return streaming_wav_header(samples.shape[1], 2, framerate) + frames if first else frames
+    
+    def backend_name(self):
+        """Speech backend used on this machine: 'say', 'gtts', 'pyttsx3' or None"""
+        if self.system == "Darwin":
+            return "say"
+        if GTTS_AVAILABLE:
+            return "gtts"
+        if self.engine is not None:
+            return "pyttsx3"
+        return None
+    
+    def cache_key(self, text, language, rate, output_format=None):
+        """Audio cache key - gTTS has no rate control, so rate only counts for local voices"""
+        backend = self.backend_name()
+        return make_cache_key(
+            "tts",
+            text.encode('utf-8'),
+            language=language.lower(),
+            rate=rate if backend != "gtts" else None,
+            engine=backend,
+            format=output_format
+        )
+    
+    def _generate_speech(self, text, language, rate, output_format=None):
+        """Synthesize speech into a new file, converted to output_format if given"""
+        with metrics.stage("tts", "synthesize"):
+            result = self._synthesize(text, language, rate)
+        if not result.get("success") or not output_format or result.get("format") == output_format:
+            return result
+        
+        source = Path(result["audio_file"])
+        try:
+            with metrics.stage("tts", "transcode"):
+                target = transcode(source, output_format)
+        except TranscodeUnavailable as e:
+            # Keep the backend's own format rather than failing the request
+            print(f"⚠ {e}, returning {result.get('format')}")
+            return result
+        except Exception as e:
+            print(f"TTS Error: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        
+        source.unlink()
+        return dict(result, audio_file=str(target), format=output_format)
+    
+    def _synthesize(self, text, language, rate):
+        """Synthesize speech with the available backend in its own format"""
         try:
             # Auto-translate if needed (English → target language)
             processed_text = self._translate_if_needed(text, language)
@@ -144,7 +305,7 @@ class TTSEngine:
                 return self._generate_pyttsx3(processed_text, language, rate, audio_file)
             else:
                 raise Exception("No TTS engine available. Please install gTTS or pyttsx3.")
-                
+        
         except Exception as e:
             print(f"TTS Error: {str(e)}")
             return {
@@ -154,66 +315,9 @@ class TTSEngine:
     
     def _generate_macos(self, text, language, rate, audio_file):
         """Generate speech using macOS 'say' command with enhanced language support"""
-        # Enhanced voice mapping with better language-specific voices
-        voice_map = {
-            # English variants
-            "en": "Alex",           # English (US) - Clear male voice
-            "en-us": "Alex",        # English (US)
-            "en-gb": "Daniel",      # English (UK)
-            "en-au": "Karen",       # English (Australia)
-            
-            # Indian languages
-            "hi": "Lekha",          # Hindi - Female voice (native)
-            "kn": "Soumya",         # Kannada - Female voice (native)
-            "bn": "Piya",           # Bengali - Female voice (native)
-            "ta": "Vani",           # Tamil - Female voice (native)
-            "te": "Geeta",          # Telugu - Female voice (native)
-            "ml": "Lekha",          # Malayalam - Using Hindi voice (no native voice)
-            "gu": "Lekha",          # Gujarati - Using Hindi voice (no native voice)
-            "mr": "Lekha",          # Marathi - Using Hindi voice (no native voice)
-            "pa": "Lekha",          # Punjabi - Using Hindi voice (no native voice)
-            "or": "Lekha",          # Odia - Using Hindi voice (no native voice)
-            "as": "Lekha",          # Assamese - Using Hindi voice (no native voice)
-            "ur": "Majed",          # Urdu - Using Arabic voice (similar script)
-            
-            # Middle Eastern
-            "ar": "Majed",          # Arabic - Male voice
-            
-            # European languages
-            "es": "Monica",         # Spanish - Female voice
-            "es-mx": "Paulina",     # Spanish (Mexico)
-            "fr": "Thomas",         # French - Male voice
-            "de": "Anna",           # German - Female voice
-            "it": "Alice",          # Italian - Female voice
-            "pt": "Luciana",        # Portuguese - Female voice
-            "ru": "Yuri",           # Russian - Male voice
-            "nl": "Xander",         # Dutch - Male voice
-            "sv": "Alva",           # Swedish - Female voice
-            "no": "Nora",           # Norwegian - Female voice
-            "da": "Sara",           # Danish - Female voice
-            "fi": "Satu",           # Finnish - Female voice
-            "pl": "Zosia",          # Polish - Female voice
-            "tr": "Yelda",          # Turkish - Female voice
-            
-            # Asian languages
-            "ja": "Kyoko",          # Japanese - Female voice
-            "ko": "Yuna",           # Korean - Female voice
-            "zh": "Tingting",       # Chinese (Mandarin) - Female voice
-            "zh-cn": "Tingting",    # Chinese (China)
-            "zh-tw": "Mei-Jia",     # Chinese (Taiwan)
-            "th": "Kanya",          # Thai - Female voice
-            "id": "Damayanti",      # Indonesian - Female voice
-            "vi": "Linh",           # Vietnamese - Female voice
-        }
-        
-        # Get the appropriate voice for the language
-        voice = voice_map.get(language.lower(), "Alex")
-        
-        # Adjust rate based on language (some languages sound better at different rates)
-        adjusted_rate = rate
-        # Indian languages, Asian languages, and Arabic - slower for better clarity
-        if language.lower() in ["hi", "bn", "ta", "te", "kn", "ml", "gu", "mr", "pa", "or", "as", "ur", "ar", "ja", "ko", "zh", "th", "vi"]:
-            adjusted_rate = int(rate * 0.85)
+        # Get the appropriate voice and rate for the language
+        voice = self.voices.say_voice(language)
+        adjusted_rate = self.voices.speaking_rate(language, rate)
         
         # Generate AIFF file first
         temp_aiff = audio_file
@@ -238,36 +342,24 @@ class TTSEngine:
                 cmd[2] = "Alex"
                 subprocess.run(cmd, check=True)
         
-        # Convert AIFF to WAV using ffmpeg if available, otherwise return AIFF
+        # Convert AIFF to 16-bit mono 44.1kHz WAV in-process, otherwise return AIFF
         wav_file = audio_file.with_suffix('.wav')
         try:
-            convert_cmd = [
-                "ffmpeg", 
-                "-i", str(temp_aiff), 
-                "-acodec", "pcm_s16le",  # PCM 16-bit
-                "-ar", "44100",           # 44.1kHz sample rate
-                "-ac", "1",               # Mono channel
-                str(wav_file), 
-                "-y",
-                "-loglevel", "error"      # Suppress ffmpeg output
-            ]
-            result = subprocess.run(convert_cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                # Conversion successful, remove AIFF and use WAV
-                temp_aiff.unlink()
-                print(f"✓ Converted to WAV format")
-                return {
-                    "success": True,
-                    "audio_file": str(wav_file),
-                    "voice": voice,
-                    "language": language,
-                    "format": "wav",
-                    "rate": adjusted_rate
-                }
-        except (subprocess.SubprocessError, FileNotFoundError) as e:
-            # ffmpeg not available or conversion failed, use AIFF
-            print(f"⚠ FFmpeg conversion skipped: {str(e)}")
-            pass
+            samples, sample_rate = read_audio(temp_aiff)
+            write_wav(wav_file, resample(downmix(samples), sample_rate, 44100), 44100)
+            temp_aiff.unlink()
+            print(f"✓ Converted to WAV format")
+            return {
+                "success": True,
+                "audio_file": str(wav_file),
+                "voice": voice,
+                "language": language,
+                "format": "wav",
+                "rate": adjusted_rate
+            }
+        except Exception as e:
+            # Unreadable AIFF variant - serve the AIFF as produced
+            print(f"⚠ WAV conversion skipped: {str(e)}")
         
         return {
             "success": True,
@@ -283,39 +375,8 @@ class TTSEngine:
         if not GTTS_AVAILABLE:
             raise Exception("gTTS not available. Please install: pip install gTTS")
         
-        # Map language codes to gTTS compatible codes
-        gtts_lang_map = {
-            'en': 'en', 'en-us': 'en', 'en-gb': 'en', 'en-au': 'en',
-            'hi': 'hi',  # Hindi
-            'kn': 'kn',  # Kannada  
-            'bn': 'bn',  # Bengali
-            'ta': 'ta',  # Tamil
-            'te': 'te',  # Telugu
-            'ml': 'ml',  # Malayalam
-            'gu': 'gu',  # Gujarati
-            'mr': 'mr',  # Marathi
-            'pa': 'pa',  # Punjabi
-            'ur': 'ur',  # Urdu
-            'ar': 'ar',  # Arabic
-            'es': 'es',  # Spanish
-            'fr': 'fr',  # French
-            'de': 'de',  # German
-            'it': 'it',  # Italian
-            'pt': 'pt',  # Portuguese
-            'ru': 'ru',  # Russian
-            'ja': 'ja',  # Japanese
-            'ko': 'ko',  # Korean
-            'zh': 'zh-cn',  # Chinese
-            'th': 'th',  # Thai
-            'tr': 'tr',  # Turkish
-            'nl': 'nl',  # Dutch
-            'sv': 'sv',  # Swedish
-            'id': 'id',  # Indonesian
-            'vi': 'vi',  # Vietnamese
-        }
-        
         # Get gTTS language code
-        gtts_lang = gtts_lang_map.get(language.lower(), 'en')
+        gtts_lang = self.voices.gtts_language(language)
         
         try:
             # Generate speech using gTTS
@@ -337,143 +398,66 @@ class TTSEngine:
     
     def _generate_pyttsx3(self, text, language, rate, audio_file):
         """Generate speech using pyttsx3 with language support"""
-        # Set properties for better quality
-        self.engine.setProperty('rate', rate)
-        self.engine.setProperty('volume', 0.9)
-        
-        # Try to find a voice matching the language
-        voices = self.engine.getProperty('voices')
-        selected_voice = None
-        
-        # Language code mapping
-        lang_prefixes = {
-            # Indian languages
-            'hi': 'hindi',
-            'bn': 'bengali',
-            'ta': 'tamil',
-            'te': 'telugu',
-            'kn': 'kannada',
-            'ml': 'malayalam',
-            'gu': 'gujarati',
-            'mr': 'marathi',
-            'pa': 'punjabi',
-            'or': 'odia',
-            'as': 'assamese',
-            'ur': 'urdu',
-            # Other languages
-            'en': 'english',
-            'es': 'spanish',
-            'fr': 'french',
-            'de': 'german',
-            'ja': 'japanese',
-            'ko': 'korean',
-            'zh': 'chinese',
-            'ar': 'arabic',
-            'it': 'italian',
-            'pt': 'portuguese',
-            'ru': 'russian',
-            'tr': 'turkish',
-            'th': 'thai',
-            'id': 'indonesian',
-            'vi': 'vietnamese'
-        }
-        
-        # Try to find a matching voice
-        lang_name = lang_prefixes.get(language.lower().split('-')[0], 'english')
-        for voice in voices:
-            if lang_name.lower() in voice.name.lower():
-                selected_voice = voice.id
-                print(f"✓ Selected voice: {voice.name} for {language}")
-                break
-        
-        if selected_voice:
-            self.engine.setProperty('voice', selected_voice)
+        # Best installed voice for the language, from the registry
+        voice = self.voices.pyttsx3_voice(language)
+        selected_voice = voice["id"] if voice else None
+        if voice:
+            print(f"✓ Selected voice: {voice['name']} for {language}")
         else:
             print(f"⚠ No specific voice found for {language}, using default")
         
-        # Adjust rate for Indian and Asian languages
-        adjusted_rate = rate
-        if language.lower() in ['hi', 'bn', 'ta', 'te', 'kn', 'ml', 'gu', 'mr', 'pa', 'or', 'as', 'ur', 'ar', 'ja', 'ko', 'zh', 'th', 'vi']:
-            adjusted_rate = int(rate * 0.85)
-            self.engine.setProperty('rate', adjusted_rate)
+        adjusted_rate = self.voices.speaking_rate(language, rate)
         
-        # Generate speech
-        self.engine.save_to_file(text, str(audio_file))
-        self.engine.runAndWait()
+        # Generate speech in a worker with this request's own voice and rate
+        timings = self.pyttsx3_pool.synthesize(text, audio_file, voice=selected_voice, rate=adjusted_rate, volume=0.9)
         
         return {
             "success": True,
             "audio_file": str(audio_file),
             "engine": "pyttsx3",
             "language": language,
-            "rate": adjusted_rate
+            "format": audio_file.suffix.lstrip('.'),
+            "rate": adjusted_rate,
+            "queue_ms": timings["queue_ms"]
+        }
+    
+    def get_status(self):
+        """
+        Speech backend availability and load state
+        
+        `say` and gTTS have nothing to load ('not_applicable'); pyttsx3 is
+        'warm' once its worker pool is running; 'failed' when no backend is
+        available.
+        """
+        backend = self.backend_name()
+        if backend is None:
+            state = EngineState.FAILED
+            error = self.engine_error or "No TTS engine available. Please install gTTS or pyttsx3."
+        else:
+            state = EngineState.WARM if backend == "pyttsx3" else EngineState.NOT_APPLICABLE
+            error = None
+        return {
+            "state": state,
+            "backend": backend,
+            "gtts_available": GTTS_AVAILABLE,
+            "pyttsx3_available": PYTTSX3_AVAILABLE,
+            "pyttsx3_workers": self.pyttsx3_pool.workers if self.pyttsx3_pool is not None else None,
+            "error": error
         }
     
+    def get_stats(self):
+        """pyttsx3 worker pool statistics (None when pyttsx3 is not used)"""
+        return self.pyttsx3_pool.get_stats() if self.pyttsx3_pool is not None else None
+    
+    def shutdown(self):
+        """Stop the pyttsx3 worker processes"""
+        if self.pyttsx3_pool is not None:
+            self.pyttsx3_pool.shutdown()
+    
     def get_available_voices(self):
         """Get list of high-quality voices - Focus on English, Hindi, and Kannada"""
-        if self.system == "Darwin" and self.engine is not None:
-            # macOS with pyttsx3
-            return [
-                # English variants - Premium quality
-                {"code": "en", "name": "English (US) - Premium", "voice": "Alex", "gender": "male", "quality": "premium"},
-                {"code": "en-gb", "name": "English (UK) - Premium", "voice": "Daniel", "gender": "male", "quality": "premium"},
-                {"code": "en-au", "name": "English (Australia)", "voice": "Karen", "gender": "female", "quality": "high"},
-                
-                # Hindi - Premium quality native voice
-                {"code": "hi", "name": "हिंदी Hindi - Premium", "voice": "Lekha", "gender": "female", "quality": "premium"},
-                
-                # Kannada - Premium quality native voice
-                {"code": "kn", "name": "ಕನ್ನಡ Kannada - Premium", "voice": "Soumya", "gender": "female", "quality": "premium"},
-            ]
-        elif GTTS_AVAILABLE:
-            # Linux/Server with gTTS - Return supported languages
-            return [
-                # English variants
-                {"code": "en", "name": "English (US) - Premium", "engine": "gTTS", "quality": "premium"},
-                {"code": "en-gb", "name": "English (UK)", "engine": "gTTS", "quality": "high"},
-                
-                # Hindi - Premium quality
-                {"code": "hi", "name": "हिंदी Hindi - Premium", "engine": "gTTS", "quality": "premium"},
-                
-                # Kannada - Premium quality
-                {"code": "kn", "name": "ಕನ್ನಡ Kannada - Premium", "engine": "gTTS", "quality": "premium"},
-            ]
-        elif self.engine is not None:
-            # Fallback to pyttsx3 voices
-            try:
-                voices = self.engine.getProperty('voices')
-                filtered_voices = []
-                
-                # Priority languages
-                priority_langs = ['english', 'hindi', 'kannada']
-                
-                for voice in voices:
-                    voice_name_lower = voice.name.lower()
-                    for lang in priority_langs:
-                        if lang in voice_name_lower:
-                            filtered_voices.append({
-                                "code": lang[:2],
-                                "name": voice.name,
-                                "id": voice.id,
-                                "quality": "high"
-                            })
-                            break
-                
-                # If no specific voices found, return first 3 voices
-                if not filtered_voices and len(voices) > 0:
-                    filtered_voices = [
-                        {"code": "en", "name": voices[i].name if i < len(voices) else "Default", 
-                         "id": voices[i].id if i < len(voices) else 0, "quality": "standard"}
-                        for i in range(min(3, len(voices)))
-                    ]
-                
-                return filtered_voices if filtered_voices else [{"code": "en", "name": "Default", "quality": "standard"}]
-            except:
-                return [{"code": "en", "name": "English (Default)", "quality": "standard"}]
-        else:
-            # No TTS engine available, return default
-            return [
-                {"code": "en", "name": "English (US) - Premium", "engine": "none", "quality": "premium"},
-                {"code": "hi", "name": "हिंदी Hindi - Premium", "engine": "none", "quality": "premium"},
-                {"code": "kn", "name": "ಕನ್ನಡ Kannada - Premium", "engine": "none", "quality": "premium"},
-            ]
+        return self.voices.voices()
+    
+    def refresh_voices(self):
+        """Re-enumerate installed voices; returns the number listed"""
+        return self.voices.refresh()
@@ -0,0 +1,179 @@
+"""
+Isolated pyttsx3 synthesis workers
+
+A pyttsx3 engine is a single stateful object: voice and rate are set on it
+and runAndWait() blocks until the queued utterance is written. Sharing one
+across request threads lets concurrent requests overwrite each other's
+settings. Here every worker process owns its own engine, and each job carries
+the voice and rate it needs.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import pyttsx3
+    PYTTSX3_AVAILABLE = True
+except:
+    PYTTSX3_AVAILABLE = False
+
+# Engine owned by the current worker process, and its voice before any job ran
+_worker_engine = None
+_worker_default_voice = None
+
+
+def _init_worker():
+    """Process initializer - one pyttsx3 engine per worker process"""
+    global _worker_engine, _worker_default_voice
+    _worker_engine = pyttsx3.init()
+    _worker_default_voice = _worker_engine.getProperty('voice')
+
+
+def _speak(engine, text, audio_file, voice, rate, volume, default_voice=None):
+    """
+    Apply one job's settings to an engine and write the audio file
+    
+    A job without a voice gets the engine's default voice back, not the
+    voice left behind by the previous job.
+    """
+    engine.setProperty('rate', rate)
+    engine.setProperty('volume', volume)
+    voice = voice or default_voice
+    if voice:
+        engine.setProperty('voice', voice)
+    engine.save_to_file(text, str(audio_file))
+    engine.runAndWait()
+
+
+def _run_job(text, audio_file, voice, rate, volume, submitted):
+    """Worker-side job: returns (seconds queued, seconds synthesizing)"""
+    started = time.time()
+    _speak(_worker_engine, text, audio_file, voice, rate, volume, _worker_default_voice)
+    return started - submitted, time.time() - started
+
+
+class Pyttsx3WorkerPool:
+    """
+    Pool of pyttsx3 worker processes with a shared job queue
+    
+    With workers=0 jobs run in the calling thread on a single engine, one at
+    a time, which is still safe but does not scale.
+    """
+    
+    def __init__(self, workers=2, engine=None):
+        """
+        Initialize the pool
+        
+        Args:
+            workers: Worker processes, i.e. concurrent syntheses (0 = in-process)
+            engine: Existing pyttsx3 engine for in-process mode (created if None)
+        """
+        self.workers = max(0, workers)
+        self.engine = engine
+        self.default_voice = engine.getProperty('voice') if engine is not None else None
+        self.pool = None
+        self.lock = threading.Lock()
+        self.engine_lock = threading.Lock()
+        
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.total_queue_time = 0.0
+        self.max_queue_time = 0.0
+        self.total_run_time = 0.0
+        
+        if self.workers:
+            self.pool = self._new_pool()
+        print(f"🗣️ pyttsx3 worker pool initialized ({self.workers or 'in-process'} workers)")
+    
+    def _new_pool(self):
+        # spawn, not fork: speech drivers (NSSpeechSynthesizer, espeak) do not survive a fork
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+    
+    def synthesize(self, text, audio_file, voice=None, rate=200, volume=0.9):
+        """
+        Synthesize text into audio_file, blocking until it is written
+        
+        Args:
+            text: Text to speak
+            audio_file: Output path
+            voice: pyttsx3 voice id (None = engine default)
+            rate: Words per minute
+            volume: 0.0 - 1.0
+        
+        Returns:
+            dict with queue_ms and synthesis_ms
+        """
+        with self.lock:
+            self.submitted += 1
+        
+        submitted = time.time()
+        try:
+            if self.pool is None:
+                with self.engine_lock:
+                    started = time.time()
+                    if self.engine is None:
+                        self.engine = pyttsx3.init()
+                        self.default_voice = self.engine.getProperty('voice')
+                    _speak(self.engine, text, audio_file, voice, rate, volume, self.default_voice)
+                queue_time, run_time = started - submitted, time.time() - started
+            else:
+                pool = self.pool
+                try:
+                    queue_time, run_time = pool.submit(
+                        _run_job, text, str(audio_file), voice, rate, volume, submitted
+                    ).result()
+                except BrokenProcessPool:
+                    self._restart(pool)
+                    raise Exception("TTS worker process died, please retry")
+        except Exception:
+            with self.lock:
+                self.failed += 1
+            raise
+        
+        with self.lock:
+            self.completed += 1
+            self.total_queue_time += queue_time
+            self.max_queue_time = max(self.max_queue_time, queue_time)
+            self.total_run_time += run_time
+        return {
+            "queue_ms": round(queue_time * 1000, 2),
+            "synthesis_ms": round(run_time * 1000, 2)
+        }
+    
+    def _restart(self, broken):
+        """Replace a pool whose worker crashed (once, however many jobs saw it)"""
+        with self.lock:
+            if self.pool is not broken:
+                return
+            self.pool = self._new_pool()
+            self.restarts += 1
+        broken.shutdown(wait=False)
+        print("⚠️ pyttsx3 worker pool restarted after a worker crashed")
+    
+    def get_stats(self):
+        """Job counts and queue/synthesis times"""
+        with self.lock:
+            finished = self.completed
+            return {
+                "workers": self.workers,
+                "in_flight": self.submitted - self.completed - self.failed,
+                "completed": self.completed,
+                "failed": self.failed,
+                "restarts": self.restarts,
+                "average_queue_ms": round(self.total_queue_time / finished * 1000, 2) if finished else 0,
+                "max_queue_ms": round(self.max_queue_time * 1000, 2),
+                "average_synthesis_ms": round(self.total_run_time / finished * 1000, 2) if finished else 0
+            }
+    
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
@@ -0,0 +1,274 @@
+"""
+Voice registry shared by the TTS backends
+
+The language -> voice tables are module constants, and the installed pyttsx3
+voices are enumerated once and indexed by language, so choosing a voice is a
+dict lookup and /api/voices is served from memory.
+"""
+import threading
+
+# macOS `say` voice per language
+SAY_VOICES = {
+    # English variants
+    "en": "Alex",           # English (US) - Clear male voice
+    "en-us": "Alex",        # English (US)
+    "en-gb": "Daniel",      # English (UK)
+    "en-au": "Karen",       # English (Australia)
+    
+    # Indian languages
+    "hi": "Lekha",          # Hindi - Female voice (native)
+    "kn": "Soumya",         # Kannada - Female voice (native)
+    "bn": "Piya",           # Bengali - Female voice (native)
+    "ta": "Vani",           # Tamil - Female voice (native)
+    "te": "Geeta",          # Telugu - Female voice (native)
+    "ml": "Lekha",          # Malayalam - Using Hindi voice (no native voice)
+    "gu": "Lekha",          # Gujarati - Using Hindi voice (no native voice)
+    "mr": "Lekha",          # Marathi - Using Hindi voice (no native voice)
+    "pa": "Lekha",          # Punjabi - Using Hindi voice (no native voice)
+    "or": "Lekha",          # Odia - Using Hindi voice (no native voice)
+    "as": "Lekha",          # Assamese - Using Hindi voice (no native voice)
+    "ur": "Majed",          # Urdu - Using Arabic voice (similar script)
+    
+    # Middle Eastern
+    "ar": "Majed",          # Arabic - Male voice
+    
+    # European languages
+    "es": "Monica",         # Spanish - Female voice
+    "es-mx": "Paulina",     # Spanish (Mexico)
+    "fr": "Thomas",         # French - Male voice
+    "de": "Anna",           # German - Female voice
+    "it": "Alice",          # Italian - Female voice
+    "pt": "Luciana",        # Portuguese - Female voice
+    "ru": "Yuri",           # Russian - Male voice
+    "nl": "Xander",         # Dutch - Male voice
+    "sv": "Alva",           # Swedish - Female voice
+    "no": "Nora",           # Norwegian - Female voice
+    "da": "Sara",           # Danish - Female voice
+    "fi": "Satu",           # Finnish - Female voice
+    "pl": "Zosia",          # Polish - Female voice
+    "tr": "Yelda",          # Turkish - Female voice
+    
+    # Asian languages
+    "ja": "Kyoko",          # Japanese - Female voice
+    "ko": "Yuna",           # Korean - Female voice
+    "zh": "Tingting",       # Chinese (Mandarin) - Female voice
+    "zh-cn": "Tingting",    # Chinese (China)
+    "zh-tw": "Mei-Jia",     # Chinese (Taiwan)
+    "th": "Kanya",          # Thai - Female voice
+    "id": "Damayanti",      # Indonesian - Female voice
+    "vi": "Linh",           # Vietnamese - Female voice
+}
+DEFAULT_SAY_VOICE = "Alex"
+
+# gTTS language code per language
+GTTS_LANGUAGES = {
+    'en': 'en', 'en-us': 'en', 'en-gb': 'en', 'en-au': 'en',
+    'hi': 'hi',  # Hindi
+    'kn': 'kn',  # Kannada
+    'bn': 'bn',  # Bengali
+    'ta': 'ta',  # Tamil
+    'te': 'te',  # Telugu
+    'ml': 'ml',  # Malayalam
+    'gu': 'gu',  # Gujarati
+    'mr': 'mr',  # Marathi
+    'pa': 'pa',  # Punjabi
+    'ur': 'ur',  # Urdu
+    'ar': 'ar',  # Arabic
+    'es': 'es',  # Spanish
+    'fr': 'fr',  # French
+    'de': 'de',  # German
+    'it': 'it',  # Italian
+    'pt': 'pt',  # Portuguese
+    'ru': 'ru',  # Russian
+    'ja': 'ja',  # Japanese
+    'ko': 'ko',  # Korean
+    'zh': 'zh-cn',  # Chinese
+    'th': 'th',  # Thai
+    'tr': 'tr',  # Turkish
+    'nl': 'nl',  # Dutch
+    'sv': 'sv',  # Swedish
+    'id': 'id',  # Indonesian
+    'vi': 'vi',  # Vietnamese
+}
+
+# Language name found in pyttsx3 voice names
+PYTTSX3_LANGUAGE_NAMES = {
+    # Indian languages
+    'hi': 'hindi',
+    'bn': 'bengali',
+    'ta': 'tamil',
+    'te': 'telugu',
+    'kn': 'kannada',
+    'ml': 'malayalam',
+    'gu': 'gujarati',
+    'mr': 'marathi',
+    'pa': 'punjabi',
+    'or': 'odia',
+    'as': 'assamese',
+    'ur': 'urdu',
+    # Other languages
+    'en': 'english',
+    'es': 'spanish',
+    'fr': 'french',
+    'de': 'german',
+    'ja': 'japanese',
+    'ko': 'korean',
+    'zh': 'chinese',
+    'ar': 'arabic',
+    'it': 'italian',
+    'pt': 'portuguese',
+    'ru': 'russian',
+    'tr': 'turkish',
+    'th': 'thai',
+    'id': 'indonesian',
+    'vi': 'vietnamese'
+}
+
+# Indian languages, Asian languages and Arabic are spoken slower for clarity
+SLOW_LANGUAGES = frozenset(["hi", "bn", "ta", "te", "kn", "ml", "gu", "mr", "pa", "or", "as", "ur", "ar", "ja", "ko", "zh", "th", "vi"])
+SLOW_RATE_FACTOR = 0.85
+
+# Voices listed by /api/voices - focus on English, Hindi and Kannada
+SAY_VOICE_LIST = [
+    # English variants - Premium quality
+    {"code": "en", "name": "English (US) - Premium", "voice": "Alex", "gender": "male", "quality": "premium"},
+    {"code": "en-gb", "name": "English (UK) - Premium", "voice": "Daniel", "gender": "male", "quality": "premium"},
+    {"code": "en-au", "name": "English (Australia)", "voice": "Karen", "gender": "female", "quality": "high"},
+    
+    # Hindi - Premium quality native voice
+    {"code": "hi", "name": "हिंदी Hindi - Premium", "voice": "Lekha", "gender": "female", "quality": "premium"},
+    
+    # Kannada - Premium quality native voice
+    {"code": "kn", "name": "ಕನ್ನಡ Kannada - Premium", "voice": "Soumya", "gender": "female", "quality": "premium"},
+]
+
+GTTS_VOICE_LIST = [
+    # English variants
+    {"code": "en", "name": "English (US) - Premium", "engine": "gTTS", "quality": "premium"},
+    {"code": "en-gb", "name": "English (UK)", "engine": "gTTS", "quality": "high"},
+    
+    # Hindi - Premium quality
+    {"code": "hi", "name": "हिंदी Hindi - Premium", "engine": "gTTS", "quality": "premium"},
+    
+    # Kannada - Premium quality
+    {"code": "kn", "name": "ಕನ್ನಡ Kannada - Premium", "engine": "gTTS", "quality": "premium"},
+]
+
+NO_ENGINE_VOICE_LIST = [
+    {"code": "en", "name": "English (US) - Premium", "engine": "none", "quality": "premium"},
+    {"code": "hi", "name": "हिंदी Hindi - Premium", "engine": "none", "quality": "premium"},
+    {"code": "kn", "name": "ಕನ್ನಡ Kannada - Premium", "engine": "none", "quality": "premium"},
+]
+
+# Languages whose pyttsx3 voices are listed by /api/voices
+PRIORITY_LANGUAGES = ('en', 'hi', 'kn')
+
+
+class VoiceRegistry:
+    """
+    Voices available to the active TTS backend, built once
+    
+    pyttsx3 voices are indexed by language code in installation order;
+    call refresh() after installing or removing system voices.
+    """
+    
+    def __init__(self, backend, engine=None, engine_lock=None):
+        """
+        Initialize the registry
+        
+        Args:
+            backend: Active backend: 'say', 'gtts', 'pyttsx3' or None
+            engine: pyttsx3 engine to enumerate voices from (pyttsx3 backend)
+            engine_lock: Lock guarding engine, which in-process synthesis
+                         also uses (None = the engine is not shared)
+        """
+        self.backend = backend
+        self.engine = engine
+        self.engine_lock = engine_lock or threading.Lock()
+        self.lock = threading.Lock()
+        self.by_language = {}
+        self.listing = []
+        self.refresh()
+    
+    def refresh(self):
+        """
+        Re-enumerate installed voices
+        
+        Returns:
+            Number of voices listed
+        """
+        by_language = {}
+        if self.backend == "say":
+            listing = SAY_VOICE_LIST
+        elif self.backend == "gtts":
+            listing = GTTS_VOICE_LIST
+        elif self.backend == "pyttsx3":
+            by_language, listing = self._index_pyttsx3()
+        else:
+            listing = NO_ENGINE_VOICE_LIST
+        
+        # Swap both at once so readers never see a half-built index
+        with self.lock:
+            self.by_language = by_language
+            self.listing = listing
+        print(f"🗂️ Voice registry built ({self.backend or 'no engine'}: {len(listing)} voices)")
+        return len(listing)
+    
+    def _index_pyttsx3(self):
+        """Index installed pyttsx3 voices by language; returns (index, listing)"""
+        try:
+            with self.engine_lock:
+                voices = self.engine.getProperty('voices')
+        except Exception as e:
+            print(f"⚠️ Could not enumerate pyttsx3 voices: {e}")
+            return {}, [{"code": "en", "name": "English (Default)", "quality": "standard"}]
+        
+        by_language = {}
+        for voice in voices:
+            name = voice.name.lower()
+            for code, language_name in PYTTSX3_LANGUAGE_NAMES.items():
+                if language_name in name:
+                    quality = "high" if code in PRIORITY_LANGUAGES else "standard"
+                    by_language.setdefault(code, []).append(
+                        {"code": code, "name": voice.name, "id": voice.id, "quality": quality}
+                    )
+                    break
+        listing = [entry for code in PRIORITY_LANGUAGES for entry in by_language.get(code, [])]
+        
+        # If no specific voices found, list the first 3 voices
+        if not listing and voices:
+            listing = [
+                {"code": "en", "name": voice.name, "id": voice.id, "quality": "standard"}
+                for voice in voices[:3]
+            ]
+        return by_language, listing or [{"code": "en", "name": "Default", "quality": "standard"}]
+    
+    def say_voice(self, language):
+        """macOS `say` voice for a language"""
+        return SAY_VOICES.get(language.lower(), DEFAULT_SAY_VOICE)
+    
+    def gtts_language(self, language):
+        """gTTS language code for a language (English if unsupported)"""
+        return GTTS_LANGUAGES.get(language.lower(), 'en')
+    
+    def pyttsx3_voice(self, language):
+        """
+        Best installed pyttsx3 voice for a language
+        
+        Returns:
+            voice dict with name and id, or None to use the engine default
+        """
+        code = language.lower().split('-')[0]
+        if code not in PYTTSX3_LANGUAGE_NAMES:
+            code = 'en'
+        entries = self.by_language.get(code)
+        return entries[0] if entries else None
+    
+    def speaking_rate(self, language, rate):
+        """Speech rate adjusted for the language"""
+        return int(rate * SLOW_RATE_FACTOR) if language.lower() in SLOW_LANGUAGES else rate
+    
+    def voices(self):
+        """Voice listing for /api/voices"""
+        with self.lock:
+            return list(self.listing)
@@ -0,0 +1,166 @@
+"""
+🧵 Engine Execution Pools
+Bounded thread pools that keep blocking engine work off the asyncio event loop
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+from engines.profiling import current_profile, profile_call
+
+
+class EngineBusyError(Exception):
+    """Raised when an engine pool's queue is full"""
+
+    def __init__(self, name: str):
+        self.name = name
+        super().__init__(f"{name} engine is busy, try again shortly")
+
+
+class EngineExecutor:
+    """
+    Dedicated, bounded thread pool for one engine
+
+    Each engine gets its own workers so slow OCR or model inference cannot
+    starve I/O-bound work such as translation, and the event loop stays free
+    for health checks and other connections.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int = 0):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)  # 0 = unbounded waiting queue
+        self.pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"{name}-engine"
+        )
+
+        # Counters are touched from the event loop and from worker threads
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.total_wait_time = 0.0
+        self.total_run_time = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in this engine's pool and await its result"""
+        with self._lock:
+            if self.max_queue and self.active + self.waiting >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise EngineBusyError(self.name)
+            self.waiting += 1
+
+        # Work for a profiled request is profiled in the worker thread
+        profile = current_profile.get()
+        if profile is not None:
+            fn = functools.partial(profile_call, [profile], fn)
+
+        submitted = time.perf_counter()
+        try:
+            future = self.pool.submit(self._call, fn, args, kwargs, submitted)
+        except Exception:
+            with self._lock:
+                self.waiting -= 1
+            raise
+        # Cancelling the awaiting task cancels a job that has not started yet;
+        # its queue slot is then released here since _call never runs
+        future.add_done_callback(self._release_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_if_cancelled(self, future) -> None:
+        """Free the queue slot of a job cancelled before a worker picked it up"""
+        if future.cancelled():
+            with self._lock:
+                self.waiting -= 1
+                self.cancelled += 1
+
+    async def iterate(self, generator: Iterator) -> AsyncIterator:
+        """Drive a blocking generator in this pool, yielding items as they are produced"""
+        done = object()
+        try:
+            while True:
+                item = await self.run(next, generator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            # Stop the generator if the consumer went away mid-stream
+            try:
+                generator.close()
+            except ValueError:
+                pass  # still running in a worker; it finishes on its own
+
+    def _call(self, fn: Callable, args: tuple, kwargs: dict, submitted: float) -> Any:
+        """Worker-side wrapper that records queue and run time"""
+        started = time.perf_counter()
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+            self.total_wait_time += started - submitted
+
+        succeeded = False
+        try:
+            result = fn(*args, **kwargs)
+            succeeded = True
+            return result
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.total_run_time += time.perf_counter() - started
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool utilisation statistics"""
+        finished = self.completed + self.failed
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "average_wait_ms": round(self.total_wait_time / finished * 1000, 2) if finished else 0,
+            "average_run_ms": round(self.total_run_time / finished * 1000, 2) if finished else 0
+        }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release the worker threads"""
+        self.pool.shutdown(wait=wait)
+
+
+class ExecutorRegistry:
+    """Named collection of engine pools"""
+
+    def __init__(self):
+        self.executors: Dict[str, EngineExecutor] = {}
+
+    def add(self, name: str, max_workers: int, max_queue: int = 0) -> EngineExecutor:
+        """Create and register a pool for an engine"""
+        executor = EngineExecutor(name, max_workers, max_queue)
+        self.executors[name] = executor
+        return executor
+
+    def __getitem__(self, name: str) -> EngineExecutor:
+        return self.executors[name]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get statistics for every registered pool"""
+        return {name: executor.get_stats() for name, executor in self.executors.items()}
+
+    def shutdown(self, wait: bool = False):
+        """Shut down every registered pool"""
+        for executor in self.executors.values():
+            executor.shutdown(wait=wait)
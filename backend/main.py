@@ -3,24 +3,46 @@
 Professional REST API for OCR, AI Captioning, Translation & TTS
 """
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, PlainTextResponse, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Optional
 import uvicorn
 import os
-import shutil
+import hmac
+import asyncio
+import base64
+import json
+import time
+import threading
+from collections import deque
 from pathlib import Path
-import uuid
 from datetime import datetime
 
 # Import engines
 from engines.ocr_engine import OCREngine
 from engines.caption_engine import CaptionEngine
-from engines.translation_engine import TranslationEngine
+from engines.translation_engine import TranslationEngine, split_text, join_chunks
+from engines.translation_backends import build_backends
 from engines.tts_engine import TTSEngine
+from engines.audio_transcode import OUTPUT_FORMATS
+from engines.caption_batcher import CaptionBatcher
+from engines.cache import ResultCache, TTLCache, make_cache_key
+from engines.audio_cache import AudioCache
+from engines.image_io import load_image
+from engines.metrics import metrics
+from engines.profiling import ProfileStore
+from executors import ExecutorRegistry, EngineBusyError
+from middleware import RateLimiter, MemoryStore, RedisStore, RateLimitMiddleware, RequestLoggingMiddleware, MetricsMiddleware, ProfilingMiddleware
+from models import (
+    BatchOCRRequest, BatchOCRResponse, OCRResponse,
+    BatchTranslationRequest, BatchTranslationResponse, BatchTranslationItem, UsageStats
+)
+import config
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -31,6 +53,27 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# Opt-in cProfile capture; not installed at all unless enabled
+profile_store = None
+if config.PROFILING_ENABLED:
+    profile_store = ProfileStore(max_profiles=config.PROFILE_BUFFER_SIZE)
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        sample_rate=config.PROFILE_SAMPLE_RATE,
+        token=config.ADMIN_TOKEN
+    )
+
+# Rate limiting sits inside CORS so 429 responses still carry CORS headers
+rate_limiter = None
+if config.RATE_LIMIT_ENABLED:
+    rate_limiter = RateLimiter(
+        config.RATE_LIMIT_PER_MINUTE,
+        store=RedisStore(config.RATE_LIMIT_REDIS_URL) if config.RATE_LIMIT_REDIS_URL
+        else MemoryStore(max_keys=config.RATE_LIMIT_MAX_CLIENTS)
+    )
+    app.add_middleware(RateLimitMiddleware, rate_limiter=rate_limiter)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -40,18 +83,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-endpoint latency histograms and stage timings for /api/metrics
+metrics.enabled = config.METRICS_ENABLED
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Outermost, so logged times include every other middleware
+if config.REQUEST_LOGGING_ENABLED:
+    app.add_middleware(RequestLoggingMiddleware)
+
 # Create necessary directories
-UPLOAD_DIR = Path("uploads")
 OUTPUT_DIR = Path("outputs")
-UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 
 # Initialize engines
 print("🔧 Initializing AI engines...")
-ocr_engine = OCREngine()
+ocr_engine = OCREngine(
+    max_readers=config.OCR_READER_POOL_SIZE,
+    max_reader_bytes=config.OCR_READER_POOL_MAX_MB * 1024 * 1024,
+    tile_size=config.OCR_TILE_SIZE,
+    tile_overlap=config.OCR_TILE_OVERLAP,
+    tile_workers=config.OCR_TILE_WORKERS
+)
 caption_engine = CaptionEngine()
-translation_engine = TranslationEngine()
-tts_engine = TTSEngine()
+translation_engine = TranslationEngine(
+    cache=TTLCache(
+        max_entries=config.TRANSLATION_CACHE_MAX_ENTRIES,
+        ttl_seconds=config.TRANSLATION_CACHE_TTL
+    ) if config.TRANSLATION_CACHE_ENABLED else None,
+    backends=build_backends(
+        config.TRANSLATION_BACKENDS,
+        google_url=config.TRANSLATION_GOOGLE_URL or None,
+        google_pool_size=config.TRANSLATION_WORKERS,
+        phrase_table=config.TRANSLATION_PHRASE_TABLE or None,
+        marian_model=config.TRANSLATION_MARIAN_MODEL,
+        marian_local_only=not config.TRANSLATION_MARIAN_DOWNLOAD
+    )
+)
+tts_engine = TTSEngine(
+    translation_engine=translation_engine,
+    audio_cache=AudioCache(
+        OUTPUT_DIR,
+        max_bytes=config.TTS_CACHE_MAX_MB * 1024 * 1024,
+        max_age_seconds=config.TTS_CACHE_MAX_AGE_HOURS * 3600,
+        grace_seconds=config.TTS_CACHE_GRACE_SECONDS
+    ) if config.TTS_CACHE_ENABLED else None,
+    pyttsx3_workers=config.TTS_PYTTSX3_WORKERS
+)
+
+# OCR and caption results keyed on image content + parameters
+result_cache = None
+if config.RESULT_CACHE_ENABLED:
+    result_cache = ResultCache(
+        max_bytes=config.RESULT_CACHE_MAX_MB * 1024 * 1024,
+        disk_dir=config.RESULT_CACHE_DIR or None,
+        disk_max_bytes=config.RESULT_CACHE_DISK_MAX_MB * 1024 * 1024
+    )
+
+# Blocking engine work runs in per-engine pools, never on the event loop
+executors = ExecutorRegistry()
+executors.add("ocr", config.OCR_WORKERS, config.ENGINE_MAX_QUEUE)
+executors.add("caption", config.CAPTION_WORKERS, config.ENGINE_MAX_QUEUE)
+executors.add("translation", config.TRANSLATION_WORKERS, config.ENGINE_MAX_QUEUE)
+executors.add("tts", config.TTS_WORKERS, config.ENGINE_MAX_QUEUE)
+
+# Concurrent local caption requests share one batched model call
+caption_batcher = None
+if config.CAPTION_BATCHING_ENABLED:
+    caption_batcher = CaptionBatcher(
+        caption_engine,
+        max_batch_size=config.CAPTION_BATCH_MAX_SIZE,
+        max_wait_ms=config.CAPTION_BATCH_MAX_WAIT_MS,
+        executor=executors["caption"],
+        max_queue=config.ENGINE_MAX_QUEUE
+    )
 print("✅ All engines initialized!")
 
 # Pydantic models
@@ -63,31 +168,208 @@ class TTSRequest(BaseModel):
     text: str
     language: str
     rate: Optional[int] = 200
+    output_format: Optional[str] = None
 
 class HealthResponse(BaseModel):
     status: str
     version: str
+    ready: bool
     engines: dict
 
 # Helper functions
-def save_upload_file(upload_file: UploadFile) -> Path:
-    """Save uploaded file and return path"""
-    file_id = str(uuid.uuid4())
-    file_extension = Path(upload_file.filename).suffix
-    file_path = UPLOAD_DIR / f"{file_id}{file_extension}"
-    
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    
-    return file_path
+def cache_lookup(namespace: str, contents: bytes, **params):
+    """Look up a cached engine result; returns (key, result or None)"""
+    if result_cache is None:
+        return None, None
+    key = make_cache_key(namespace, contents, **params)
+    return key, result_cache.get(key)
+
+def cache_store(key: Optional[str], result: dict):
+    """Cache a successful engine result"""
+    if result_cache is not None and key is not None and "error" not in result:
+        result_cache.set(key, result)
+
+# Batch translation jobs of all requests share one limit, so concurrent batches
+# stay within the translation pool and do not trip its busy limit
+translation_batch_limit = None
+
+def batch_translation_limit() -> asyncio.Semaphore:
+    """Shared batch translation limiter (created on first use, inside the event loop)"""
+    global translation_batch_limit
+    if translation_batch_limit is None:
+        translation_batch_limit = asyncio.Semaphore(max(1, config.TRANSLATION_WORKERS))
+    return translation_batch_limit
+
+async def run_ocr(contents: bytes, lang_list: List[str], image=None, tiled: bool = False) -> dict:
+    """Run OCR (or answer from cache) on an upload, optionally already decoded"""
+    # Language order does not change the result (the reader pool sorts them too)
+    cache_key, result = cache_lookup("ocr", contents, languages=sorted(lang_list), tiled=tiled)
+    if result is None:
+        result = await executors["ocr"].run(
+            ocr_engine.extract_text_from_image,
+            image if image is not None else contents,
+            lang_list,
+            tiled=tiled
+        )
+        cache_store(cache_key, result)
+    return result
+
+async def run_caption(contents: bytes, mode: str, detailed: bool, image=None) -> dict:
+    """Generate a caption (or answer from cache) for an upload, optionally already decoded"""
+    cache_key, result = cache_lookup("caption", contents, mode=mode, detailed=detailed)
+    if result is None:
+        source = image if image is not None else contents
+        if mode == "local" and caption_batcher is not None:
+            result = await caption_batcher.submit(source, detailed=detailed)
+        else:
+            result = await executors["caption"].run(
+                caption_engine.generate_caption_from_image,
+                source,
+                mode=mode,
+                detailed=detailed,
+                image_bytes=contents
+            )
+        cache_store(cache_key, result)
+    return result
+
+def ocr_payload(result: dict, lang_list: List[str]) -> dict:
+    """Response data for an OCR result"""
+    return {
+        "text": result["text"],
+        "languages_detected": result.get("languages", lang_list),
+        "confidence": result.get("confidence", 0.95),
+        "word_count": len(result["text"].split()) if result["text"] else 0,
+        "character_count": len(result["text"]) if result["text"] else 0
+    }
+
+def caption_payload(result: dict, mode: str, detailed: bool) -> dict:
+    """Response data for a caption result"""
+    return {
+        "caption": result["caption"],
+        "detailed_description": result.get("detailed_description", result["caption"]),
+        "mode": mode,
+        "confidence": result.get("confidence", 0.90),
+        "model": "Salesforce/blip-image-captioning-base",
+        "has_detailed": detailed,
+        "insights": result.get("insights", {})
+    }
+
+def ocr_response(result: dict, lang_list: List[str], processing_time: float) -> OCRResponse:
+    """Per-image entry of a batch OCR response"""
+    text = result.get("text", "")
+    return OCRResponse(
+        success="error" not in result,
+        text=text,
+        languages=result.get("languages", lang_list),
+        confidence=result.get("confidence"),
+        word_count=len(text.split()) if text else 0,
+        char_count=len(text),
+        processing_time=round(processing_time, 3)
+    )
 
-def cleanup_file(file_path: Path):
-    """Remove temporary file"""
+async def encode_events(events, sse: bool):
+    """Serialize stream events as NDJSON lines or Server-Sent Events"""
+    async for event in events:
+        payload = json.dumps(jsonable_encoder(event), ensure_ascii=False)
+        if sse:
+            yield f"event: {event['event']}\ndata: {payload}\n\n"
+        else:
+            yield payload + "\n"
+
+def stream_events(events, request: Request) -> StreamingResponse:
+    """Stream events as SSE when the client accepts it, NDJSON otherwise"""
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    return StreamingResponse(
+        encode_events(events, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def stream_caption(contents: bytes, mode: str, detailed: bool):
+    """Caption events: base caption first, then each aspect, then the full result"""
+    cache_key, result = cache_lookup("caption", contents, mode=mode, detailed=detailed)
+    if result is not None:
+        yield {"event": "caption", "caption": result["caption"], "cached": True}
+        yield {"event": "done", "data": caption_payload(result, mode, detailed)}
+        return
+    
     try:
-        if file_path.exists():
-            file_path.unlink()
+        events = executors["caption"].iterate(
+            caption_engine.iter_caption_from_image(contents, mode=mode, detailed=detailed, image_bytes=contents)
+        )
+        async for event in events:
+            if event["event"] == "result":
+                cache_store(cache_key, event["result"])
+                yield {"event": "done", "data": caption_payload(event["result"], mode, detailed)}
+            elif event["event"] == "error":
+                yield {"event": "error", "detail": event["result"]["error"]}
+            else:
+                yield event
     except Exception as e:
-        print(f"Error cleaning up file: {e}")
+        yield {"event": "error", "detail": str(e)}
+
+def check_output_format(output_format: Optional[str], allowed=OUTPUT_FORMATS):
+    """Reject unknown TTS output formats with a 400"""
+    if output_format is not None and output_format not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid output_format: {output_format}. Allowed: {', '.join(allowed)}"
+        )
+
+def audio_media_type(audio_file: Path) -> str:
+    """Media type for a generated audio file"""
+    return {
+        ".aiff": "audio/aiff",
+        ".mp3": "audio/mpeg",
+        ".ogg": "audio/ogg"
+    }.get(audio_file.suffix, "audio/wav")
+
+async def preload_engines():
+    """Load (and warm) the configured engines in their pools"""
+    jobs = []
+    if "caption" in config.PRELOAD_ENGINES:
+        load = caption_engine.warmup if config.WARMUP_ENABLED else caption_engine.load_model
+        jobs.append(executors["caption"].run(load))
+    if "ocr" in config.PRELOAD_ENGINES:
+        load = ocr_engine.warmup if config.WARMUP_ENABLED else ocr_engine.get_reader
+        for lang_list in config.PRELOAD_OCR_LANGUAGES:
+            jobs.append(executors["ocr"].run(load, lang_list))
+    
+    for result in await asyncio.gather(*jobs, return_exceptions=True):
+        if isinstance(result, Exception):
+            print(f"⚠️ Preload failed: {result}")
+
+def preload_status() -> str:
+    """'ready', 'starting' or 'failed' for the engines configured for preload"""
+    states = []
+    if "caption" in config.PRELOAD_ENGINES:
+        states.append(caption_engine.state.state)
+    if "ocr" in config.PRELOAD_ENGINES:
+        for lang_list in config.PRELOAD_OCR_LANGUAGES:
+            states.append(ocr_engine.reader_state(lang_list))
+    
+    if any(state == "failed" for state in states):
+        return "failed"
+    if all(state == "warm" for state in states):
+        return "ready"
+    return "starting"
+
+preload_task = None
+
+@app.on_event("startup")
+async def start_preload():
+    """Preload models in the background so health checks answer immediately"""
+    global preload_task
+    if config.PRELOAD_ENGINES:
+        print(f"🔥 Preloading engines: {', '.join(config.PRELOAD_ENGINES)}")
+        preload_task = asyncio.ensure_future(preload_engines())
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    """Release engine worker threads"""
+    executors.shutdown()
+    ocr_engine.tile_pool.shutdown(wait=False)
+    tts_engine.shutdown()
 
 # API Endpoints
 
@@ -100,77 +382,249 @@ async def root():
         "docs": "/api/docs",
         "endpoints": {
             "health": "/api/health",
+            "stats": "/api/stats",
             "ocr": "/api/ocr",
+            "ocr_batch": "/api/ocr/batch",
             "caption": "/api/caption",
             "translate": "/api/translate",
-            "tts": "/api/tts"
+            "translate_batch": "/api/translate/batch",
+            "tts": "/api/tts",
+            "tts_stream": "/api/tts/stream",
+            "analyze": "/api/analyze",
+            "metrics": "/api/metrics"
         }
     }
 
 @app.get("/api/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "version": "2.0.0",
-        "engines": {
-            "ocr": "ready",
-            "caption": "ready",
-            "translation": "ready",
-            "tts": "ready"
+    """
+    Health check endpoint
+    
+    Reports the real load state of each engine (unloaded, loading, warm,
+    failed, or not_applicable for engines with nothing to load) with load
+    times. Answers 503 until every engine configured in
+    PRELOAD_ENGINES is warm, so load balancers only route to warm instances.
+    """
+    status = preload_status()
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={
+            "status": {"ready": "healthy", "starting": "starting", "failed": "unhealthy"}[status],
+            "version": "2.0.0",
+            "ready": status == "ready",
+            "engines": {
+                "ocr": ocr_engine.get_status(),
+                "caption": caption_engine.get_status(),
+                "translation": translation_engine.get_status(),
+                "tts": tts_engine.get_status()
+            }
         }
+    )
+
+@app.get("/api/stats", tags=["Health"])
+async def get_stats():
+    """Runtime statistics for queues and batching"""
+    return {
+        "caption_batcher": caption_batcher.get_stats() if caption_batcher is not None else None,
+        "executors": executors.get_stats(),
+        "ocr_readers": ocr_engine.get_stats(),
+        "result_cache": result_cache.get_stats() if result_cache is not None else None,
+        "translation_cache": translation_engine.get_stats(),
+        "translation_backends": translation_engine.get_backend_stats(),
+        "tts_cache": tts_engine.audio_cache.get_stats() if tts_engine.audio_cache is not None else None,
+        "tts_workers": tts_engine.get_stats(),
+        "rate_limit": rate_limiter.get_stats() if rate_limiter is not None else None,
+        "usage": UsageStats(**metrics.usage_stats()).dict() if metrics.enabled else None,
+        "profiling": profile_store.get_stats() if profile_store is not None else None,
+        "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/metrics", tags=["Health"])
+async def get_metrics():
+    """
+    Prometheus metrics
+    
+    Request latency and status counts per endpoint, latency of each
+    processing stage per engine (upload read, decode, resize, model load,
+    generate, OCR detect/recognize, sort, translate, speech synthesis) and
+    images/characters processed, in the Prometheus text format.
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/ocr", tags=["OCR"])
 async def extract_text(
     file: UploadFile = File(...),
-    languages: str = Form("en")
+    languages: str = Form("en"),
+    tiled: bool = Form(False)
 ):
     """
     Extract text from image using OCR
     
     - **file**: Image file (JPG, PNG, etc.)
     - **languages**: Comma-separated language codes (e.g., 'en,hi,ar')
+    - **tiled**: Read large scans at full resolution in overlapping tiles
+      instead of downscaling them to 1280px (slower, keeps small text)
     """
-    file_path = None
     try:
         # Validate file type
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Save uploaded file
-        file_path = save_upload_file(file)
-        
         # Parse languages
         lang_list = [lang.strip() for lang in languages.split(',')]
         
-        # Extract text
-        result = ocr_engine.extract_text(str(file_path), lang_list)
+        # Read upload into memory - images are decoded from bytes, never saved to disk
+        with metrics.stage("api", "upload_read"):
+            contents = await file.read()
+        metrics.inc("images_processed_total")
+        
+        # Extract text (repeated uploads are answered from the cache)
+        result = await run_ocr(contents, lang_list, tiled=tiled)
         
         return JSONResponse(content={
             "success": True,
-            "data": {
-                "text": result["text"],
-                "languages_detected": result.get("languages", lang_list),
-                "confidence": result.get("confidence", 0.95),
-                "word_count": len(result["text"].split()) if result["text"] else 0,
-                "character_count": len(result["text"]) if result["text"] else 0
-            },
+            "data": ocr_payload(result, lang_list),
             "timestamp": datetime.now().isoformat()
         })
+    
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/ocr/batch", response_model=BatchOCRResponse, tags=["OCR"])
+async def extract_text_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    languages: str = Form("en"),
+    max_images: int = Form(10),
+    stream: bool = Form(False)
+):
+    """
+    Extract text from many images in one request
+    
+    Images share one OCR reader and same-sized images are detected and
+    recognised as a single batch. Results are returned in upload order;
+    images that fail are reported individually and counted in total_failed.
+    
+    - **files**: Image files (JPG, PNG, etc.)
+    - **languages**: Comma-separated language codes (e.g., 'en,hi,ar')
+    - **max_images**: Maximum number of images accepted (1-50, default: 10)
+    - **stream**: Stream each image's result as it completes (NDJSON, or SSE
+      when the client sends `Accept: text/event-stream`)
+    """
+    started = time.perf_counter()
+    try:
+        lang_list = [lang.strip() for lang in languages.split(',')]
+        try:
+            batch_request = BatchOCRRequest(languages=lang_list, max_images=max_images)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if len(files) > batch_request.max_images:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many images: got {len(files)}, max_images is {batch_request.max_images}"
+            )
         
+        results = [None] * len(files)
+        cache_keys = [None] * len(files)
+        pending = []  # (index, contents) still needing OCR
+        
+        for i, upload in enumerate(files):
+            if not (upload.content_type or "").startswith('image/'):
+                results[i] = {"text": "", "languages": lang_list, "confidence": 0, "error": "File must be an image"}
+                continue
+            
+            with metrics.stage("api", "upload_read"):
+                contents = await upload.read()
+            metrics.inc("images_processed_total")
+            cache_keys[i], results[i] = cache_lookup("ocr", contents, languages=sorted(lang_list), tiled=False)
+            if results[i] is None:
+                pending.append((i, contents))
+        
+        if stream:
+            return stream_events(stream_ocr_batch(results, cache_keys, pending, lang_list, started), request)
+        
+        engine_time = 0.0
+        if pending:
+            engine_started = time.perf_counter()
+            batch_results = await executors["ocr"].run(
+                ocr_engine.extract_text_batch,
+                [contents for _, contents in pending],
+                lang_list
+            )
+            engine_time = time.perf_counter() - engine_started
+            
+            for (i, _), result in zip(pending, batch_results):
+                results[i] = result
+                cache_store(cache_keys[i], result)
+        
+        pending_indexes = {i for i, _ in pending}
+        responses = [
+            ocr_response(result, lang_list, engine_time if i in pending_indexes else 0.0)
+            for i, result in enumerate(results)
+        ]
+        
+        total_failed = sum(1 for response in responses if not response.success)
+        return BatchOCRResponse(
+            success=total_failed < len(responses),
+            results=responses,
+            total_processed=len(responses) - total_failed,
+            total_failed=total_failed,
+            processing_time=round(time.perf_counter() - started, 3)
+        )
+    
+    except HTTPException:
+        raise
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+async def stream_ocr_batch(results, cache_keys, pending, lang_list, started):
+    """Batch OCR events: each image's result as soon as it is ready, then totals"""
+    total_failed = 0
     
-    finally:
-        if file_path:
-            cleanup_file(file_path)
+    # Cached and rejected images are ready immediately
+    for i, result in enumerate(results):
+        if result is not None:
+            response = ocr_response(result, lang_list, 0.0)
+            total_failed += 0 if response.success else 1
+            yield {"event": "result", "index": i, "result": response}
+    
+    if pending:
+        engine_started = time.perf_counter()
+        try:
+            events = executors["ocr"].iterate(
+                ocr_engine.iter_text_batch([contents for _, contents in pending], lang_list)
+            )
+            async for position, result in events:
+                i = pending[position][0]
+                cache_store(cache_keys[i], result)
+                response = ocr_response(result, lang_list, time.perf_counter() - engine_started)
+                total_failed += 0 if response.success else 1
+                yield {"event": "result", "index": i, "result": response}
+        except Exception as e:
+            yield {"event": "error", "detail": str(e)}
+            return
+    
+    yield {
+        "event": "done",
+        "total_processed": len(results) - total_failed,
+        "total_failed": total_failed,
+        "processing_time": round(time.perf_counter() - started, 3)
+    }
 
 @app.post("/api/caption", tags=["AI Captioning"])
 async def generate_caption(
+    request: Request,
     file: UploadFile = File(...),
     mode: str = Form("cloud"),
-    detailed: bool = Form(True)
+    detailed: bool = Form(True),
+    stream: bool = Form(False)
 ):
     """
     Generate AI caption for image using BLIP model with detailed description
@@ -178,39 +632,35 @@ async def generate_caption(
     - **file**: Image file (JPG, PNG, etc.)
     - **mode**: 'local' or 'cloud' (default: cloud for faster processing)
     - **detailed**: Generate detailed description (default: True)
+    - **stream**: Stream the base caption, then each aspect, then the full
+      result (NDJSON, or SSE when the client sends `Accept: text/event-stream`)
     """
-    file_path = None
     try:
         # Validate file type
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Save uploaded file
-        file_path = save_upload_file(file)
+        # Read upload into memory - images are decoded from bytes, never saved to disk
+        with metrics.stage("api", "upload_read"):
+            contents = await file.read()
+        metrics.inc("images_processed_total")
         
-        # Generate caption with detailed description
-        result = caption_engine.generate_caption(str(file_path), mode=mode, detailed=detailed)
+        if stream:
+            return stream_events(stream_caption(contents, mode, detailed), request)
+        
+        # Generate caption with detailed description (repeated uploads are answered from the cache)
+        result = await run_caption(contents, mode, detailed)
         
         return JSONResponse(content={
             "success": True,
-            "data": {
-                "caption": result["caption"],
-                "detailed_description": result.get("detailed_description", result["caption"]),
-                "mode": mode,
-                "confidence": result.get("confidence", 0.90),
-                "model": "Salesforce/blip-image-captioning-base",
-                "has_detailed": detailed,
-                "insights": result.get("insights", {})
-            },
+            "data": caption_payload(result, mode, detailed),
             "timestamp": datetime.now().isoformat()
         })
-        
+    
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
-    finally:
-        if file_path:
-            cleanup_file(file_path)
 
 @app.post("/api/translate", tags=["Translation"])
 async def translate_text(request: TranslationRequest):
@@ -221,7 +671,9 @@ async def translate_text(request: TranslationRequest):
     - **target_language**: Target language code (en, hi, ar, es, fr, etc.)
     """
     try:
-        result = translation_engine.translate(
+        metrics.inc("characters_processed_total", len(request.text))
+        result = await executors["translation"].run(
+            translation_engine.translate,
             request.text,
             request.target_language
         )
@@ -237,7 +689,88 @@ async def translate_text(request: TranslationRequest):
             },
             "timestamp": datetime.now().isoformat()
         })
+    
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/translate/batch", response_model=BatchTranslationResponse, tags=["Translation"])
+async def translate_batch(request: BatchTranslationRequest):
+    """
+    Translate many texts into one or more languages in one request
+    
+    Identical texts are translated once. Long texts are split on sentence
+    boundaries into provider-sized chunks; all chunks for all target
+    languages are translated concurrently and reassembled in order. A text
+    that fails for a language is returned untranslated, with the reason in
+    its `errors`, instead of failing the whole batch.
+    
+    - **texts**: Texts to translate (up to 100)
+    - **target_languages**: Target language codes (up to 10)
+    - **source_language**: Source language code (default: auto-detect)
+    """
+    started = time.perf_counter()
+    try:
+        metrics.inc("characters_processed_total", sum(len(text) for text in request.texts))
+        unique_texts = list(dict.fromkeys(request.texts))
+        chunks = {text: split_text(text, config.TRANSLATION_CHUNK_CHARS) for text in unique_texts}
         
+        # One job per distinct (chunk, language) - repeated sentences are sent once
+        jobs = list(dict.fromkeys(
+            (chunk, lang)
+            for text in unique_texts
+            for chunk, _ in chunks[text]
+            for lang in request.target_languages
+        ))
+        
+        limit = batch_translation_limit()
+        
+        async def translate_job(chunk, lang):
+            # A failed job only fails the texts it belongs to, not the batch
+            try:
+                async with limit:
+                    return await executors["translation"].run(
+                        translation_engine.translate, chunk, lang, request.source_language
+                    )
+            except Exception as e:
+                return {"translated_text": chunk, "error": str(e)}
+        
+        job_results = dict(zip(jobs, await asyncio.gather(*(translate_job(chunk, lang) for chunk, lang in jobs))))
+        
+        translated = {}
+        for text in unique_texts:
+            for lang in request.target_languages:
+                parts = [job_results[(chunk, lang)] for chunk, _ in chunks[text]]
+                errors = [part["error"] for part in parts if "error" in part]
+                translated[(text, lang)] = (
+                    join_chunks([part["translated_text"] for part in parts], chunks[text]),
+                    errors[0] if errors else None
+                )
+        
+        results = []
+        for i, text in enumerate(request.texts):
+            translations, errors = {}, {}
+            for lang in request.target_languages:
+                translated_text, error = translated[(text, lang)]
+                translations[lang] = translated_text
+                if error:
+                    errors[lang] = error
+            results.append(BatchTranslationItem(index=i, original_text=text, translations=translations, errors=errors))
+        
+        total_failed = sum(1 for item in results if item.errors)
+        return BatchTranslationResponse(
+            success=total_failed < len(results),
+            results=results,
+            total_texts=len(request.texts),
+            unique_texts=len(unique_texts),
+            total_chunks=sum(len(chunks[text]) for text in unique_texts),
+            total_failed=total_failed,
+            processing_time=round(time.perf_counter() - started, 3)
+        )
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -249,32 +782,300 @@ async def text_to_speech(request: TTSRequest):
     - **text**: Text to convert to speech
     - **language**: Language code (en, hi, ar, etc.)
     - **rate**: Speech rate (50-400, default: 200)
+    - **output_format**: 'wav', 'mp3' or 'ogg' (default: the engine's own format)
     """
     try:
-        result = tts_engine.generate_speech(
+        check_output_format(request.output_format)
+        metrics.inc("characters_processed_total", len(request.text))
+        result = await executors["tts"].run(
+            tts_engine.generate_speech,
             request.text,
             request.language,
-            request.rate
+            request.rate,
+            request.output_format
         )
         
         if result["success"]:
             audio_file = Path(result["audio_file"])
             
-            # Determine media type based on file extension
-            media_type = "audio/aiff" if audio_file.suffix == ".aiff" else "audio/wav"
-            
             return FileResponse(
                 path=str(audio_file),
-                media_type=media_type,
+                media_type=audio_media_type(audio_file),
                 filename=f"speech_{datetime.now().strftime('%Y%m%d_%H%M%S')}{audio_file.suffix}",
                 headers={
                     "X-Character-Count": str(len(request.text)),
-                    "X-Language": request.language
-                }
+                    "X-Language": request.language,
+                    "X-Cache": "HIT" if result.get("cached") else "MISS"
+                },
+                background=BackgroundTask(tts_engine.release_audio, audio_file)
             )
         else:
             raise HTTPException(status_code=500, detail=result.get("error", "TTS generation failed"))
+    
+    except HTTPException:
+        raise
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/tts/stream", tags=["Text-to-Speech"])
+async def text_to_speech_stream(request: TTSRequest):
+    """
+    Convert text to speech and stream the audio sentence by sentence
+    
+    The text is split on sentence boundaries; sentences are synthesized
+    concurrently (a few ahead of playback) and sent in order as one chunked
+    audio stream, so playback can start after the first sentence. gTTS
+    streams MP3; local voices stream WAV.
+    
+    - **text**: Text to convert to speech
+    - **language**: Language code (en, hi, ar, etc.)
+    - **rate**: Speech rate (50-400, default: 200)
+    - **output_format**: 'wav' or 'mp3' (default: the engine's own format)
+    """
+    try:
+        check_output_format(request.output_format, allowed=("wav", "mp3"))
+        metrics.inc("characters_processed_total", len(request.text))
+        segments = [segment for segment, _ in split_text(request.text, config.TTS_STREAM_SEGMENT_CHARS)]
+        if not segments:
+            raise HTTPException(status_code=400, detail="Text cannot be empty")
+        
+        results = synthesize_in_order(segments, request.language, request.rate, request.output_format)
+        first = await results.__anext__()
+        if not first["success"]:
+            await results.aclose()
+            raise HTTPException(status_code=500, detail=first.get("error", "TTS generation failed"))
+        
+        first_file = Path(first["audio_file"])
+        
+        async def audio_stream():
+            try:
+                try:
+                    yield await executors["tts"].run(tts_engine.stream_segment, first_file, True)
+                finally:
+                    tts_engine.release_audio(first_file)
+                async for result in results:
+                    if not result["success"]:
+                        print(f"⚠️ TTS stream stopped: {result.get('error')}")
+                        break
+                    try:
+                        yield await executors["tts"].run(tts_engine.stream_segment, result["audio_file"], False)
+                    finally:
+                        tts_engine.release_audio(result["audio_file"])
+            finally:
+                await results.aclose()
         
+        return StreamingResponse(
+            audio_stream(),
+            media_type="audio/mpeg" if first_file.suffix == ".mp3" else "audio/wav",
+            headers={
+                "X-Character-Count": str(len(request.text)),
+                "X-Language": request.language,
+                "X-Segment-Count": str(len(segments))
+            }
+        )
+    
+    except HTTPException:
+        raise
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+ANALYZE_STAGES = ("ocr", "caption", "translate", "tts")
+
+async def synthesize_in_order(segments: List[str], language: str, rate: int, output_format: Optional[str] = None):
+    """
+    Yield TTS results for segments in order, synthesizing a few ahead
+    
+    The caller releases the audio file of every result it receives; files
+    of segments synthesized but never handed over are released here.
+    """
+    pending = deque()
+    next_index = 0
+    lock = threading.Lock()
+    unclaimed = {}  # segment index -> audio file not yet handed to the caller
+    stopped = False
+    
+    def synthesize(index):
+        result = tts_engine.generate_speech(segments[index], language, rate, output_format)
+        with lock:
+            if not stopped:
+                unclaimed[index] = result.get("audio_file")
+                return result
+        tts_engine.release_audio(result.get("audio_file"))  # the stream already ended
+        return result
+    
+    try:
+        while next_index < len(segments) or pending:
+            while next_index < len(segments) and len(pending) < max(1, config.TTS_STREAM_CONCURRENCY):
+                pending.append((next_index, asyncio.ensure_future(executors["tts"].run(synthesize, next_index))))
+                next_index += 1
+            index, task = pending.popleft()
+            result = await task
+            with lock:
+                unclaimed.pop(index, None)
+            yield result
+    finally:
+        # Client went away or a segment failed. Cancelling drops segments still
+        # queued in the TTS pool (their slots are released); segments already
+        # being synthesized finish in their worker and release their own file
+        for _, task in pending:
+            task.cancel()
+        with lock:
+            stopped = True
+            leftover = list(unclaimed.values())
+        for audio_file in leftover:
+            tts_engine.release_audio(audio_file)
+
+def read_audio_file(audio_file: Path) -> str:
+    """Read a generated audio file as base64"""
+    return base64.b64encode(audio_file.read_bytes()).decode("ascii")
+
+@app.post("/api/analyze", tags=["Pipeline"])
+async def analyze_image(
+    file: UploadFile = File(...),
+    stages: str = Form("ocr,caption"),
+    languages: str = Form("en"),
+    tiled: bool = Form(False),
+    mode: str = Form("cloud"),
+    detailed: bool = Form(True),
+    target_language: Optional[str] = Form(None),
+    text_source: str = Form("auto"),
+    tts_language: Optional[str] = Form(None),
+    rate: int = Form(200),
+    output_format: Optional[str] = Form(None)
+):
+    """
+    Run several stages on one upload in a single request
+    
+    The image is decoded once and shared: OCR and captioning run concurrently,
+    then the resulting text is optionally translated and converted to speech.
+    
+    - **file**: Image file (JPG, PNG, etc.)
+    - **stages**: Comma-separated stages to run: ocr, caption, translate, tts
+    - **languages**: Comma-separated OCR language codes
+    - **tiled**: Run OCR at full resolution in overlapping tiles
+    - **mode**: Caption mode, 'local' or 'cloud'
+    - **detailed**: Generate detailed caption description
+    - **target_language**: Translation target (required for the translate stage)
+    - **text_source**: Text to translate/speak: 'ocr', 'caption' or 'auto' (OCR text if any, else caption)
+    - **tts_language**: Speech language (default: target_language, then 'en')
+    - **rate**: Speech rate (50-400, default: 200)
+    - **output_format**: Speech format: 'wav', 'mp3' or 'ogg' (default: the engine's own format)
+    """
+    try:
+        stage_list = [stage.strip().lower() for stage in stages.split(',') if stage.strip()]
+        unknown = [stage for stage in stage_list if stage not in ANALYZE_STAGES]
+        if not stage_list or unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid stages: {', '.join(unknown) or 'none'}. Allowed: {', '.join(ANALYZE_STAGES)}"
+            )
+        if "translate" in stage_list and not target_language:
+            raise HTTPException(status_code=400, detail="target_language is required for the translate stage")
+        if ("translate" in stage_list or "tts" in stage_list) and not ("ocr" in stage_list or "caption" in stage_list):
+            raise HTTPException(status_code=400, detail="translate and tts need an ocr or caption stage for their text")
+        if text_source not in ("auto", "ocr", "caption"):
+            raise HTTPException(status_code=400, detail="text_source must be 'auto', 'ocr' or 'caption'")
+        check_output_format(output_format)
+        
+        # Validate file type
+        if not file.content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail="File must be an image")
+        
+        lang_list = [lang.strip() for lang in languages.split(',')]
+        with metrics.stage("api", "upload_read"):
+            contents = await file.read()
+        metrics.inc("images_processed_total")
+        timings = {}
+        
+        # Decode once - OCR and captioning share the decoded image
+        started = time.perf_counter()
+        image = await executors["ocr" if "ocr" in stage_list else "caption"].run(load_image, contents)
+        timings["decode"] = time.perf_counter() - started
+        
+        async def timed(stage, coroutine):
+            stage_started = time.perf_counter()
+            result = await coroutine
+            timings[stage] = time.perf_counter() - stage_started
+            return result
+        
+        # OCR and captioning run concurrently
+        tasks = {}
+        if "ocr" in stage_list:
+            tasks["ocr"] = timed("ocr", run_ocr(contents, lang_list, image, tiled=tiled))
+        if "caption" in stage_list:
+            tasks["caption"] = timed("caption", run_caption(contents, mode, detailed, image))
+        results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+        
+        data = {"stages": stage_list}
+        if "ocr" in results:
+            data["ocr"] = ocr_payload(results["ocr"], lang_list)
+        if "caption" in results:
+            data["caption"] = caption_payload(results["caption"], mode, detailed)
+        
+        # Text handed to the translate/tts stages
+        ocr_text = results["ocr"]["text"] if "ocr" in results else ""
+        caption_text = results["caption"].get("detailed_description", results["caption"]["caption"]) if "caption" in results else ""
+        if text_source == "ocr":
+            text = ocr_text
+        elif text_source == "caption":
+            text = caption_text
+        else:
+            text = ocr_text or caption_text
+        
+        if "translate" in stage_list:
+            started = time.perf_counter()
+            if text:
+                result = await executors["translation"].run(translation_engine.translate, text, target_language)
+            else:
+                result = {"translated_text": ""}
+            timings["translate"] = time.perf_counter() - started
+            
+            data["translation"] = {
+                "original_text": text,
+                "translated_text": result["translated_text"],
+                "source_language": result.get("source_language", "auto"),
+                "target_language": target_language,
+                "word_count": len(result["translated_text"].split())
+            }
+            text = result["translated_text"]
+        
+        if "tts" in stage_list and text:
+            started = time.perf_counter()
+            speech_language = tts_language or target_language or "en"
+            result = await executors["tts"].run(tts_engine.generate_speech, text, speech_language, rate, output_format)
+            if not result["success"]:
+                raise Exception(result.get("error", "TTS generation failed"))
+            
+            audio_file = Path(result["audio_file"])
+            try:
+                audio = await executors["tts"].run(read_audio_file, audio_file)
+            finally:
+                tts_engine.release_audio(audio_file)
+            timings["tts"] = time.perf_counter() - started
+            
+            data["tts"] = {
+                "audio_base64": audio,
+                "media_type": audio_media_type(audio_file),
+                "format": audio_file.suffix.lstrip('.'),
+                "language": speech_language,
+                "character_count": len(text)
+            }
+        
+        return JSONResponse(content={
+            "success": True,
+            "data": data,
+            "timings_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()},
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except HTTPException:
+        raise
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -301,6 +1102,94 @@ async def get_available_voices():
         "voices": tts_engine.get_available_voices()
     }
 
+@app.post("/api/voices/refresh", tags=["Text-to-Speech"])
+async def refresh_voices():
+    """Re-enumerate installed TTS voices (after adding or removing system voices)"""
+    try:
+        count = await executors["tts"].run(tts_engine.refresh_voices)
+        return {
+            "success": True,
+            "voice_count": count
+        }
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ============ Admin: Request Profiles ============
+
+def require_admin(request: Request):
+    """Reject admin requests without the configured ADMIN_TOKEN"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    supplied = request.headers.get("x-admin-token", "")
+    authorization = request.headers.get("authorization", "")
+    if not supplied and authorization.lower().startswith("bearer "):
+        supplied = authorization[7:].strip()
+    if not hmac.compare_digest(supplied, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def require_profiling():
+    """Profile store, or 404 when profiling is disabled"""
+    if profile_store is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (PROFILING_ENABLED=false)")
+    return profile_store
+
+@app.get("/api/admin/profiles", tags=["Admin"])
+async def list_profiles(request: Request):
+    """
+    List stored request profiles, newest first
+    
+    Send `X-Profile: 1` (or the admin token, when one is set) with any request
+    to profile it; its id comes back in the `X-Profile-Id` response header.
+    """
+    require_admin(request)
+    store = require_profiling()
+    return {
+        **store.get_stats(),
+        "sample_rate": config.PROFILE_SAMPLE_RATE,
+        "profiles": store.summaries()
+    }
+
+@app.get("/api/admin/profiles/{profile_id}", tags=["Admin"])
+async def download_profile(
+    request: Request,
+    profile_id: str,
+    format: str = "pstats",
+    sort: str = "cumulative",
+    limit: int = 60
+):
+    """
+    Download one request profile
+    
+    - **format**: 'pstats' (binary, for pstats / snakeviz) or 'text' (report)
+    - **sort**: Sort key for the text report (cumulative, tottime, ncalls)
+    - **limit**: Functions listed in the text report
+    """
+    require_admin(request)
+    profile = require_profiling().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found (it may have been evicted)")
+    
+    if format == "pstats":
+        return Response(
+            content=profile.to_pstats(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+        )
+    if format == "text":
+        if sort not in ("cumulative", "tottime", "ncalls", "calls", "time"):
+            raise HTTPException(status_code=400, detail="sort must be cumulative, tottime, ncalls, calls or time")
+        return PlainTextResponse(profile.report(sort=sort, limit=max(1, limit)))
+    raise HTTPException(status_code=400, detail="format must be 'pstats' or 'text'")
+
+@app.delete("/api/admin/profiles", tags=["Admin"])
+async def clear_profiles(request: Request):
+    """Drop every stored profile"""
+    require_admin(request)
+    require_profiling().clear()
+    return {"success": True}
+
 # Run server
 if __name__ == "__main__":
     uvicorn.run(
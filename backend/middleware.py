@@ -5,14 +5,25 @@ Advanced middleware for production-ready API
 
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, Optional, Tuple
+import hmac
+import random
 import time
+import threading
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import OrderedDict
 import logging
 from pathlib import Path
 
+from engines.metrics import MetricsRegistry, metrics
+from engines.profiling import ProfileStore, RequestProfile, current_profile
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -56,72 +67,229 @@ class FileValidator:
 
 # ============ Rate Limiting ============
 
+class MemoryStore:
+    """
+    In-process rate limit counters (one uvicorn worker)
+    
+    Per client: the counts of the current and previous fixed window. Keys
+    are kept in least-recently-seen order, so clients idle for two windows
+    (whose counts no longer matter) are dropped from the front as new
+    requests arrive, and at most max_keys clients are tracked.
+    """
+    
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [window index, current count, previous count, last seen]
+        self.counters: "OrderedDict[str, list]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.evicted = 0
+    
+    def hit(self, key: str, limit: int, window: float, now: float, consume: bool = True) -> Tuple[bool, int, int, float]:
+        """
+        Count a request against key if it fits under limit
+        
+        Returns:
+            (allowed, current window count, previous window count, seconds into the window)
+        """
+        index = int(now // window)
+        elapsed = now - index * window
+        
+        with self.lock:
+            self._evict(now - 2 * window)
+            
+            entry = self.counters.get(key)
+            if entry is None:
+                if not consume:
+                    return False, 0, 0, elapsed
+                entry = self.counters[key] = [index, 0, 0, now]
+                if self.max_keys and len(self.counters) > self.max_keys:
+                    self.counters.popitem(last=False)
+                    self.evicted += 1
+            elif entry[0] != index:
+                # Roll the window; a gap of more than one window clears both counts
+                entry[2] = entry[1] if entry[0] == index - 1 else 0
+                entry[1] = 0
+                entry[0] = index
+            
+            current, previous = entry[1], entry[2]
+            allowed = consume and _estimate(current, previous, elapsed, window) + 1 <= limit
+            if allowed:
+                current = entry[1] = current + 1
+            if consume:
+                entry[3] = now
+                self.counters.move_to_end(key)
+            return allowed, current, previous, elapsed
+    
+    def _evict(self, idle_before: float):
+        """Drop clients not seen since idle_before (lock held)"""
+        while self.counters:
+            key, entry = next(iter(self.counters.items()))
+            if entry[3] >= idle_before:
+                break
+            del self.counters[key]
+            self.evicted += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "store": "memory",
+            "clients": len(self.counters),
+            "max_clients": self.max_keys,
+            "evicted": self.evicted
+        }
+
+
+class RedisStore:
+    """
+    Rate limit counters in Redis, shared by every uvicorn worker
+    
+    Each fixed window is an INCR counter that expires after two windows;
+    the check-and-increment runs as one Lua script so concurrent workers
+    cannot both take the last slot.
+    """
+    
+    SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local allowed = 0
+if ARGV[4] == '1' and previous * (1 - elapsed / window) + current + 1 <= limit then
+    current = redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], math.ceil(window * 2))
+    allowed = 1
+end
+return {allowed, current, previous}
+"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:", timeout: float = 0.05):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("RedisStore needs the redis package: pip install redis")
+        self.client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.prefix = prefix
+        self.errors = 0
+    
+    def hit(self, key: str, limit: int, window: float, now: float, consume: bool = True) -> Tuple[bool, int, int, float]:
+        """Same contract as MemoryStore.hit; fails open if Redis is unreachable"""
+        index = int(now // window)
+        elapsed = now - index * window
+        try:
+            allowed, current, previous = self.script(
+                keys=[f"{self.prefix}{key}:{index}", f"{self.prefix}{key}:{index - 1}"],
+                args=[limit, window, elapsed, 1 if consume else 0]
+            )
+        except redis.RedisError as e:
+            self.errors += 1
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+            return consume, 0, 0, elapsed
+        return bool(allowed), int(current), int(previous), elapsed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "store": "redis",
+            "errors": self.errors
+        }
+
+
+def _estimate(current: int, previous: int, elapsed: float, window: float) -> float:
+    """Sliding-window request count: previous window weighted by its overlap"""
+    return previous * (1 - elapsed / window) + current
+
+
 class RateLimiter:
-    """Token bucket rate limiter"""
+    """
+    Sliding-window-counter rate limiter
+    
+    Approximates a rolling window from two fixed-window counters per
+    client, so each check is O(1) in time and memory.
+    """
     
-    def __init__(self, requests_per_minute: int = 30):
+    def __init__(self, requests_per_minute: int = 30, store=None, window: float = 60, clock: Callable[[], float] = time.time):
         self.requests_per_minute = requests_per_minute
-        self.requests: Dict[str, list] = defaultdict(list)
-        self.window = 60  # 1 minute window
+        self.store = store if store is not None else MemoryStore()
+        self.window = window  # 1 minute window
+        self.clock = clock
+    
+    def check(self, client_id: str, consume: bool = True) -> Dict[str, Any]:
+        """
+        Count a request and report the client's limit state
+        
+        Returns:
+            dict with allowed, remaining and reset_after (seconds until a
+            request would be allowed again)
+        """
+        limit = self.requests_per_minute
+        allowed, current, previous, elapsed = self.store.hit(
+            client_id, limit, self.window, self.clock(), consume
+        )
+        estimate = _estimate(current, previous, elapsed, self.window)
+        return {
+            "allowed": allowed,
+            "remaining": max(0, int(limit - estimate)),
+            "reset_after": self._reset_after(current, previous, elapsed, limit) if estimate + 1 > limit else 0
+        }
+    
+    def _reset_after(self, current: int, previous: int, elapsed: float, limit: int) -> float:
+        """Seconds until the estimate leaves room for one more request"""
+        room = limit - 1
+        if current <= room:
+            if not previous:
+                return 0
+            # The previous window's weight fades out during this window
+            return max(0.0, self.window * (1 - (room - current) / previous) - elapsed)
+        # This window is full: wait for it to become the previous window and fade
+        return (self.window - elapsed) + self.window * (1 - room / current)
     
     def is_allowed(self, client_id: str) -> bool:
         """Check if request is allowed"""
-        now = time.time()
-        
-        # Remove old requests outside the time window
-        self.requests[client_id] = [
-            req_time for req_time in self.requests[client_id]
-            if now - req_time < self.window
-        ]
-        
-        # Check if limit exceeded
-        if len(self.requests[client_id]) >= self.requests_per_minute:
-            return False
-        
-        # Add current request
-        self.requests[client_id].append(now)
-        return True
+        return self.check(client_id)["allowed"]
     
     def get_remaining(self, client_id: str) -> int:
         """Get remaining requests"""
-        now = time.time()
-        recent = [
-            req_time for req_time in self.requests[client_id]
-            if now - req_time < self.window
-        ]
-        return max(0, self.requests_per_minute - len(recent))
+        return self.check(client_id, consume=False)["remaining"]
     
     def get_reset_time(self, client_id: str) -> float:
         """Get time until rate limit resets"""
-        if not self.requests[client_id]:
-            return 0
-        oldest = min(self.requests[client_id])
-        return max(0, self.window - (time.time() - oldest))
+        return self.check(client_id, consume=False)["reset_after"]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.store.get_stats(), requests_per_minute=self.requests_per_minute)
 
 
 # ============ Rate Limiting Middleware ============
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware for rate limiting"""
+class RateLimitMiddleware:
+    """
+    Middleware for rate limiting (pure ASGI)
+    
+    Works on the raw ASGI messages, so responses - including streamed audio
+    and files - pass through unbuffered and no extra task is spawned per
+    request.
+    """
+    
+    EXEMPT_PATHS = {'/api/health', '/api/docs', '/api/redoc', '/openapi.json'}
     
-    def __init__(self, app, requests_per_minute: int = 30):
-        super().__init__(app)
-        self.rate_limiter = RateLimiter(requests_per_minute)
+    def __init__(self, app, requests_per_minute: int = 30, store=None, rate_limiter: RateLimiter = None):
+        self.app = app
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(requests_per_minute, store=store)
     
-    async def dispatch(self, request: Request, call_next: Callable):
+    async def __call__(self, scope, receive, send):
         # Skip rate limiting for health checks and docs
-        if request.url.path in ['/api/health', '/api/docs', '/api/redoc', '/openapi.json']:
-            return await call_next(request)
+        if scope["type"] != "http" or scope["path"] in self.EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
         
         # Get client identifier (IP address)
-        client_id = request.client.host
+        client_id = _client_host(scope)
         
         # Check rate limit
-        if not self.rate_limiter.is_allowed(client_id):
-            reset_time = self.rate_limiter.get_reset_time(client_id)
+        state = self.rate_limiter.check(client_id)
+        if not state["allowed"]:
+            reset_time = state["reset_after"]
             logger.warning(f"Rate limit exceeded for {client_id}")
             
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
                     'success': False,
@@ -135,54 +303,180 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     'X-RateLimit-Reset': str(int(time.time() + reset_time))
                 }
             )
+            await response(scope, receive, send)
+            return
         
         # Add rate limit headers
-        response = await call_next(request)
-        remaining = self.rate_limiter.get_remaining(client_id)
-        response.headers['X-RateLimit-Limit'] = str(self.rate_limiter.requests_per_minute)
-        response.headers['X-RateLimit-Remaining'] = str(remaining)
+        rate_headers = [
+            (b"x-ratelimit-limit", str(self.rate_limiter.requests_per_minute).encode("latin-1")),
+            (b"x-ratelimit-remaining", str(state["remaining"]).encode("latin-1"))
+        ]
+        
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + rate_headers
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
+
+
+def _client_host(scope) -> str:
+    """Client IP address of an ASGI connection"""
+    client = scope.get("client")
+    return client[0] if client else "unknown"
 
 
 # ============ Request Logging Middleware ============
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for request logging"""
+class RequestLoggingMiddleware:
+    """
+    Middleware for request logging (pure ASGI)
+    
+    X-Process-Time is the time until the response headers are sent; the
+    completion log line covers the whole response, including streaming.
+    """
     
-    async def dispatch(self, request: Request, call_next: Callable):
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         start_time = time.time()
+        method, path = scope["method"], scope["path"]
+        status_code = None
         
         # Log request
-        logger.info(f"🔵 {request.method} {request.url.path} - {request.client.host}")
+        logger.info(f"🔵 {method} {path} - {_client_host(scope)}")
+        
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Add processing time header
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-process-time", f"{time.time() - start_time:.3f}".encode("latin-1"))
+                ]
+            await send(message)
         
         # Process request
         try:
-            response = await call_next(request)
-            processing_time = time.time() - start_time
-            
-            # Log response
-            logger.info(
-                f"✅ {request.method} {request.url.path} - "
-                f"Status: {response.status_code} - "
-                f"Time: {processing_time:.3f}s"
-            )
-            
-            # Add processing time header
-            response.headers['X-Process-Time'] = f"{processing_time:.3f}"
-            
-            return response
-            
+            await self.app(scope, receive, send_with_timing)
         except Exception as e:
             processing_time = time.time() - start_time
             logger.error(
-                f"❌ {request.method} {request.url.path} - "
+                f"❌ {method} {path} - "
                 f"Error: {str(e)} - "
                 f"Time: {processing_time:.3f}s"
             )
             raise
+        
+        processing_time = time.time() - start_time
+        
+        # Log response
+        logger.info(
+            f"✅ {method} {path} - "
+            f"Status: {status_code} - "
+            f"Time: {processing_time:.3f}s"
+        )
 
 
+class MetricsMiddleware:
+    """
+    Records latency and status of every request in the metrics registry (pure ASGI)
+    
+    Requests are labelled with the route template (/api/ocr,
+    /api/admin/profiles/{profile_id}) rather than the raw path, so path
+    parameters cannot grow the label set.
+    """
+    
+    def __init__(self, app, registry: MetricsRegistry = None):
+        self.app = app
+        self.registry = registry or metrics
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            self.registry.record_request(endpoint, scope["method"], status_code, time.perf_counter() - started)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles selected requests with cProfile (pure ASGI)
+    
+    A request is profiled when it sends an X-Profile header (whose value must
+    be the admin token when one is configured) or is picked at random by
+    sample_rate. Engine work done for it is profiled in the worker threads and
+    the profile id is returned in the X-Profile-Id header.
+    """
+    
+    EXEMPT_PREFIXES = ("/api/admin/",)
+    
+    def __init__(self, app, store: ProfileStore, sample_rate: float = 0.0, token: str = ""):
+        self.app = app
+        self.store = store
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.token = token
+    
+    async def __call__(self, scope, receive, send):
+        reason = self._reason(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+        
+        profile = RequestProfile(scope["method"], scope["path"], reason)
+        status_code = 500
+        
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode("latin-1"))
+                ]
+            await send(message)
+        
+        context_token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            current_profile.reset(context_token)
+            profile.finish(status_code)
+            self.store.add(profile)
+            logger.info(f"🔬 Profiled {profile.method} {profile.path} ({profile.reason}) - id {profile.id}")
+    
+    def _reason(self, scope) -> Optional[str]:
+        """Why this request should be profiled, or None"""
+        if scope["path"].startswith(self.EXEMPT_PREFIXES):
+            return None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                if not self.token or hmac.compare_digest(value.decode("latin-1"), self.token):
+                    return "header"
+                break
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
 # ============ Error Handler ============
 
 class APIError(Exception):
@@ -195,6 +195,52 @@ class BatchOCRRequest(BaseModel):
     )
 
 
+class BatchTranslationRequest(BaseModel):
+    """Batch translation request"""
+    texts: List[str] = Field(
+        ...,
+        description="Texts to translate (long texts are split into chunks)",
+        min_items=1,
+        max_items=100
+    )
+    target_languages: List[str] = Field(
+        ...,
+        description="Target language codes",
+        min_items=1,
+        max_items=10
+    )
+    source_language: str = Field(
+        default="auto",
+        description="Source language code (auto-detect by default)"
+    )
+    
+    @validator('texts', each_item=True)
+    def text_within_limit(cls, v):
+        if len(v) > 100000:
+            raise ValueError('Each text must be at most 100000 characters')
+        return v
+
+
+class BatchTranslationItem(BaseModel):
+    """Translations of one input text"""
+    index: int
+    original_text: str
+    translations: Dict[str, str]
+    errors: Dict[str, str] = Field(default_factory=dict)
+
+
+class BatchTranslationResponse(BaseModel):
+    """Batch translation response"""
+    success: bool
+    results: List[BatchTranslationItem]
+    total_texts: int
+    unique_texts: int
+    total_chunks: int
+    total_failed: int
+    processing_time: float
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
 class BatchOCRResponse(BaseModel):
     """Batch OCR response"""
     success: bool
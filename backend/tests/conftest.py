@@ -0,0 +1,23 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Tests import the backend modules the way main.py does (engines.*, executors, ...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """main.py imported offline (no caches, no preload) from a scratch directory"""
+    pytest.importorskip("torch")
+    pytest.importorskip("easyocr")
+    os.environ.update({
+        "RESULT_CACHE_ENABLED": "false", "TRANSLATION_CACHE_ENABLED": "false", "TTS_CACHE_ENABLED": "false",
+        "RATE_LIMIT_ENABLED": "false", "REQUEST_LOGGING_ENABLED": "false", "PRELOAD_ENGINES": "",
+        "TTS_PYTTSX3_WORKERS": "0"
+    })
+    os.chdir(tmp_path_factory.mktemp("app"))
+    import main
+    return main
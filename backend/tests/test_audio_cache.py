@@ -0,0 +1,63 @@
+import threading
+import time
+
+from engines.audio_cache import AudioCache
+
+
+def test_concurrent_identical_requests_generate_once(tmp_path):
+    cache = AudioCache(tmp_path / "cache", grace_seconds=0)
+    generated = []
+
+    def request():
+        if cache.get("k") is not None:
+            return
+        with cache.key_lock("k"):
+            if cache.get("k", waited=True) is None:
+                time.sleep(0.05)
+                source = tmp_path / f"speech_{len(generated)}.wav"
+                source.write_bytes(b"audio")
+                generated.append(source)
+                cache.put("k", source)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(generated) == 1
+    stats = cache.get_stats()
+    assert stats["misses"] == 4 and stats["coalesced"] == 3
+    assert stats["generating"] == 0
+
+
+def test_key_locks_are_released_after_use(tmp_path):
+    cache = AudioCache(tmp_path / "cache")
+    for i in range(100):
+        with cache.key_lock(f"key-{i}"):
+            assert cache.get_stats()["generating"] == 1
+    assert cache.key_locks == {}
+
+
+def test_eviction_does_not_split_a_held_key_lock(tmp_path):
+    cache = AudioCache(tmp_path / "cache", max_bytes=4, grace_seconds=0)
+    entered = []
+
+    def waiter_request():
+        with cache.key_lock("k"):
+            entered.append(True)
+
+    with cache.key_lock("k"):
+        source = tmp_path / "speech.wav"
+        source.write_bytes(b"too big for the budget")
+        cache.put("k", source)
+        assert cache.get_stats()["files"] == 0  # evicted straight away
+
+        # A second request for the evicted key still waits for this one
+        waiter = threading.Thread(target=waiter_request)
+        waiter.start()
+        waiter.join(0.1)
+        assert not entered
+    waiter.join(1)
+    assert entered
+    assert cache.key_locks == {}
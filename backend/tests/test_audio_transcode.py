@@ -0,0 +1,108 @@
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from engines.audio_transcode import (
+    TranscodeUnavailable, _read_extended, downmix, read_audio, resample, transcode
+)
+
+# One stereo test signal: left ramps up, right ramps down
+SIGNAL = np.stack([np.linspace(-0.9, 0.9, 64), np.linspace(0.9, -0.9, 64)], axis=1).astype(np.float32)
+
+
+def extended(rate):
+    """80-bit IEEE 754 extended float for an integer sample rate"""
+    exponent = rate.bit_length() - 1
+    return struct.pack(">HQ", 16383 + exponent, rate << (63 - exponent))
+
+
+def chunk(chunk_id, body):
+    return chunk_id + struct.pack(">I", len(body)) + body + (b"\0" if len(body) & 1 else b"")
+
+
+def write_aiff(path, sound, channels, bits, rate, compression=None):
+    comm = struct.pack(">hIh", channels, len(sound) // (channels * ((bits + 7) // 8)), bits) + extended(rate)
+    if compression is not None:
+        comm += compression + b"\x04none\0"  # pascal-string compression name
+    form = b"AIFC" if compression is not None else b"AIFF"
+    body = form + chunk(b"COMM", comm) + chunk(b"NAME", b"odd") + chunk(b"SSND", struct.pack(">II", 0, 0) + sound)
+    path.write_bytes(b"FORM" + struct.pack(">I", len(body)) + body)
+
+
+def pcm16(samples, order):
+    return (samples * 32768).round().astype(f"{order}i2").tobytes()
+
+
+@pytest.mark.parametrize("rate", [8000, 22050, 44100, 48000])
+def test_extended_sample_rate(rate):
+    assert _read_extended(extended(rate)) == rate
+
+
+def test_aiff_16_bit(tmp_path):
+    path = tmp_path / "speech.aiff"
+    write_aiff(path, pcm16(SIGNAL, ">"), 2, 16, 22050)
+    samples, rate = read_audio(path)
+    assert rate == 22050 and samples.shape == (64, 2)
+    np.testing.assert_allclose(samples, SIGNAL, atol=1 / 32768)
+
+
+def test_aiff_24_bit(tmp_path):
+    ints = (SIGNAL * 8388608).round().astype(np.int32).reshape(-1)
+    sound = b"".join(int(value).to_bytes(3, "big", signed=True) for value in ints)
+    path = tmp_path / "speech.aiff"
+    write_aiff(path, sound, 2, 24, 44100)
+    samples, _ = read_audio(path)
+    np.testing.assert_allclose(samples, SIGNAL, atol=1 / 8388608)
+
+
+@pytest.mark.parametrize("compression, sound", [
+    (b"NONE", pcm16(SIGNAL, ">")),
+    (b"sowt", pcm16(SIGNAL, "<")),
+    (b"fl32", SIGNAL.astype(">f4").tobytes()),
+    (b"fl64", SIGNAL.astype(">f8").tobytes()),
+], ids=["NONE", "sowt", "fl32", "fl64"])
+def test_aiff_c(tmp_path, compression, sound):
+    bits = {b"fl32": 32, b"fl64": 64}.get(compression, 16)
+    path = tmp_path / "speech.aifc"
+    write_aiff(path, sound, 2, bits, 22050, compression=compression)
+    samples, rate = read_audio(path)
+    assert rate == 22050
+    np.testing.assert_allclose(samples, SIGNAL, atol=1 / 32768)
+
+
+def test_aiff_c_unsupported_compression(tmp_path):
+    path = tmp_path / "speech.aifc"
+    write_aiff(path, b"\0" * 64, 1, 8, 8000, compression=b"ulaw")
+    with pytest.raises(TranscodeUnavailable):
+        read_audio(path)
+
+
+@pytest.mark.parametrize("width", [1, 2])
+def test_wav(tmp_path, width):
+    path = tmp_path / "speech.wav"
+    if width == 1:
+        frames = (SIGNAL * 128 + 128).round().astype(np.uint8).tobytes()
+    else:
+        frames = pcm16(SIGNAL, "<")
+    with wave.open(str(path), "wb") as audio:
+        audio.setnchannels(2)
+        audio.setsampwidth(width)
+        audio.setframerate(16000)
+        audio.writeframes(frames)
+    samples, rate = read_audio(path)
+    assert rate == 16000
+    np.testing.assert_allclose(samples, SIGNAL, atol=1 / 128 if width == 1 else 1 / 32768)
+
+
+def test_transcode_aiff_to_mono_wav(tmp_path):
+    source = tmp_path / "speech.aiff"
+    write_aiff(source, pcm16(SIGNAL, ">"), 2, 16, 22050)
+    target = transcode(source, "wav", sample_rate=11025, channels=1)
+    assert target == tmp_path / "speech.wav" and source.exists()
+
+    samples, rate = read_audio(target)
+    assert rate == 11025 and samples.shape == (32, 1)
+    expected = resample(downmix(SIGNAL), 22050, 11025)
+    np.testing.assert_allclose(samples, expected, atol=2 / 32768)
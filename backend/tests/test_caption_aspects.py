@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from PIL import Image
+
+from benchmarks.bench_caption_aspects import batched_detailed, sequential_detailed
+from benchmarks.run_benchmarks import tiny_blip
+from engines.caption_engine import CaptionEngine
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    """CaptionEngine running a tiny randomly initialised BLIP (no download)"""
+    engine = CaptionEngine()
+    engine.processor, engine.model = tiny_blip(tmp_path_factory.mktemp("vocab"))
+    return engine
+
+
+@pytest.mark.parametrize("size", [(512, 384), (300, 500)])
+def test_batched_aspects_match_the_reference_path(engine, size):
+    image = Image.radial_gradient('L').convert('RGB').resize(size)
+    caption, aspects = sequential_detailed(engine, image)
+    assert batched_detailed(engine, image) == (caption, aspects)
+    assert list(aspects) == list(CaptionEngine.ASPECT_PROMPTS)
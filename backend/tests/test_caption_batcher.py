@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from engines.caption_batcher import CaptionBatcher
+from executors import EngineBusyError, EngineExecutor
+
+
+class FakeCaptionEngine:
+    def __init__(self):
+        self.batches = []
+
+    def generate_caption_batch(self, images, detailed):
+        self.batches.append(list(images))
+        return [{"caption": f"caption {image}"} for image in images]
+
+
+def test_batches_run_through_the_engine_pool():
+    engine = FakeCaptionEngine()
+    executor = EngineExecutor("caption", max_workers=1)
+    batcher = CaptionBatcher(engine, max_batch_size=4, max_wait_ms=50, executor=executor)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+
+    results = asyncio.run(scenario())
+    assert [r["caption"] for r in results] == [f"caption {i}" for i in range(4)]
+    assert engine.batches == [[0, 1, 2, 3]]
+    assert executor.get_stats()["completed"] == 1
+    executor.shutdown()
+
+
+def test_rejects_when_batch_queue_is_full():
+    batcher = CaptionBatcher(FakeCaptionEngine(), max_batch_size=2, max_wait_ms=1000, max_queue=2)
+
+    async def scenario():
+        first = asyncio.ensure_future(batcher.submit(1))
+        second = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0)
+        with pytest.raises(EngineBusyError):
+            await batcher.submit(3)
+        return await asyncio.gather(first, second)
+
+    results = asyncio.run(scenario())
+    assert len(results) == 2
+    assert batcher.get_stats()["rejected"] == 1
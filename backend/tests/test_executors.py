@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import pytest
+
+from executors import EngineBusyError, EngineExecutor
+
+
+def test_run_returns_result_and_counts():
+    executor = EngineExecutor("test", max_workers=2)
+
+    async def main():
+        return await asyncio.gather(*(executor.run(pow, n, 2) for n in range(5)))
+
+    assert asyncio.run(main()) == [0, 1, 4, 9, 16]
+    stats = executor.get_stats()
+    assert stats["completed"] == 5
+    assert stats["active"] == 0 and stats["waiting"] == 0
+    executor.shutdown()
+
+
+def test_rejects_when_queue_is_full():
+    executor = EngineExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(EngineBusyError):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(running, queued)
+
+    asyncio.run(main())
+    assert executor.get_stats()["rejected"] == 1
+    executor.shutdown()
+
+
+def test_cancelled_queued_jobs_release_their_slots():
+    executor = EngineExecutor("test", max_workers=1, max_queue=2)
+    release = threading.Event()
+    ran = []
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = [asyncio.ensure_future(executor.run(ran.append, n)) for n in range(2)]
+        await asyncio.sleep(0.05)
+        assert executor.get_stats()["waiting"] == 2
+
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        release.set()
+        await running
+
+        # The pool accepts a full queue again instead of answering busy forever
+        await asyncio.gather(*(executor.run(ran.append, n) for n in range(3)))
+
+    asyncio.run(main())
+    stats = executor.get_stats()
+    assert stats["waiting"] == 0 and stats["active"] == 0
+    assert stats["cancelled"] == 2
+    assert ran == [0, 1, 2]  # the cancelled jobs never ran
+    executor.shutdown()
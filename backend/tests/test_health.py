@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+from engines.engine_state import EngineState
+from engines.translation_backends import GoogleBackend, MarianBackend, PhraseTableBackend
+from engines.translation_engine import TranslationEngine
+
+
+def test_translation_status_reports_each_backend(monkeypatch):
+    marian = MarianBackend()
+    engine = TranslationEngine(backends=[
+        PhraseTableBackend(tables={"en-es": {"hello": "hola"}}), marian, GoogleBackend()
+    ])
+    status = engine.get_status()
+    assert status["backends"]["phrase_table"] == {"state": "warm", "pairs": 1, "phrases": 1}
+    assert status["backends"]["google"]["state"] == EngineState.NOT_APPLICABLE
+    assert status["state"] == EngineState.WARM
+
+    marian.unavailable.add(("en", "xx"))
+    assert marian.get_status()["unavailable_pairs"] == ["en-xx"]
+
+    only_google = TranslationEngine(backends=[GoogleBackend()]).get_status()
+    assert only_google["state"] == EngineState.NOT_APPLICABLE
+
+
+def test_health_reports_real_translation_and_tts_state(app_module):
+    main = app_module
+    response = asyncio.run(main.health_check())
+    engines = json.loads(response.body)["engines"]
+    assert engines["translation"] == main.translation_engine.get_status()
+    assert engines["tts"]["backend"] == main.tts_engine.backend_name()
+    if engines["tts"]["backend"] in ("say", "gtts"):
+        assert engines["tts"]["state"] == EngineState.NOT_APPLICABLE
+
+
+def test_tts_status_without_any_backend_is_failed(tmp_path, monkeypatch):
+    from engines import tts_engine
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tts_engine.platform, "system", lambda: "Linux")
+    monkeypatch.setattr(tts_engine, "GTTS_AVAILABLE", False)
+    monkeypatch.setattr(tts_engine, "PYTTSX3_AVAILABLE", False)
+    status = tts_engine.TTSEngine(pyttsx3_workers=0).get_status()
+    assert status["state"] == EngineState.FAILED and status["backend"] is None
+    assert "No TTS engine available" in status["error"]
@@ -0,0 +1,61 @@
+import pytest
+
+from engines.ocr_tiling import axis_segments, merge_tile_results, tile_grid
+
+
+@pytest.mark.parametrize("length, starts", [
+    (1000, [0]),
+    (1280, [0]),
+    (1281, [0, 540]),
+    (2400, [0, 733, 1466]),
+    (5000, [0, 960, 1920, 2880, 3840]),
+])
+def test_axis_segments_spread_tiles_evenly(length, starts):
+    segments = axis_segments(length, 1280, 200)
+    assert [start for start, _, _, _ in segments] == starts
+    assert segments[-1][1] == length
+    # Cores tile the axis without gaps or overlap
+    assert segments[0][2] == 0 and segments[-1][3] == length
+    for previous, current in zip(segments, segments[1:]):
+        assert previous[3] == current[2]
+        # Neighbours share about the configured overlap, never less
+        assert 200 <= previous[1] - current[0] <= 201
+        assert previous[1] - previous[0] <= 1280
+
+
+def box(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def test_word_in_overlap_is_reported_once():
+    tiles = tile_grid(2400, 1000, 1280, 200)
+    assert [tile["box"][0] for tile in tiles] == [0, 733, 1466]
+    # A word at x=760..860 lies whole in both tile 0 and tile 1
+    results = [
+        (tiles[0], [(box(760, 10, 860, 40), "shared", 0.8)]),
+        (tiles[1], [(box(27, 10, 127, 40), "shared", 0.9)]),
+    ]
+    merged = merge_tile_results(results, 2400, 1000)
+    assert [(text, conf) for _, text, conf in merged] == [("shared", 0.9)]
+    assert merged[0][0][0] == [760.0, 10.0]
+
+
+def test_cut_word_outside_core_is_dropped():
+    tiles = tile_grid(2400, 1000, 1280, 200)
+    # Tile 0 only sees the left part of a word that tile 1 reads whole
+    results = [
+        (tiles[0], [(box(860, 10, 934, 40), "hel", 0.9)]),
+        (tiles[1], [(box(127, 10, 247, 40), "hello", 0.6)]),
+    ]
+    merged = merge_tile_results(results, 2400, 1000)
+    assert [text for _, text, _ in merged] == ["hello"]
+
+
+def test_distinct_words_are_kept():
+    tiles = tile_grid(2400, 1000, 1280, 200)
+    results = [
+        (tiles[0], [(box(10, 10, 100, 40), "left", 0.9)]),
+        (tiles[2], [(box(800, 10, 900, 40), "right", 0.9)]),
+    ]
+    merged = merge_tile_results(results, 2400, 1000)
+    assert [text for _, text, _ in merged] == ["left", "right"]
@@ -0,0 +1,117 @@
+import pytest
+
+from middleware import MemoryStore, RateLimiter, RedisStore
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_limiter(limit=10, **store_kwargs):
+    clock = Clock()
+    return RateLimiter(limit, store=MemoryStore(**store_kwargs), window=60, clock=clock), clock
+
+
+def test_limit_within_one_window():
+    limiter, clock = make_limiter()
+    clock.now = 1
+    assert all(limiter.is_allowed("client") for _ in range(10))
+    assert not limiter.is_allowed("client")
+    assert limiter.get_remaining("client") == 0
+    assert limiter.is_allowed("other")
+
+
+def test_previous_window_fades_out_after_roll_over():
+    limiter, clock = make_limiter()
+    clock.now = 1
+    for _ in range(10):
+        limiter.is_allowed("client")
+
+    # 10 * (1 - 1/60) of the previous window still counts just after the roll-over
+    clock.now = 61
+    assert not limiter.is_allowed("client")
+    # Half way through, half the previous window counts
+    clock.now = 90
+    assert limiter.get_remaining("client") == 5
+    assert sum(limiter.is_allowed("client") for _ in range(10)) == 5
+
+
+def test_reset_after_is_exact():
+    limiter, clock = make_limiter()
+    clock.now = 1
+    for _ in range(10):
+        limiter.is_allowed("client")
+    reset_after = limiter.get_reset_time("client")
+    assert reset_after == pytest.approx(65)
+
+    clock.now = 1 + reset_after - 0.1
+    assert not limiter.is_allowed("client")
+    clock.now = 1 + reset_after
+    assert limiter.is_allowed("client")
+
+
+def test_gap_of_two_windows_clears_counts():
+    limiter, clock = make_limiter()
+    clock.now = 59
+    for _ in range(10):
+        limiter.is_allowed("client")
+    clock.now = 121  # window 2: window 0 is no longer the previous window
+    assert limiter.get_remaining("client") == 10
+
+
+def test_idle_clients_are_evicted():
+    limiter, clock = make_limiter()
+    for n in range(5):
+        limiter.is_allowed(f"client-{n}")
+    clock.now = 100
+    limiter.is_allowed("active")
+    assert limiter.get_stats()["clients"] == 6
+
+    clock.now = 121  # two windows after the first clients were last seen
+    limiter.is_allowed("active")
+    stats = limiter.get_stats()
+    assert stats["clients"] == 1 and stats["evicted"] == 5
+
+
+def test_client_count_is_bounded():
+    limiter, clock = make_limiter(max_keys=3)
+    for n in range(5):
+        limiter.is_allowed(f"client-{n}")
+    assert list(limiter.store.counters) == ["client-2", "client-3", "client-4"]
+    assert limiter.get_stats()["evicted"] == 2
+
+    # Read-only checks do not create entries
+    limiter.get_remaining("unknown")
+    assert "unknown" not in limiter.store.counters
+
+
+def test_redis_store_fails_open(monkeypatch):
+    redis = pytest.importorskip("redis")
+    store = RedisStore("redis://127.0.0.1:1/0")
+
+    def unreachable(keys, args):
+        raise redis.ConnectionError("connection refused")
+
+    monkeypatch.setattr(store, "script", unreachable)
+    limiter = RateLimiter(1, store=store, window=60, clock=Clock(30))
+    assert limiter.is_allowed("client") and limiter.is_allowed("client")
+    assert not limiter.check("client", consume=False)["allowed"]
+    assert store.get_stats()["errors"] == 3
+
+
+def test_redis_store_uses_one_key_per_window(monkeypatch):
+    pytest.importorskip("redis")
+    store = RedisStore("redis://127.0.0.1:1/0", prefix="rl:")
+    calls = []
+
+    def script(keys, args):
+        calls.append((keys, args))
+        return [1, 3, 7]
+
+    monkeypatch.setattr(store, "script", script)
+    assert store.hit("client", 10, 60, now=150) == (True, 3, 7, 30)
+    assert calls == [(["rl:client:2", "rl:client:1"], [10, 60, 30, 1])]
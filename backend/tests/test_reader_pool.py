@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("easyocr")
+
+from engines.engine_state import EngineState
+from engines.reader_pool import ReaderPool
+
+
+def make_pool(monkeypatch, **kwargs):
+    pool = ReaderPool(**kwargs)
+    monkeypatch.setattr(pool, "_create_reader", lambda languages: SimpleNamespace(languages=languages))
+    return pool
+
+
+def test_evicted_readers_drop_their_state(monkeypatch):
+    pool = make_pool(monkeypatch, max_readers=2)
+    pool.pin(["en"])
+    pool.get(["en"])
+    for code in ["fr", "de", "es", "it", "pt"]:
+        pool.get(["en", code])
+
+    assert pool.get_stats()["evictions"] == 4
+    assert sorted(pool.states) == ["en", "en,pt"]
+    assert pool.state(["en", "fr"]) == EngineState.UNLOADED
+    assert pool.state(["en", "pt"]) == EngineState.WARM
+
+
+def test_failed_loads_only_keep_pinned_state(monkeypatch):
+    pool = ReaderPool(max_readers=2)
+
+    def fail(languages):
+        raise RuntimeError("no model")
+
+    monkeypatch.setattr(pool, "_create_reader", fail)
+    pool.pin(["ja"])
+    for languages in (["ja"], ["xx"]):
+        with pytest.raises(RuntimeError):
+            pool.get(languages)
+
+    assert list(pool.states) == ["ja"]
+    assert pool.state(["ja"]) == EngineState.FAILED
@@ -0,0 +1,17 @@
+import asyncio
+
+
+def test_ocr_cache_key_ignores_language_order(app_module, monkeypatch, tmp_path):
+    main = app_module
+    cache = main.ResultCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(main, "result_cache", cache)
+    calls = []
+
+    def extract(image, languages, tiled=False):
+        calls.append(languages)
+        return {"text": "hello", "languages": languages}
+
+    monkeypatch.setattr(main.ocr_engine, "extract_text_from_image", extract)
+    first = asyncio.run(main.run_ocr(b"image bytes", ["en", "hi"]))
+    second = asyncio.run(main.run_ocr(b"image bytes", ["hi", "en"]))
+    assert first == second and calls == [["en", "hi"]]
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from engines.translation_backends import GoogleBackend
+from engines.translation_engine import TranslationEngine, join_chunks, split_text
+
+
+@pytest.mark.parametrize("text, max_chars", [
+    ("One sentence. Another one! A third?", 15),
+    ("First line.\nSecond line.\n\nThird paragraph.", 20),
+    ("A sentence without a boundary that is far longer than the limit", 10),
+    ("Supercalifragilisticexpialidocious word.", 8),
+    ("नमस्ते दुनिया। यह एक परीक्षण है।", 12),
+])
+def test_split_text_round_trip(text, max_chars):
+    chunks = split_text(text, max_chars)
+    assert all(len(chunk) <= max_chars for chunk, _ in chunks)
+    # Translating every chunk to itself gives the text back (whitespace normalized)
+    joined = join_chunks([chunk for chunk, _ in chunks], chunks)
+    assert joined.split() == text.split()
+
+
+def test_google_backend_never_sends_unsupported_languages(monkeypatch):
+    backend = GoogleBackend(base_url="http://127.0.0.1:9")
+
+    def no_request(*args, **kwargs):
+        raise AssertionError("request sent")
+
+    monkeypatch.setattr(backend.session, "get", no_request)
+    assert backend.supports("auto", "zh-CN") and backend.supports("en", "hi")
+    assert not backend.supports("auto", "xx") and not backend.supports("qq", "en")
+
+    result = TranslationEngine(backends=[backend]).translate("hello", "xx")
+    assert "no backend supports auto-xx" in result["error"]
+
+
+def test_batch_reports_failed_items_and_shares_one_limit(app_module, monkeypatch):
+    main = app_module
+    monkeypatch.setattr(main, "translation_batch_limit", None)
+    monkeypatch.setattr(main.config, "TRANSLATION_WORKERS", 2)
+    lock = threading.Lock()
+    running = [0, 0]  # current, most at once
+
+    def fake_translate(text, target_language, source_language="auto"):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        if target_language == "de":
+            raise main.EngineBusyError("translation")
+        return {"translated_text": f"{text} ({target_language})"}
+
+    monkeypatch.setattr(main.translation_engine, "translate", fake_translate)
+
+    async def two_batches():
+        requests = [
+            main.BatchTranslationRequest(texts=[f"text {batch}-{i}" for i in range(4)], target_languages=["es", "de"])
+            for batch in range(2)
+        ]
+        return await asyncio.gather(*(main.translate_batch(request) for request in requests))
+
+    for response in asyncio.run(two_batches()):
+        assert response.success is False  # every text failed for 'de'
+        assert response.total_failed == 4
+        for item in response.results:
+            assert item.translations["es"] == f"{item.original_text} (es)"
+            assert "busy" in item.errors["de"]
+            assert "es" not in item.errors
+    assert running[1] <= 2
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from engines.cache import TTLCache
+
+
+def run_concurrently(fn, count):
+    results = [None] * count
+    errors = [None] * count
+
+    def call(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_misses_compute_once():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"translated_text": "hola"}
+
+    results, _ = run_concurrently(lambda: cache.get_or_compute("k", compute), 5)
+    assert len(calls) == 1
+    assert all(result == {"translated_text": "hola"} for result in results)
+    stats = cache.get_stats()
+    assert stats["misses"] == 1 and stats["coalesced"] == 4
+    assert cache.get("k") == {"translated_text": "hola"}
+
+
+def test_uncacheable_value_is_shared_but_not_stored():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"error": "upstream failed"}
+
+    results, _ = run_concurrently(
+        lambda: cache.get_or_compute("k", compute, cacheable=lambda value: "error" not in value), 3
+    )
+    assert len(calls) == 1 and all(result == {"error": "upstream failed"} for result in results)
+    assert cache.get("k") is None
+    cache.get_or_compute("k", compute)
+    assert len(calls) == 2
+
+
+def test_waiters_see_the_leaders_exception():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+
+    def compute():
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    _, errors = run_concurrently(lambda: cache.get_or_compute("k", compute), 3)
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert cache.in_flight == {}
+
+
+def test_entries_expire_and_evict(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts b, the least recently used
+    assert cache.get("b") is None and cache.get("a") == 1
+
+    now[0] += 10
+    assert cache.get("a") is None
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["expirations"] == 1
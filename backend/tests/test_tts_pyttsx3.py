@@ -0,0 +1,87 @@
+import threading
+from types import SimpleNamespace
+
+from engines import tts_engine, tts_workers
+from engines.tts_workers import Pyttsx3WorkerPool
+from engines.voice_registry import VoiceRegistry
+
+
+class FakePyttsx3Engine:
+    """Records settings and writes the text as the 'audio'"""
+
+    def __init__(self, lock=None):
+        self.lock = lock
+        self.properties = {"voice": "voice-default"}
+        self.pending = None
+        self.spoken = []  # (text, voice) of every job
+        self.voices = [
+            SimpleNamespace(id="voice-en", name="English (America)"),
+            SimpleNamespace(id="voice-hi", name="Hindi"),
+        ]
+
+    def getProperty(self, name):
+        if self.lock is not None:
+            assert self.lock.locked()
+        return self.voices if name == "voices" else self.properties.get(name)
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def save_to_file(self, text, path):
+        self.pending = (text, path)
+
+    def runAndWait(self):
+        text, path = self.pending
+        self.spoken.append((text, self.properties["voice"]))
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def test_pyttsx3_is_used_without_say_or_gtts(tmp_path, monkeypatch):
+    engine = FakePyttsx3Engine()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tts_engine.platform, "system", lambda: "Linux")
+    monkeypatch.setattr(tts_engine, "GTTS_AVAILABLE", False)
+    monkeypatch.setattr(tts_engine, "PYTTSX3_AVAILABLE", True)
+    monkeypatch.setattr(tts_engine, "pyttsx3", SimpleNamespace(init=lambda: engine), raising=False)
+
+    tts = tts_engine.TTSEngine(pyttsx3_workers=0)
+    assert tts.backend_name() == "pyttsx3"
+    monkeypatch.setattr(tts, "_translate_if_needed", lambda text, language: text)
+
+    result = tts.generate_speech("hello there", "hi", rate=200)
+    assert result["success"] and result["engine"] == "pyttsx3"
+    assert open(result["audio_file"]).read() == "hello there"
+    assert engine.properties["voice"] == "voice-hi"
+    assert engine.properties["rate"] == 170
+    assert tts.get_stats()["completed"] == 1
+
+
+def test_in_process_jobs_use_their_own_settings(tmp_path):
+    engine = FakePyttsx3Engine()
+    pool = Pyttsx3WorkerPool(workers=0, engine=engine)
+    pool.synthesize("one", tmp_path / "one.wav", voice="voice-en", rate=150)
+    pool.synthesize("two", tmp_path / "two.wav", rate=250)
+    assert (tmp_path / "two.wav").read_text() == "two"
+    assert engine.properties["rate"] == 250
+    # A job without a voice gets the default back, not the previous job's voice
+    assert engine.spoken == [("one", "voice-en"), ("two", "voice-default")]
+    assert pool.get_stats()["completed"] == 2
+
+
+def test_worker_jobs_without_a_voice_use_the_default(tmp_path, monkeypatch):
+    engine = FakePyttsx3Engine()
+    monkeypatch.setattr(tts_workers, "pyttsx3", SimpleNamespace(init=lambda: engine), raising=False)
+    monkeypatch.setattr(tts_workers, "_worker_engine", None)
+    monkeypatch.setattr(tts_workers, "_worker_default_voice", None)
+    tts_workers._init_worker()
+    tts_workers._run_job("one", tmp_path / "one.wav", "voice-hi", 200, 0.9, 0)
+    tts_workers._run_job("two", tmp_path / "two.wav", None, 200, 0.9, 0)
+    assert engine.spoken == [("one", "voice-hi"), ("two", "voice-default")]
+
+
+def test_voice_refresh_holds_the_engine_lock():
+    lock = threading.Lock()
+    registry = VoiceRegistry("pyttsx3", engine=FakePyttsx3Engine(lock), engine_lock=lock)
+    assert registry.pyttsx3_voice("hi")["id"] == "voice-hi"
+    assert registry.refresh() == 2
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from engines.audio_transcode import write_wav
+
+
+def test_stream_disconnect_releases_tts_pool(app_module, monkeypatch):
+    main = app_module
+    pool = main.executors["tts"]
+    # Synthesize further ahead than the pool has workers, so segments queue
+    monkeypatch.setattr(main.config, "TTS_STREAM_CONCURRENCY", pool.max_workers + 3)
+    segments = [f"Sentence {n}." for n in range(pool.max_workers + 6)]
+    release = threading.Event()
+    started = []
+
+    def slow_speech(text, language, rate, output_format=None):
+        started.append(text)
+        if text != segments[0]:
+            release.wait(5)
+        return {"success": True, "audio_file": "unused.wav", "format": "wav"}
+
+    monkeypatch.setattr(main.tts_engine, "generate_speech", slow_speech)
+    cancelled_before = pool.get_stats()["cancelled"]
+
+    async def disconnect_after_first():
+        results = main.synthesize_in_order(segments, "en", 200)
+        await results.__anext__()
+        await results.aclose()  # what StreamingResponse does when the client goes away
+
+    asyncio.run(disconnect_after_first())
+    release.set()
+
+    deadline = time.time() + 5
+    while time.time() < deadline and (pool.get_stats()["active"] or pool.get_stats()["waiting"]):
+        time.sleep(0.01)
+    stats = pool.get_stats()
+    assert stats["active"] == 0 and stats["waiting"] == 0
+    assert stats["cancelled"] > cancelled_before
+    assert len(started) < len(segments)  # queued segments were never synthesized
+
+
+def wav_speech(directory, started=None, release=None, first=None):
+    """generate_speech stand-in writing a short WAV per call"""
+    def speech(text, language, rate, output_format=None):
+        if started is not None:
+            started.append(text)
+        if release is not None and text != first:
+            release.wait(5)
+        audio_file = directory / f"speech_{abs(hash(text))}.wav"
+        write_wav(audio_file, np.zeros((160, 1), dtype=np.float32), 16000)
+        return {"success": True, "audio_file": str(audio_file), "format": "wav"}
+
+    return speech
+
+
+def test_streamed_segments_are_deleted_without_a_cache(app_module, monkeypatch, tmp_path):
+    main = app_module
+    assert main.tts_engine.audio_cache is None
+    monkeypatch.setattr(main.tts_engine, "generate_speech", wav_speech(tmp_path))
+    monkeypatch.setattr(main.config, "TTS_STREAM_SEGMENT_CHARS", 8)
+
+    client = TestClient(main.app)
+    response = client.post("/api/tts/stream", json={"text": "One. Two. Three.", "language": "en"})
+    assert response.status_code == 200 and response.headers["X-Segment-Count"] == "3"
+    assert len(response.content) == 44 + 3 * 160 * 2  # one WAV header, then each segment's frames
+    response = client.post("/api/tts", json={"text": "Four.", "language": "en"})
+    assert response.status_code == 200 and response.content[:4] == b"RIFF"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_disconnected_stream_deletes_unsent_segments(app_module, monkeypatch, tmp_path):
+    main = app_module
+    pool = main.executors["tts"]
+    monkeypatch.setattr(main.config, "TTS_STREAM_CONCURRENCY", 3)
+    segments = [f"Sentence {n}." for n in range(6)]
+    release = threading.Event()
+    started = []
+    monkeypatch.setattr(
+        main.tts_engine, "generate_speech", wav_speech(tmp_path, started, release, first=segments[0])
+    )
+
+    async def disconnect_after_first():
+        results = main.synthesize_in_order(segments, "en", 200)
+        first = await results.__anext__()
+        main.tts_engine.release_audio(first["audio_file"])  # what the stream does once sent
+        await results.aclose()
+
+    asyncio.run(disconnect_after_first())
+    release.set()
+
+    deadline = time.time() + 5
+    while time.time() < deadline and (pool.get_stats()["active"] or pool.get_stats()["waiting"]):
+        time.sleep(0.01)
+    assert len(started) > 1  # some segments were synthesized after the client left
+    assert list(tmp_path.iterdir()) == []